@@ -23,7 +23,7 @@ def create_app():
     db.init_app(app)
     
     # Register blueprints
-    from app.routes import races, predictions, leaderboard, users, replay, schedule, scoring, news, drivers, race_predictions
+    from app.routes import races, predictions, leaderboard, users, replay, schedule, scoring, news, drivers, race_predictions, jobs
     app.register_blueprint(races.bp)
     app.register_blueprint(predictions.bp)
     app.register_blueprint(leaderboard.bp)
@@ -34,6 +34,7 @@ def create_app():
     app.register_blueprint(news.bp)
     app.register_blueprint(drivers.bp)
     app.register_blueprint(race_predictions.bp)
+    app.register_blueprint(jobs.bp)
     
     # Health check for uptime monitoring
     @app.route('/health')
@@ -46,5 +47,11 @@ def create_app():
     @app.route('/api/health')
     def api_health():
         return {'status': 'ok'}
+
+    @app.route('/api/health/upstreams')
+    def upstream_health():
+        """Per-host request/error counts, latency and breaker state."""
+        from app.services import http_client
+        return http_client.stats()
     
     return app
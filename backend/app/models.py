@@ -14,6 +14,10 @@ class User(db.Model):
     accuracy_rate = db.Column(db.Float,   default=0.0)
     created_at    = db.Column(db.DateTime, default=datetime.utcnow)
 
+    # Running counts behind accuracy_rate, so scoring can apply per-race deltas
+    predictions_correct = db.Column(db.Integer, default=0, server_default='0')
+    predictions_graded  = db.Column(db.Integer, default=0, server_default='0')
+
     predictions = db.relationship('Prediction',  back_populates='user', lazy=True)
     scores      = db.relationship('UserScore',   back_populates='user', lazy=True)
 
@@ -89,7 +93,7 @@ class Prediction(db.Model):
     __tablename__ = 'predictions'
 
     id            = db.Column(db.Integer, primary_key=True)
-    user_id       = db.Column(db.Integer, db.ForeignKey('users.id'),  nullable=False)
+    user_id       = db.Column(db.Integer, db.ForeignKey('users.id'),  nullable=False, index=True)
     race_id       = db.Column(db.Integer, db.ForeignKey('races.id'),  nullable=True)
     driver_name   = db.Column(db.String(100), nullable=False)
     action        = db.Column(db.String(50),  nullable=False)
@@ -182,4 +186,50 @@ class RacePrediction(db.Model):
             'total_points':    self.total_points,
             'submitted_at':    self.submitted_at.isoformat(),
             'updated_at':      self.updated_at.isoformat(),
-        }
\ No newline at end of file
+        }
+
+class ScoringRun(db.Model):
+    """Checkpoint of a chunked scoring pass (see scoring_executor) — one row per (kind, race)."""
+    __tablename__ = 'scoring_runs'
+
+    id            = db.Column(db.Integer, primary_key=True)
+    kind          = db.Column(db.String(20), nullable=False)   # pit|race
+    year          = db.Column(db.Integer, nullable=False)
+    round_num     = db.Column(db.Integer, nullable=False)
+    status        = db.Column(db.String(20), default='running')   # running|done
+    last_id       = db.Column(db.Integer, default=0)   # keyset cursor: rows <= last_id are handled
+    max_id        = db.Column(db.Integer, default=0)   # rows created after the run started wait for the next one
+    total         = db.Column(db.Integer, default=0)
+    processed     = db.Column(db.Integer, default=0)
+    scored        = db.Column(db.Integer, default=0)
+    correct       = db.Column(db.Integer, default=0)
+    wrong         = db.Column(db.Integer, default=0)
+    skipped       = db.Column(db.Integer, default=0)
+    user_updates  = db.Column(db.Integer, default=0)   # user-total rows updated, per chunk (not distinct users)
+    chunks        = db.Column(db.Integer, default=0)
+    started_at    = db.Column(db.DateTime, default=datetime.utcnow)
+    updated_at    = db.Column(db.DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
+    finished_at   = db.Column(db.DateTime, nullable=True)
+
+    __table_args__ = (
+        db.UniqueConstraint('kind', 'year', 'round_num', name='uq_scoring_run'),
+    )
+
+    def to_dict(self):
+        return {
+            'kind':          self.kind,
+            'year':          self.year,
+            'round':         self.round_num,
+            'status':        self.status,
+            'last_id':       self.last_id,
+            'total':         self.total,
+            'processed':     self.processed,
+            'scored':        self.scored,
+            'correct':       self.correct,
+            'wrong':         self.wrong,
+            'skipped':       self.skipped,
+            'user_updates':  self.user_updates,
+            'chunks':        self.chunks,
+            'started_at':    self.started_at.isoformat() if self.started_at else None,
+            'finished_at':   self.finished_at.isoformat() if self.finished_at else None,
+        }
@@ -1,6 +1,6 @@
 from flask import Blueprint, jsonify
-import requests
 import time
+from app.services import http_client
 
 bp = Blueprint('drivers', __name__, url_prefix='/api')
 
@@ -21,11 +21,7 @@ def _fetch_season_stats() -> dict:
     }
     """
     try:
-        resp = requests.get(JOLPICA_STANDINGS, timeout=8, headers={
-            'User-Agent': 'PitLaneLive/1.0'
-        })
-        resp.raise_for_status()
-        data = resp.json()
+        data = http_client.get_json(JOLPICA_STANDINGS, timeout=8)
 
         standings_lists = (
             data.get('MRData', {})
@@ -0,0 +1,19 @@
+from flask import Blueprint, jsonify
+from app.services.job_queue import job_queue, scoring_queue, find_job
+
+bp = Blueprint('jobs', __name__, url_prefix='/api/jobs')
+
+
+@bp.route('/<job_id>', methods=['GET'])
+def get_job(job_id):
+    """Status of a background job: status, stage, percent and result when done."""
+    job = find_job(job_id)
+    if job is None:
+        return jsonify({'error': 'Job not found or expired'}), 404
+    return jsonify(job)
+
+
+@bp.route('/stats', methods=['GET'])
+def get_job_stats():
+    """How many jobs are queued, running, done and failed (scoring counted separately)."""
+    return jsonify({**job_queue.stats(), 'scoring': scoring_queue.stats()})
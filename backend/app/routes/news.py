@@ -1,5 +1,5 @@
 from flask import Blueprint, jsonify
-import requests
+from app.services import http_client
 import xml.etree.ElementTree as ET
 from datetime import datetime, timezone
 import time
@@ -10,6 +10,7 @@ bp = Blueprint('news', __name__, url_prefix='/api')
 # Simple in-memory cache — refresh every 10 minutes
 _cache = {'data': [], 'ts': 0}
 CACHE_TTL = 600  # seconds
+FETCH_BUDGET_S = 10  # all sources together
 
 RSS_SOURCES = [
     # BBC is reliable and usually allows server-side fetches
@@ -59,44 +60,57 @@ def _category_from_title(title: str) -> str:
     return 'F1'
 
 
+def _parse_feed(content: bytes) -> list:
+    """RSS bytes → list of article dicts (at most 12)."""
+    root = ET.fromstring(content)
+    channel = root.find('channel')
+    items = []
+
+    for item in (channel.findall('item') if channel else [])[:12]:
+        title   = _strip_html(item.findtext('title', ''))
+        link    = item.findtext('link', '')
+        pub     = item.findtext('pubDate', '')
+        desc    = _strip_html(item.findtext('description', ''))
+
+        # Truncate summary to ~180 chars at a word boundary
+        if len(desc) > 180:
+            desc = desc[:177].rsplit(' ', 1)[0] + '…'
+
+        if title and link:
+            items.append({
+                'title':    title,
+                'link':     link,
+                'time':     _time_ago(pub),
+                'summary':  desc,
+                'category': _category_from_title(title),
+            })
+
+    return items
+
+
 def _fetch_news():
-    """Fetch and parse RSS, return list of article dicts."""
+    """
+    Fetch and parse RSS, return list of article dicts.
+    All sources are fetched concurrently; the first one in RSS_SOURCES order
+    that yields articles wins, so a slow fallback never delays the primary.
+    """
     try:
+        deadline = http_client.Deadline(FETCH_BUDGET_S)
+        results  = http_client.fan_out({
+            url: (lambda url=url: http_client.get(
+                url, timeout=8, deadline=deadline,
+                headers={'User-Agent': 'Mozilla/5.0 (compatible; PitLaneLive/1.0)'},
+            ))
+            for url in RSS_SOURCES
+        }, deadline)
+
         last_error = None
         for url in RSS_SOURCES:
             try:
-                resp = requests.get(
-                    url,
-                    timeout=8,
-                    headers={
-                        'User-Agent': 'Mozilla/5.0 (compatible; PitLaneLive/1.0)'
-                    },
-                    allow_redirects=True
-                )
-                resp.raise_for_status()
-                root = ET.fromstring(resp.content)
-                channel = root.find('channel')
-                items = []
-
-                for item in (channel.findall('item') if channel else [])[:12]:
-                    title   = _strip_html(item.findtext('title', ''))
-                    link    = item.findtext('link', '')
-                    pub     = item.findtext('pubDate', '')
-                    desc    = _strip_html(item.findtext('description', ''))
-
-                    # Truncate summary to ~180 chars at a word boundary
-                    if len(desc) > 180:
-                        desc = desc[:177].rsplit(' ', 1)[0] + '…'
-
-                    if title and link:
-                        items.append({
-                            'title':    title,
-                            'link':     link,
-                            'time':     _time_ago(pub),
-                            'summary':  desc,
-                            'category': _category_from_title(title),
-                        })
-
+                resp = results[url]
+                if isinstance(resp, Exception):
+                    raise resp
+                items = _parse_feed(resp.content)
                 if items:
                     return items
             except Exception as e:
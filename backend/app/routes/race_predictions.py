@@ -6,9 +6,11 @@ Endpoints:
     GET  /api/race-predictions/mine/<year>/<round>       Current user's prediction
     POST /api/race-predictions/<year>/<round>            Create or update prediction
     GET  /api/race-predictions/all/<year>/<round>        All predictions (post-race only)
+    POST /api/race-predictions/score/<year>/<round>      Admin — queue scoring (202 + job)
+    GET  /api/race-predictions/score/<year>/<round>      Progress / result of that scoring job
 """
 
-from flask import Blueprint, jsonify, request
+from flask import Blueprint, jsonify, request, current_app
 from datetime import datetime
 from app.models import db, RacePrediction
 from app.routes.users import token_required
@@ -165,15 +167,23 @@ ADMIN_KEY = os.getenv('ADMIN_KEY', 'pitlane-admin-2026')
 @bp.route('/score/<int:year>/<int:round_num>', methods=['POST'])
 def score_race(year, round_num):
     """
-    Admin — score all pending race predictions for a completed race.
-    Requires X-Admin-Key header.
+    Admin — queue scoring of all pending race predictions for a completed
+    race as a background job (202 + job; the same job or the finished
+    checkpoint while it runs or once it's done). ?force=1 scores predictions
+    added since a race was scored. Requires X-Admin-Key header.
     """
     if request.headers.get('X-Admin-Key', '') != ADMIN_KEY:
         return jsonify({'error': 'Unauthorized — X-Admin-Key required'}), 401
 
-    from app.services.race_prediction_scoring import score_race_predictions
-    result = score_race_predictions(year, round_num)
+    from app.services.scoring_jobs import submit_scoring
+    job, status = submit_scoring(current_app._get_current_object(), 'race', year, round_num,
+                                 force=request.args.get('force', '') in ('1', 'true'))
+    return jsonify(job), status
 
-    if 'error' in result:
-        return jsonify(result), 422
-    return jsonify(result)
\ No newline at end of file
+
+@bp.route('/score/<int:year>/<int:round_num>', methods=['GET'])
+def score_race_status(year, round_num):
+    """Progress / result of a race's scoring job, or its stored checkpoint."""
+    from app.services.scoring_jobs import scoring_status
+    payload, status = scoring_status('race', year, round_num)
+    return jsonify(payload), status
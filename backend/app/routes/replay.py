@@ -1,6 +1,11 @@
 from flask import Blueprint, jsonify, request, Response
 from app.services.fastf1_service import fastf1_service
-import json, time
+from app.services.job_queue import job_queue
+from app.services.race_columns import ColumnarLaps, race_json_chunks
+from app.services.live_poller import live_poller
+from app.services.sse_broadcaster import live_broadcaster
+from app.services.sim_clock import sim_registry, create_sim, control_sim
+import json
 
 bp = Blueprint('replay', __name__, url_prefix='/api/replay')
 
@@ -11,13 +16,40 @@ def get_available_races():
     races = fastf1_service.get_available_races(year)
     return jsonify(races)
 
+def _process_race_job(year: int, race_round: int):
+    """Job body: build every artifact for a race from one FastF1 load."""
+    def work(progress):
+        result = fastf1_service.build_race_artifacts(year, race_round, progress=progress)
+        if 'error' not in result and result.get('processed') not in ('written', 'cached'):
+            result['error'] = 'Race not found or failed to load'
+        return result
+    return work
+
+def _race_pending(year: int, race_round: int):
+    """
+    202 + job for a race that hasn't been processed yet. Processing runs in
+    the background job queue; concurrent requests join the same job.
+    A failed job keeps answering 404 until it expires from the queue, so a
+    missing race doesn't trigger a FastF1 load on every request.
+    """
+    job = job_queue.find('race', (year, race_round))
+    if job and job['status'] == 'failed':
+        return jsonify({'error': job['error'] or 'Race not found or failed to load',
+                        'job': job}), 404
+
+    job, _ = job_queue.submit('race', (year, race_round), _process_race_job(year, race_round))
+    return jsonify(job), 202
+
 @bp.route('/race/<int:year>/<int:race_round>', methods=['GET'])
 def get_race_data(year, race_round):
-    """Get full race telemetry data for replay"""
-    data = fastf1_service.process_race_telemetry(year, race_round)
+    """Get full race telemetry data for replay (202 + job id while processing)"""
+    data = fastf1_service.load_processed_race(year, race_round)
     if data:
+        if isinstance(data['laps'], ColumnarLaps):
+            # Decoded lap by lap from the mapped file, never as one dict
+            return Response(race_json_chunks(data), mimetype='application/json')
         return jsonify(data)
-    return jsonify({'error': 'Race not found or failed to load'}), 404
+    return _race_pending(year, race_round)
 
 @bp.route('/circuit/<int:year>/<int:race_round>', methods=['GET'])
 def get_circuit_data(year, race_round):
@@ -27,33 +59,45 @@ def get_circuit_data(year, race_round):
         return jsonify(data)
     return jsonify({'error': 'Circuit data not found'}), 404
 
+def _artifact_not_ready(year: int, race_round: int, name: str, message: str):
+    """
+    404 for a race artifact that isn't on disk. These endpoints never load a
+    FastF1 session in the request thread — warm_cache.py builds the artifacts.
+    """
+    if not fastf1_service.has_artifact(year, race_round, name):
+        return jsonify({
+            'error':       f'{message} — not precomputed for {year} R{race_round}',
+            'precomputed': False,
+        }), 404
+    return jsonify({'error': message, 'precomputed': True}), 404
+
 @bp.route('/weather/<int:year>/<int:race_round>', methods=['GET'])
 def get_weather_data(year, race_round):
-    """Get weather information"""
+    """Get weather information (precomputed artifact only)"""
     data = fastf1_service.get_weather_data(year, race_round)
     if data:
         return jsonify(data)
-    return jsonify({'error': 'Weather data not found'}), 404
+    return _artifact_not_ready(year, race_round, 'weather', 'Weather data not found')
 
 @bp.route('/summary/<int:year>/<int:race_round>', methods=['GET'])
 def get_race_summary(year, race_round):
-    """Get quick race summary"""
+    """Get quick race summary (precomputed artifact only)"""
     summary = fastf1_service.get_race_summary(year, race_round)
     if summary:
         return jsonify(summary)
-    return jsonify({'error': 'Race not found'}), 404
+    return _artifact_not_ready(year, race_round, 'summary', 'Race not found')
 
 @bp.route('/lap/<int:year>/<int:race_round>/<int:lap_number>', methods=['GET'])
 def get_lap_data(year, race_round, lap_number):
-    """Get specific lap data"""
-    race_data = fastf1_service.process_race_telemetry(year, race_round)
-    if not race_data:
-        return jsonify({'error': 'Race not found'}), 404
-    
-    if lap_number < 1 or lap_number > len(race_data['laps']):
+    """Get specific lap data — seeks via the lap index, no full-race parse"""
+    meta, lap = fastf1_service.get_processed_lap(year, race_round, lap_number)
+    if meta is None:
+        return _race_pending(year, race_round)
+
+    if lap is None:
         return jsonify({'error': 'Invalid lap number'}), 400
     
-    return jsonify(race_data['laps'][lap_number - 1])
+    return jsonify(lap)
 
 @bp.route('/telemetry/<int:year>/<int:race_round>/<driver>/<int:lap_number>', methods=['GET'])
 def get_driver_telemetry(year, race_round, driver, lap_number):
@@ -63,6 +107,17 @@ def get_driver_telemetry(year, race_round, driver, lap_number):
         return jsonify(data)
     return jsonify({'error': 'Telemetry not available'}), 404
 
+@bp.route('/cache/stats', methods=['GET'])
+def get_cache_stats():
+    """Hit/miss/eviction counters for the in-process parsed-race cache."""
+    from app.services.race_cache import race_cache
+    return jsonify(race_cache.stats())
+
+@bp.route('/cache/sessions', methods=['GET'])
+def get_session_cache_stats():
+    """Size/hit/eviction counters for the in-process FastF1 session cache."""
+    return jsonify(fastf1_service.session_cache_stats())
+
 @bp.route('/available-years', methods=['GET'])
 def get_available_years():
     """Which years have F1 data available."""
@@ -74,46 +129,116 @@ def get_available_years():
 
 # ─── Live race (OpenF1) ───────────────────────────────────────────────────────
 
+# Every endpoint below reads the shared live_poller snapshot; upstream load
+# no longer grows with viewers. Passing a session_key other than the live
+# one still queries OpenF1 directly (e.g. for an earlier session).
+
+def _snapshot_response(payload, snap):
+    """jsonify + the snapshot age, so clients can tell how fresh data is."""
+    age = live_poller.age(snap)
+    response = jsonify(payload)
+    response.headers['X-Snapshot-Age'] = '' if age is None else str(age)
+    response.headers['Cache-Control']  = 'no-cache'
+    return response
+
+def _requested_other_session(snap):
+    session_key = request.args.get('session_key', type=int)
+    if session_key and session_key != snap['session_key']:
+        return session_key
+    return None
+
 @bp.route('/live/state', methods=['GET'])
 def get_live_state():
     """Full live race state. Frontend polls this every 3 seconds."""
-    state = fastf1_service.get_live_full_state()
-    return jsonify(state)
+    snap = live_poller.snapshot()
+    return _snapshot_response(live_poller.state_payload(snap), snap)
 
 @bp.route('/live/positions', methods=['GET'])
 def get_live_positions():
-    session_key = request.args.get('session_key', type=int)
-    return jsonify(fastf1_service.get_live_positions(session_key))
+    snap = live_poller.snapshot()
+    other = _requested_other_session(snap)
+    if other:
+        return jsonify(fastf1_service.get_live_positions(other))
+    return _snapshot_response(snap['positions'], snap)
 
 @bp.route('/live/car/<int:driver_number>', methods=['GET'])
 def get_live_car_data(driver_number):
     """Live telemetry for a single driver."""
-    session_key = request.args.get('session_key', type=int)
-    data = fastf1_service.get_live_car_data(session_key, driver_number)
+    live_poller.watch_car(driver_number)
+    snap = live_poller.snapshot()
+    other = _requested_other_session(snap)
+    if other:
+        data = fastf1_service.get_live_car_data(other, driver_number)
+    else:
+        if driver_number not in snap['car'] and snap['session_key']:
+            # First request for this driver — picked up on the next refresh
+            snap = live_poller.wait_for_update(snap['version'], live_poller.interval * 2)
+        data = snap['car'].get(driver_number)
     if data:
-        return jsonify(data)
+        return _snapshot_response(data, snap)
     return jsonify({'error': 'No live data'}), 404
 
+@bp.route('/live/car/<int:driver_number>/trace', methods=['GET'])
+def get_live_car_trace(driver_number):
+    """
+    Recent telemetry trace for one driver, from the poller's ring buffer.
+
+    Query params:
+        seconds — how far back (default 60)
+        points  — max points returned, downsampled by time (default 200)
+    """
+    live_poller.watch_car(driver_number)
+    snap    = live_poller.snapshot()
+    seconds = request.args.get('seconds', 60,  type=float)
+    points  = request.args.get('points',  200, type=int)
+
+    trace = live_poller.car_trace(driver_number, seconds, points)
+    if trace is None and snap['session_key']:
+        # First request for this driver — filled on the next refresh
+        snap  = live_poller.wait_for_update(snap['version'], live_poller.interval * 2)
+        trace = live_poller.car_trace(driver_number, seconds, points)
+    if not trace or not trace['samples']:
+        return jsonify({'error': 'No live data'}), 404
+    return _snapshot_response(trace, snap)
+
 @bp.route('/live/race-control', methods=['GET'])
 def get_live_race_control():
     """Safety car, yellow flags, VSC, red flags, track limits."""
-    session_key = request.args.get('session_key', type=int)
-    return jsonify(fastf1_service.get_live_race_control(session_key))
+    snap = live_poller.snapshot()
+    other = _requested_other_session(snap)
+    if other:
+        return jsonify(fastf1_service.get_live_race_control(other))
+    return _snapshot_response(snap['race_control'], snap)
 
 @bp.route('/live/pit-stops', methods=['GET'])
 def get_live_pit_stops():
     """All pit stops so far in the current session."""
-    session_key = request.args.get('session_key', type=int)
-    return jsonify(fastf1_service.get_live_pit_stops(session_key))
+    snap = live_poller.snapshot()
+    other = _requested_other_session(snap)
+    if other:
+        return jsonify(fastf1_service.get_live_pit_stops(other))
+    return _snapshot_response(snap['pit_stops'], snap)
+
+@bp.route('/live/poller', methods=['GET'])
+def get_live_poller_stats():
+    """Shared poller status: cadence, snapshot age, refresh/failure counts."""
+    return jsonify(live_poller.stats())
+
+def _last_event_id():
+    try:
+        return int(request.headers.get('Last-Event-ID', ''))
+    except ValueError:
+        return None
+
+def _sse_response(broadcaster):
+    """text/event-stream Response subscribed to `broadcaster` until the client leaves."""
+    sub = broadcaster.subscribe(_last_event_id())
 
-@bp.route('/live/stream', methods=['GET'])
-def live_stream():
-    """Server-Sent Events stream."""
     def generate():
-        while True:
-            state = fastf1_service.get_live_full_state()
-            yield f"data: {json.dumps(state)}\n\n"
-            time.sleep(3)
+        try:
+            yield from sub.stream()
+        finally:
+            broadcaster.unsubscribe(sub)
 
     return Response(
         generate(),
@@ -124,63 +249,21 @@ def live_stream():
         }
     )
 
-# ─── Simulation mode ──────────────────────────────────────────────────────────
-
-def _lap_to_live_state(race_data: dict, lap_number: int) -> dict:
+@bp.route('/live/stream', methods=['GET'])
+def live_stream():
     """
-    Convert a cached FastF1 lap into the exact same shape that
-    get_live_full_state() returns, so LiveRace.vue needs zero changes.
+    Server-Sent Events stream of the live state: a full keyframe first, then
+    `delta` events with only what changed. Reconnecting clients send
+    Last-Event-ID and get the frames they missed (see sse_broadcaster).
     """
-    from datetime import datetime
-
-    laps = race_data.get('laps', [])
-    total_laps = race_data.get('total_laps', len(laps))
+    return _sse_response(live_broadcaster)
 
-    # Clamp lap to valid range
-    lap_number = max(1, min(lap_number, total_laps))
-    lap_data   = laps[lap_number - 1] if lap_number <= len(laps) else {}
-    drivers_raw = lap_data.get('drivers', [])
-
-    drivers = []
-    for i, d in enumerate(drivers_raw):
-        # Detect pit stop on this lap for race_control message
-        pitted = d.get('pit_in') or d.get('pit_out')
-
-        drivers.append({
-            'driver_number': i + 1,          # fake number, not needed by UI
-            'driver':        d.get('driver', '???'),
-            'team':          d.get('team', 'Unknown'),
-            'position':      d.get('position') or (i + 1),
-            'gap':           d.get('gap', 'LEADER'),
-            'interval':      None,            # not in FastF1 lap data
-            'compound':      d.get('compound', 'UNKNOWN'),
-            'tire_age':      d.get('tire_life', 0),
-        })
-
-    # Build a fake race_control message for pit events
-    pit_drivers = [
-        d.get('driver') for d in drivers_raw
-        if d.get('pit_in') or d.get('pit_out')
-    ]
-    race_control = None
-    if pit_drivers:
-        race_control = {
-            'flag':    'PIT',
-            'message': f"PIT STOP: {', '.join(pit_drivers)}"
-        }
-
-    return {
-        'session_key':  f'SIM_{race_data.get("year")}_{race_data.get("round")}',
-        'drivers':      drivers,
-        'race_control': race_control,
-        'timestamp':    datetime.utcnow().isoformat(),
-        # Extra fields the frontend can use to show simulation status
-        'simulated':    True,
-        'sim_lap':      lap_number,
-        'sim_total_laps': total_laps,
-        'sim_race_name':  race_data.get('name', ''),
-    }
+@bp.route('/live/stream/stats', methods=['GET'])
+def get_live_stream_stats():
+    """SSE fan-out: subscribers, frames published, frames dropped for slow clients."""
+    return jsonify(live_broadcaster.stats())
 
+# ─── Simulation mode ──────────────────────────────────────────────────────────
 
 @bp.route('/simulate/state', methods=['GET'])
 def simulate_live_state():
@@ -196,25 +279,64 @@ def simulate_live_state():
     Frontend usage:
         Instead of polling /api/replay/live/state,
         poll /api/replay/simulate/state?year=2025&round=3&lap=20
+        (a running sim is better served by /simulate/sessions below)
     """
     year       = request.args.get('year',  2025, type=int)
     race_round = request.args.get('round', 1,    type=int)
     lap        = request.args.get('lap',   1,    type=int)
 
-    cache_file = fastf1_service.processed_cache_dir / f"{year}_R{race_round}_processed.json"
+    frame = fastf1_service.get_sim_frame(year, race_round, lap)
 
-    if not cache_file.exists():
+    if frame is None:
         return jsonify({
             'error':     f'Race not cached: {year} R{race_round}',
             'simulated': True,
         }), 404
 
-    with open(cache_file) as f:
-        race_data = json.load(f)
+    # Pre-serialized by the warm pipeline — sent as-is
+    return Response(frame[2], mimetype='application/json')
+
 
-    state = _lap_to_live_state(race_data, lap)
-    return jsonify(state)
+@bp.route('/simulate/sessions', methods=['POST'])
+def create_sim_session():
+    """
+    Start a server-side simulation (see sim_clock). Every viewer of the
+    returned sim_id shares its clock and frame stream.
 
+    JSON body:
+        year, round — the cached race
+        speed       — race seconds per wall second (default SIM_DEFAULT_SPEED)
+        lap         — lap to start from (default 1)
+    """
+    payload, status = create_sim(request.get_json(silent=True) or {})
+    return jsonify(payload), status
+
+@bp.route('/simulate/sessions', methods=['GET'])
+def list_sim_sessions():
+    return jsonify(sim_registry.stats())
+
+@bp.route('/simulate/sessions/<sim_id>', methods=['GET'])
+def get_sim_session(sim_id):
+    sim = sim_registry.get(sim_id)
+    if sim is None:
+        return jsonify({'error': 'Simulation not found'}), 404
+    return jsonify(sim.status())
+
+@bp.route('/simulate/sessions/<sim_id>/control', methods=['POST'])
+def control_sim_session(sim_id):
+    """
+    JSON body: {"action": "play" | "pause" | "seek" | "speed", "lap": n, "speed": x}
+    """
+    payload, status = control_sim(sim_id, request.get_json(silent=True) or {})
+    return jsonify(payload), status
+
+@bp.route('/simulate/sessions/<sim_id>/stream', methods=['GET'])
+def sim_session_stream(sim_id):
+    """The sim as SSE, in the same keyframe/delta format as /live/stream."""
+    sim = sim_registry.get(sim_id)
+    if sim is None:
+        return jsonify({'error': 'Simulation not found'}), 404
+    return _sse_response(sim.broadcaster)
 
 @bp.route('/simulate/races', methods=['GET'])
 def get_simulatable_races():
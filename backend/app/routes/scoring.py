@@ -2,16 +2,17 @@
 scoring.py — Flask routes for the prediction scoring engine.
 
 Endpoints:
-    POST /api/scoring/score-race      Trigger scoring for a completed race
+    POST /api/scoring/score-race      Queue scoring for a completed race (202 + job)
+    GET  /api/scoring/score-race/<year>/<round>   Progress / result of that scoring job
     GET  /api/scoring/status          Check pending/scored prediction counts
     GET  /api/scoring/preview/<year>/<round>   Dry run — see what would be scored
 """
 
 import os
-from flask import Blueprint, jsonify, request
-from app.services.scoring_service import score_race as _score_race, build_pit_registry
+from flask import Blueprint, jsonify, request, current_app
+from app.services.scoring_service import build_pit_registry
+from app.services.scoring_jobs import submit_scoring, scoring_status as _scoring_status
 from app.models import Prediction
-import json
 
 bp = Blueprint('scoring', __name__, url_prefix='/api/scoring')
 
@@ -28,9 +29,13 @@ def _check_admin(req):
 @bp.route('/score-race', methods=['POST'])
 def score_race():
     """
-    Trigger scoring for a completed race.
+    Queue scoring for a completed race. Returns 202 with the background job
+    (poll /api/jobs/<job_id> or GET /api/scoring/score-race/<year>/<round>);
+    re-submitting while that job is running or after it finished returns
+    the same job, or the race's finished checkpoint (200 once done).
+    "force": true scores predictions added since the race was scored.
 
-    Body JSON: { "year": 2026, "round": 1 }
+    Body JSON: { "year": 2026, "round": 1 }   (optional "force": true)
     Header:    X-Admin-Key: <value of ADMIN_KEY in .env>
 
     Example curl:
@@ -50,14 +55,24 @@ def score_race():
         return jsonify({'error': 'Both "year" and "round" are required in the request body'}), 400
 
     try:
-        result = _score_race(int(year), int(round_num))
-    except Exception as e:
-        return jsonify({'error': str(e)}), 500
+        year, round_num = int(year), int(round_num)
+    except (TypeError, ValueError):
+        return jsonify({'error': '"year" and "round" must be integers'}), 400
 
-    if 'error' in result:
-        return jsonify(result), 422
+    job, status = submit_scoring(current_app._get_current_object(), 'pit', year, round_num,
+                                 force=bool(data.get('force')))
+    return jsonify(job), status
 
-    return jsonify(result)
+
+@bp.route('/score-race/<int:year>/<int:round_num>', methods=['GET'])
+def score_race_status(year, round_num):
+    """
+    Progress of a race's scoring job (predictions scored, users updated) and
+    its result when done. Falls back to the stored checkpoint once the job
+    has expired from the queue. No auth required — counts only.
+    """
+    payload, status = _scoring_status('pit', year, round_num)
+    return jsonify(payload), status
 
 
 # ── Status overview ───────────────────────────────────────────────────────────
@@ -93,14 +108,11 @@ def preview_scoring(year, round_num):
     """
     from app.services.fastf1_service import fastf1_service
 
-    cache_file = fastf1_service.processed_cache_dir / f"{year}_R{round_num}_processed.json"
+    race_data = fastf1_service.load_processed_race(year, round_num)
 
-    if not cache_file.exists():
+    if race_data is None:
         return jsonify({'error': f'Race not cached: {year} R{round_num}'}), 404
 
-    with open(cache_file) as f:
-        race_data = json.load(f)
-
     pit_registry = build_pit_registry(race_data)
     pending_count = Prediction.query.filter_by(status='pending').count()
 
@@ -140,13 +152,10 @@ def score_sim_test():
 
     from app.services.fastf1_service import fastf1_service
 
-    cache_file = fastf1_service.processed_cache_dir / f"{int(year)}_R{int(round_num)}_processed.json"
-    if not cache_file.exists():
+    race_data = fastf1_service.load_processed_race(int(year), int(round_num))
+    if race_data is None:
         return jsonify({'error': f'Race not cached: {year} R{round_num}'}), 404
 
-    with open(cache_file) as f:
-        race_data = json.load(f)
-
     pit_registry = build_pit_registry(race_data)
 
     # All sim predictions have race_id = NULL
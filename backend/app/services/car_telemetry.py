@@ -0,0 +1,219 @@
+"""
+car_telemetry.py — Fixed-size ring buffers of live car telemetry, one per driver.
+
+OpenF1 /car_data runs at ~3.7 Hz per car. The live poller already reads it
+incrementally (see live_store); this module keeps what it reads, so a trace
+of the last minute can be served without going back to OpenF1 — and in
+constant memory, however long the race runs.
+
+Each driver gets a CarRing: one float64 time array (epoch seconds) and one
+float32 array per channel (speed, gear, throttle, brake, drs), all of
+TELEMETRY_RING_POINTS slots, written in place with wraparound.
+
+    ring.latest()              → newest sample as a dict, or None
+    ring.window(60, 200)       → last 60 s, at most 200 points
+
+window() downsamples by splitting the time span into equal buckets:
+speed and throttle are averaged per bucket, gear/brake/drs take the bucket
+maximum so short brake applications and DRS openings don't vanish.
+
+Rings are written by the poller thread and read by request threads; each
+has its own small lock.
+
+Environment:
+    TELEMETRY_RING_POINTS   samples kept per driver (default 4096, ~18 min at 3.7 Hz)
+"""
+
+import os
+import threading
+from datetime import datetime, timezone
+
+import numpy as np
+
+TELEMETRY_RING_POINTS = int(os.getenv('TELEMETRY_RING_POINTS', '4096'))
+
+# OpenF1 field → channel name in our payloads
+CHANNELS = {
+    'speed':    'speed',
+    'n_gear':   'gear',
+    'throttle': 'throttle',
+    'brake':    'brake',
+    'drs':      'drs',
+}
+MEAN_CHANNELS = ('speed', 'throttle')    # the rest take the bucket max
+
+MAX_WINDOW_S = 3600
+MAX_POINTS   = 2000
+
+
+class CarRing:
+    """Ring buffer of one car's samples, oldest overwritten first."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self.t        = np.zeros(capacity, dtype=np.float64)
+        self.channels = {name: np.zeros(capacity, dtype=np.float32) for name in CHANNELS.values()}
+        self._head    = 0      # next slot to write
+        self._count   = 0
+        self._last_t  = None
+        self._lock    = threading.Lock()
+        self.dropped  = 0      # out-of-order / duplicate rows ignored
+
+    def __len__(self):
+        return self._count
+
+    def extend(self, rows):
+        """Append OpenF1 car_data rows; rows not newer than the last sample are ignored."""
+        samples = []
+        for row in rows:
+            ts = _epoch(row.get('date'))
+            if ts is not None:
+                samples.append((ts, row))
+        samples.sort(key=lambda s: s[0])
+
+        with self._lock:
+            fresh = [(ts, row) for ts, row in samples if self._last_t is None or ts > self._last_t]
+            self.dropped += len(samples) - len(fresh)
+            if not fresh:
+                return 0
+            fresh = fresh[-self.capacity:]
+            n     = len(fresh)
+            slots = (self._head + np.arange(n)) % self.capacity
+
+            self.t[slots] = [ts for ts, _ in fresh]
+            for field, name in CHANNELS.items():
+                self.channels[name][slots] = [_num(row.get(field)) for _, row in fresh]
+
+            self._head   = (self._head + n) % self.capacity
+            self._count  = min(self.capacity, self._count + n)
+            self._last_t = fresh[-1][0]
+            return n
+
+    def latest(self):
+        """Newest sample, in the /live/car payload shape."""
+        with self._lock:
+            if not self._count:
+                return None
+            i = (self._head - 1) % self.capacity
+            sample = {name: _out(name, arr[i]) for name, arr in self.channels.items()}
+            sample['date'] = datetime.fromtimestamp(self.t[i], timezone.utc).isoformat()
+            return sample
+
+    def window(self, seconds: float, points: int) -> dict:
+        """
+        The last `seconds` of samples, downsampled to at most `points`.
+        Times are seconds relative to the newest sample (all <= 0).
+        """
+        seconds = max(0.0, min(float(seconds), MAX_WINDOW_S))
+        points  = max(1, min(int(points), MAX_POINTS))
+
+        with self._lock:
+            if not self._count:
+                return {'t': [], **{name: [] for name in self.channels}, 'samples': 0}
+            order = (self._head - self._count + np.arange(self._count)) % self.capacity
+            t     = self.t[order]
+            first = np.searchsorted(t, t[-1] - seconds, side='left')
+            idx   = order[first:]
+            t     = t[first:] - t[-1]
+            chans = {name: arr[idx] for name, arr in self.channels.items()}
+
+        n = len(t)
+        if n > points:
+            t, chans = _downsample(t, chans, points)
+
+        out = {'t': np.round(t, 3).tolist(), 'samples': n}
+        for name, values in chans.items():
+            out[name] = [_out(name, v) for v in values]
+        return out
+
+
+class CarTelemetry:
+    """CarRing per driver number, created on first data."""
+
+    def __init__(self, capacity: int):
+        self.capacity = capacity
+        self._rings   = {}
+        self._lock    = threading.Lock()
+
+    def extend(self, driver_number, rows):
+        with self._lock:
+            ring = self._rings.get(driver_number)
+            if ring is None:
+                ring = self._rings[driver_number] = CarRing(self.capacity)
+        return ring.extend(rows)
+
+    def _ring(self, driver_number):
+        # The dict is only read under the lock; the ring itself locks its own data
+        with self._lock:
+            return self._rings.get(driver_number)
+
+    def latest(self, driver_number):
+        ring = self._ring(driver_number)
+        return ring.latest() if ring is not None else None
+
+    def window(self, driver_number, seconds, points):
+        ring = self._ring(driver_number)
+        return ring.window(seconds, points) if ring is not None else None
+
+    def drivers(self):
+        with self._lock:
+            return list(self._rings)
+
+    def stats(self) -> dict:
+        with self._lock:
+            rings = dict(self._rings)
+        return {
+            'capacity': self.capacity,
+            'drivers':  {drv: len(ring) for drv, ring in rings.items()},
+            'bytes':    sum(ring.t.nbytes + sum(a.nbytes for a in ring.channels.values())
+                            for ring in rings.values()),
+        }
+
+
+def _downsample(t, chans, points):
+    """Equal-time buckets: mean for MEAN_CHANNELS, max for the rest; empty buckets dropped."""
+    edges  = np.linspace(t[0], t[-1], points + 1)
+    bucket = np.clip(np.searchsorted(edges, t, side='right') - 1, 0, points - 1)
+    counts = np.bincount(bucket, minlength=points)
+    keep   = counts > 0
+
+    t_out = (np.bincount(bucket, weights=t, minlength=points)[keep] / counts[keep])
+    out   = {}
+    for name, values in chans.items():
+        if name in MEAN_CHANNELS:
+            sums = np.bincount(bucket, weights=values, minlength=points)
+            out[name] = sums[keep] / counts[keep]
+        else:
+            peak = np.full(points, -np.inf)
+            np.maximum.at(peak, bucket, values)
+            out[name] = peak[keep]
+    return t_out, out
+
+
+def _epoch(value):
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _num(value):
+    try:
+        return float(value)
+    except (TypeError, ValueError):
+        return np.nan
+
+
+def _out(name, value):
+    """JSON-friendly channel value: None if missing, int when whole (as OpenF1 sends it)."""
+    value = float(value)
+    if np.isnan(value):
+        return None
+    if value.is_integer() or name not in MEAN_CHANNELS:
+        return int(round(value))
+    return round(value, 1)
@@ -0,0 +1,88 @@
+"""
+extract_process.py — Run FastF1 extraction in a short-lived child process.
+
+session.load(telemetry=True) grows the process by 1–2 GB of pandas/NumPy
+buffers, and the allocator rarely hands that back to the OS even after the
+Session is gone. On a single 512 MB web worker that bloat is permanent.
+
+With FASTF1_SUBPROCESS on, FastF1Service.build_race_artifacts() hands the
+load + extraction to a freshly spawned child. The child writes the artifacts
+to disk itself, sends back only a small status dict (plus progress messages)
+over a pipe, and exits — taking all of its memory with it.
+
+Environment:
+    FASTF1_SUBPROCESS            1 = isolate extraction in a child (default), 0 = in-process
+    FASTF1_EXTRACT_TIMEOUT_S     kill the child after this long (default 900)
+"""
+
+import os
+import time
+import multiprocessing
+
+FASTF1_SUBPROCESS        = os.getenv('FASTF1_SUBPROCESS', '1') == '1'
+FASTF1_EXTRACT_TIMEOUT_S = float(os.getenv('FASTF1_EXTRACT_TIMEOUT_S', '900'))
+
+
+def run_extraction(year, race_round, todo, telemetry, progress, timeout=None):
+    """
+    Build `todo` artifacts for one race in a child process and return the
+    child's status dict ({artifact: state} or {'error': ...}).
+    progress(stage, percent) is relayed from the child as it runs.
+    """
+    timeout = timeout or FASTF1_EXTRACT_TIMEOUT_S
+    ctx = multiprocessing.get_context('spawn')   # fresh interpreter, nothing inherited
+    recv_conn, send_conn = ctx.Pipe(duplex=False)
+    proc = ctx.Process(
+        target=_child_main,
+        args=(send_conn, year, race_round, list(todo), telemetry),
+        name=f'extract-{year}-R{race_round}',
+    )
+    proc.start()
+    send_conn.close()   # only the child writes; EOF once it exits
+
+    result   = None
+    deadline = time.monotonic() + timeout
+    try:
+        while result is None:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                result = {'error': f'Extraction timed out after {timeout:.0f}s'}
+                break
+            if not recv_conn.poll(min(remaining, 1.0)):
+                continue
+            try:
+                message = recv_conn.recv()
+            except EOFError:
+                break   # child died without reporting
+            if message[0] == 'progress':
+                progress(message[1], message[2])
+            elif message[0] == 'result':
+                result = message[1]
+    finally:
+        recv_conn.close()
+        if result is not None and 'error' not in result:
+            proc.join(timeout=30)
+        if proc.is_alive():
+            proc.terminate()
+        proc.join()
+
+    if result is None:
+        result = {'error': f'Extraction process exited with code {proc.exitcode}'}
+    return result
+
+
+def _child_main(conn, year, race_round, todo, telemetry):
+    """Child entry point: extract, write artifacts, report, exit."""
+    result = None
+    try:
+        from app.services.fastf1_service import fastf1_service
+
+        def progress(stage, percent=None):
+            conn.send(('progress', stage, percent))
+
+        result = fastf1_service._build_artifacts(year, race_round, todo, telemetry, progress)
+    except Exception as e:
+        result = {'error': str(e) or type(e).__name__}
+    finally:
+        conn.send(('result', result))
+        conn.close()
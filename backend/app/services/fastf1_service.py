@@ -1,11 +1,34 @@
+import os
 import fastf1
 import pandas as pd
 from pathlib import Path
 import json
 from datetime import datetime
 import numpy as np
-import threading
-import requests
+
+from app.services import http_client
+from app.services.race_cache import race_cache, source_fingerprint
+from app.services.session_cache import (
+    SessionCache, KeyedLocks, SESSION_CACHE_MAX_MB, SESSION_CACHE_MAX_ENTRIES,
+)
+from app.services.lap_index import (
+    write_lap_index, load_lap_index, read_indexed_lap, race_meta,
+)
+from app.services.live_session import (
+    LiveSessionResolver, LIVE_SESSION_TTL_S, LIVE_SESSION_NEAR_TTL_S,
+)
+from app.services.extract_process import FASTF1_SUBPROCESS, run_extraction
+from app.services.race_pipeline import (
+    ARTIFACTS, TELEMETRY_ARTIFACTS, artifact_paths, write_json_atomic, extract_race_data,
+    extract_circuit, extract_weather, extract_summary, extract_lap_speeds,
+)
+from app.services.race_columns import (
+    write_columnar, load_columnar, columns_path,
+)
+from app.services.sim_frames import (
+    write_sim_frames, load_sim_frames, sim_frames_path, lap_state, leader_lap_seconds,
+    fill_lap_seconds,
+)
 
 
 # Setup FastF1 cache
@@ -13,7 +36,8 @@ CACHE_DIR = Path(__file__).parent.parent.parent / 'fastf1_cache'
 CACHE_DIR.mkdir(exist_ok=True)
 fastf1.Cache.enable_cache(str(CACHE_DIR))
 
-OPENF1_BASE = 'https://api.openf1.org/v1'
+# Point at a local stand-in (openf1_standin.py serve) for offline runs
+OPENF1_BASE = os.getenv('OPENF1_BASE', 'https://api.openf1.org/v1').rstrip('/')
 
 class FastF1Service:
     """Service to fetch and process F1 race data from FastF1"""
@@ -21,16 +45,21 @@ class FastF1Service:
     def __init__(self):
         self.processed_cache_dir = CACHE_DIR / 'processed'
         self.processed_cache_dir.mkdir(exist_ok=True)
-        self._session_cache = {}
-        self._global_lock = threading.Lock()
-        self._race_locks = {}        # per-race locks
-
-    def _get_race_lock(self, key):
-        """Get or create a lock for a specific race"""
-        with self._global_lock:
-            if key not in self._race_locks:
-                self._race_locks[key] = threading.Lock()
-            return self._race_locks[key]
+        self._session_cache = SessionCache(
+            max_bytes=int(SESSION_CACHE_MAX_MB * 1024 * 1024),
+            max_entries=SESSION_CACHE_MAX_ENTRIES,
+        )
+        self._race_locks = KeyedLocks()   # per-race locks, dropped when idle
+        self.live_session = LiveSessionResolver(
+            self._fetch_race_sessions,
+            lambda year: fastf1.get_event_schedule(year, include_testing=False),
+            ttl=LIVE_SESSION_TTL_S,
+            near_ttl=LIVE_SESSION_NEAR_TTL_S,
+        )
+
+    def _race_lock(self, key):
+        """Hold the lock for a specific race: `with self._race_lock(key): ...`"""
+        return self._race_locks.hold(key)
 
     def _get_cached_rounds(self, year):
         """Scan fastf1_cache folder to find which rounds are actually downloaded"""
@@ -93,31 +122,34 @@ class FastF1Service:
             return []
 
     def load_race_session(self, year, race_round, session_type='Race'):
-        """Load a race session — uses in-memory cache to avoid reloading"""
+        """
+        Load a race session — kept in the bounded session LRU to avoid
+        reloading. Treat the returned Session as read-only.
+        """
         key = f"{year}_R{race_round}_{session_type}"
-        
-        if key in self._session_cache:
-            return self._session_cache[key]
-        
-        lock = self._get_race_lock(f"session_{key}")
-        with lock:
-            if key in self._session_cache:
-                return self._session_cache[key]
-            
+
+        def load():
             try:
                 print(f"Loading {year} Round {race_round} {session_type}...")
                 session = fastf1.get_session(year, race_round, session_type)
                 session.load(telemetry=False)
-                self._session_cache[key] = session
                 return session
             except Exception as e:
                 print(f"Error loading session: {e}")
                 return None
 
+        return self._session_cache.get_or_load(key, load)
+
+    def session_cache_stats(self):
+        """Size/hit/eviction counters for the FastF1 session LRU."""
+        stats = self._session_cache.stats()
+        stats['race_locks'] = len(self._race_locks)
+        return stats
+
     def get_circuit_data(self, year, race_round):
         """
         Get circuit coordinates and track info.
-        IMPORTANT: Requires telemetry=True to get lap coordinates.
+        Built on a miss via build_race_artifacts (needs a telemetry=True load).
         """
         cache_file = self.processed_cache_dir / f"{year}_R{race_round}_circuit.json"
 
@@ -125,128 +157,273 @@ class FastF1Service:
             with open(cache_file, 'r') as f:
                 return json.load(f)
 
-        lock = self._get_race_lock(f"circuit_{year}_R{race_round}")
-        with lock:
-            if cache_file.exists():
-                with open(cache_file, 'r') as f:
-                    return json.load(f)
-
-            try:
-                print(f"Loading circuit data for {year} R{race_round} (telemetry=True)...")
-                session = fastf1.get_session(year, race_round, 'Race')
-                session.load(telemetry=True)  # ← KEY CHANGE
-
-                laps = session.laps
-                valid_laps = laps[laps['LapTime'].notna()]  # ← KEY CHANGE
-                if valid_laps.empty:
-                    print(f"No valid laps for circuit data {year} R{race_round}")
-                    return None
-
-                first_valid_lap = valid_laps.iloc[0]
-                telemetry = first_valid_lap.get_telemetry()
-
-                coords = []
-                for _, point in telemetry.iterrows():
-                    if pd.notna(point['X']) and pd.notna(point['Y']):
-                        coords.append({
-                            'x':        float(point['X']),
-                            'y':        float(point['Y']),
-                            'distance': float(point['Distance']) if pd.notna(point['Distance']) else 0
-                        })
-
-                if not coords:
-                    print(f"No coordinates found for {year} R{race_round}")
-                    return None
-
-                circuit_data = {
-                    'coordinates':    coords,
-                    'total_distance': max(c['distance'] for c in coords),
-                    'name':           session.event['EventName']
-                }
+        result = self.build_race_artifacts(year, race_round, artifacts=('circuit',))
+        if result.get('circuit') not in ('written', 'cached'):
+            print(f"Error getting circuit data for {year} R{race_round}: "
+                  f"{result.get('error') or result.get('circuit')}")
+            return None
 
-                with open(cache_file, 'w') as f:
-                    json.dump(circuit_data, f)
+        circuit_data = self.load_artifact(year, race_round, 'circuit')
+        if circuit_data:
+            print(f"✅ Circuit data cached: {len(circuit_data['coordinates'])} points for {year} R{race_round}")
+        return circuit_data
 
-                print(f"✅ Circuit data cached: {len(coords)} points for {year} R{race_round}")
-                return circuit_data
+    def has_artifact(self, year, race_round, name):
+        """True once build_race_artifacts has written `name` for this race."""
+        return artifact_paths(self.processed_cache_dir, year, race_round)[name].exists()
 
-            except Exception as e:
-                print(f"Error getting circuit data for {year} R{race_round}: {e}")
-                return None
+    def load_artifact(self, year, race_round, name):
+        """
+        Parsed per-race artifact ('weather', 'summary', ...), or None if it
+        hasn't been built or the session had no data for it. Never loads FastF1.
+        """
+        path = artifact_paths(self.processed_cache_dir, year, race_round)[name]
+        try:
+            with open(path, 'r') as f:
+                return json.load(f)
+        except FileNotFoundError:
+            return None
+        except ValueError as e:
+            print(f"[load_artifact] {path.name}: {e}")
+            return None
 
     def get_weather_data(self, year, race_round):
-        """Get weather information — reuses already-loaded session"""
-        session = self.load_race_session(year, race_round)
-        if not session:
+        """Latest weather reading, from the precomputed weather timeline"""
+        weather = self.load_artifact(year, race_round, 'weather')
+        if not weather or not weather.get('samples'):
             return None
-        
-        try:
-            weather = session.weather_data
-            if weather.empty:
-                return None
-            
-            latest = weather.iloc[-1]
-            return {
-                'track_temp':     float(latest['TrackTemp'])    if pd.notna(latest['TrackTemp'])     else None,
-                'air_temp':       float(latest['AirTemp'])      if pd.notna(latest['AirTemp'])       else None,
-                'humidity':       float(latest['Humidity'])     if pd.notna(latest['Humidity'])      else None,
-                'wind_speed':     float(latest['WindSpeed'])    if pd.notna(latest['WindSpeed'])     else None,
-                'wind_direction': int(latest['WindDirection'])  if pd.notna(latest['WindDirection']) else None,
-                'rainfall':       bool(latest['Rainfall'])      if pd.notna(latest['Rainfall'])      else False
-            }
-        except Exception as e:
-            print(f"Error getting weather: {e}")
+
+        latest = dict(weather['samples'][-1])
+        latest.pop('time', None)
+        return latest
+
+    def load_processed_race(self, year, race_round):
+        """
+        Processed race dict (the *_processed.json shape), or None if it hasn't
+        been built. From a fresh columnar file it is a race_view(): the laps
+        are decoded one at a time from the shared mapped pages and never held.
+        Otherwise it is the parsed JSON from the shared in-process race cache.
+        Either way, treat it as read-only.
+        """
+        columnar = load_columnar(self.processed_cache_dir, year, race_round)
+        if columnar is not None:
+            return columnar.race_view()
+        cache_file = self.processed_cache_dir / f"{year}_R{race_round}_processed.json"
+        return race_cache.get((year, race_round), cache_file)
+
+    def get_processed_lap(self, year, race_round, lap_number):
+        """
+        (race_meta, lap) for ONE lap of a processed race, without parsing the
+        whole file when a columnar file or lap index exists.
+
+        Returns (None, None) if the race hasn't been processed and
+        (race_meta, None) if lap_number is out of range.
+        """
+        columnar = load_columnar(self.processed_cache_dir, year, race_round)
+        if columnar is not None:
+            return columnar.meta, columnar.lap_dict(lap_number)
+
+        # Already parsed in this worker — no I/O at all
+        cache_file = self.processed_cache_dir / f"{year}_R{race_round}_processed.json"
+        race_data  = race_cache.peek((year, race_round), cache_file)
+        if race_data is None:
+            index = load_lap_index(self.processed_cache_dir, year, race_round)
+            if index is not None:
+                lap = read_indexed_lap(self.processed_cache_dir, index, year, race_round, lap_number)
+                return index, lap
+
+            race_data = self.load_processed_race(year, race_round)
+            if race_data is None:
+                return None, None
+
+        laps = race_data.get('laps', [])
+        lap  = laps[lap_number - 1] if 1 <= lap_number <= len(laps) else None
+        return race_meta(race_data), lap
+
+    def ensure_lap_index(self, year, race_round, race_data=None):
+        """Write the lap index for a processed race if it's missing or stale."""
+        cache_file = self.processed_cache_dir / f"{year}_R{race_round}_processed.json"
+        if not cache_file.exists():
             return None
 
+        index = load_lap_index(self.processed_cache_dir, year, race_round)
+        if index is not None:
+            return index
+
+        if race_data is None:
+            race_data = self.load_processed_race(year, race_round)
+        size, digest = source_fingerprint(cache_file)
+        return write_lap_index(
+            self.processed_cache_dir, year, race_round, race_data,
+            source_size=size, source_hash=digest,
+        )
+
+    def ensure_columnar(self, year, race_round, race_data=None):
+        """Write the columnar artifact for a processed race if it's missing or stale."""
+        cache_file = self.processed_cache_dir / f"{year}_R{race_round}_processed.json"
+        if not cache_file.exists():
+            return None
+
+        if load_columnar(self.processed_cache_dir, year, race_round) is not None:
+            return columns_path(self.processed_cache_dir, year, race_round)
+
+        if race_data is None:
+            race_data = self.load_processed_race(year, race_round)
+        size, digest = source_fingerprint(cache_file)
+        return write_columnar(
+            self.processed_cache_dir, year, race_round, race_data,
+            source_size=size, source_hash=digest,
+        )
+
+    def ensure_sim_frames(self, year, race_round, race_data=None):
+        """Write the pre-serialized simulation frames for a processed race if missing or stale."""
+        cache_file = self.processed_cache_dir / f"{year}_R{race_round}_processed.json"
+        if not cache_file.exists():
+            return None
+
+        if load_sim_frames(self.processed_cache_dir, year, race_round) is not None:
+            return sim_frames_path(self.processed_cache_dir, year, race_round)
+
+        if race_data is None:
+            race_data = self.load_processed_race(year, race_round)
+        size, digest = source_fingerprint(cache_file)
+        return write_sim_frames(
+            self.processed_cache_dir, year, race_round, race_data,
+            source_size=size, source_hash=digest,
+        )
+
     def process_race_telemetry(self, year, race_round):
         """Process full race telemetry into lap-by-lap data"""
-        cache_file = self.processed_cache_dir / f"{year}_R{race_round}_processed.json"
-        
         # Return immediately if already processed
-        if cache_file.exists():
-            print(f"Loading from cache: {cache_file}")
-            with open(cache_file, 'r') as f:
-                return json.load(f)
+        race_data = self.load_processed_race(year, race_round)
+        if race_data is not None:
+            return race_data
         
+        if FASTF1_SUBPROCESS:
+            # Lap building in a child process; only the files come back.
+            # build_race_artifacts takes the per-race lock itself.
+            result = self.build_race_artifacts(year, race_round, artifacts=('processed',))
+            if result.get('processed') not in ('written', 'cached'):
+                return None
+            return self.load_processed_race(year, race_round)
+
         # Lock per race so only ONE thread processes it
-        lock = self._get_race_lock(f"telemetry_{year}_R{race_round}")
-        with lock:
+        with self._race_lock(f"telemetry_{year}_R{race_round}"):
             # Double-check after acquiring lock
-            if cache_file.exists():
-                print(f"Loading from cache: {cache_file}")
-                with open(cache_file, 'r') as f:
-                    return json.load(f)
+            race_data = self.load_processed_race(year, race_round)
+            if race_data is not None:
+                return race_data
 
             session = self.load_race_session(year, race_round)
             if not session:
                 return None
-            
+
             print(f"Processing telemetry for {year} R{race_round}...")
-            
-            race_data = {
-                'year':       year,
-                'round':      race_round,
-                'name':       session.event['EventName'],
-                'circuit':    session.event['Location'],
-                'date':       session.event['EventDate'].isoformat(),
-                'total_laps': int(session.total_laps) if hasattr(session, 'total_laps') else 0,
-                'laps':       []
-            }
-            
-            laps = session.laps.copy()
-            for lap_number in range(1, race_data['total_laps'] + 1):
-                lap_data = self._build_lap(laps, lap_number)
-                race_data['laps'].append(lap_data)
-            
-            # Write to a temp file first, then rename — prevents corrupt reads
-            tmp_file = cache_file.with_suffix('.tmp')
-            with open(tmp_file, 'w') as f:
-                json.dump(race_data, f, indent=2)
-            tmp_file.rename(cache_file)
-            
-            print(f"✅ Processed {len(race_data['laps'])} laps → {cache_file.name}")
+            race_data = extract_race_data(session, year, race_round)
+            self._write_processed(year, race_round, race_data)
             return race_data
-        
+
+    def _write_processed(self, year, race_round, race_data):
+        """Write the processed JSON plus its lap index and columnar copy."""
+        cache_file = self.processed_cache_dir / f"{year}_R{race_round}_processed.json"
+
+        # Write to a temp file first, then rename — prevents corrupt reads
+        write_json_atomic(cache_file, race_data, indent=2)
+
+        # Lap index + columnar copy so the lap endpoints never parse it all
+        self.ensure_lap_index(year, race_round, race_data)
+        try:
+            self.ensure_columnar(year, race_round, race_data)
+        except ValueError as e:
+            print(f"Columnar export skipped for {year} R{race_round}: {e}")
+        self.ensure_sim_frames(year, race_round, race_data)
+
+        print(f"✅ Processed {len(race_data['laps'])} laps → {cache_file.name}")
+
+    def missing_artifacts(self, year, race_round):
+        """Names of the per-race artifacts not yet on disk."""
+        paths = artifact_paths(self.processed_cache_dir, year, race_round)
+        return [name for name in ARTIFACTS if not paths[name].exists()]
+
+    def build_race_artifacts(self, year, race_round, force=False, progress=None, artifacts=None):
+        """
+        Load the race session ONCE and write every artifact the API serves:
+        processed laps (+ lap index, columnar), circuit, weather timeline,
+        summary and per-driver per-lap speeds. `artifacts` restricts it to a
+        subset; telemetry is only loaded when circuit or speeds are needed.
+
+        Only missing artifacts are written unless force=True. Artifacts the
+        session has no data for are written as JSON null. The session is
+        not kept in _session_cache — it is the heaviest object in the process
+        and nothing needs it once the artifacts are on disk. With
+        FASTF1_SUBPROCESS on, the load runs in a child process (see
+        extract_process) so its memory goes back to the OS afterwards.
+
+        progress(stage, percent), if given, is called as the work advances
+        (see job_queue). Returns {artifact: 'written' | 'cached' | 'empty' |
+        'failed'}, or a dict with an 'error' key if the session could not be
+        loaded.
+        """
+        progress = progress or (lambda stage, percent=None: None)
+        wanted   = [name for name in ARTIFACTS if artifacts is None or name in artifacts]
+        with self._race_lock(f"telemetry_{year}_R{race_round}"):
+            missing = self.missing_artifacts(year, race_round)
+            todo    = [name for name in wanted if force or name in missing]
+            result  = {name: 'cached' for name in wanted if name not in todo}
+            if not todo:
+                return result
+
+            telemetry = any(name in TELEMETRY_ARTIFACTS for name in todo)
+            if FASTF1_SUBPROCESS:
+                built = run_extraction(year, race_round, todo, telemetry, progress)
+            else:
+                built = self._build_artifacts(year, race_round, todo, telemetry, progress)
+
+            if 'error' in built:
+                return built
+            result.update(built)
+            return result
+
+    def _build_artifacts(self, year, race_round, todo, telemetry, progress):
+        """Load the session and write the `todo` artifacts (in this process)."""
+        paths = artifact_paths(self.processed_cache_dir, year, race_round)
+        try:
+            print(f"Loading {year} R{race_round} for artifacts ({', '.join(todo)}, telemetry={telemetry})...")
+            progress('loading session', 5)
+            session = fastf1.get_session(year, race_round, 'Race')
+            session.load(telemetry=telemetry)
+        except Exception as e:
+            print(f"Error loading session: {e}")
+            return {'error': str(e)}
+
+        extractors = {
+            'circuit': extract_circuit,
+            'weather': extract_weather,
+            'summary': extract_summary,
+            'speeds':  extract_lap_speeds,
+        }
+        result = {}
+        for i, name in enumerate(todo):
+            # Session load is the bulk of the time — extraction gets the last 40%
+            progress(f'building {name}', 60 + 40 * i // len(todo))
+            try:
+                if name == 'processed':
+                    race_data = extract_race_data(session, year, race_round)
+                    self._write_processed(year, race_round, race_data)
+                    result[name] = 'written'
+                    continue
+
+                # An empty artifact is still written (as null) so the race
+                # isn't reloaded on every run just to find nothing again
+                data = extractors[name](session)
+                write_json_atomic(paths[name], data)
+                result[name] = 'written' if data is not None else 'empty'
+            except Exception as e:
+                print(f"[build_race_artifacts] {year} R{race_round} {name}: {e}")
+                result[name] = 'failed'
+
+        return result
+
     def _lap_speed_avg(self, lap):
         spds = [float(lap[c]) for c in ['SpeedI1','SpeedI2','SpeedFL','SpeedST']
                 if c in lap.index and pd.notna(lap[c]) and float(lap[c]) > 0]
@@ -258,7 +435,11 @@ class FastF1Service:
         return round(max(spds), 1) if spds else None
     
     def _build_lap(self, laps, lap_number):
-        """Build a single lap WITHOUT per-lap telemetry (speeds come from on-demand endpoint)."""
+        """
+        Build a single lap WITHOUT per-lap telemetry (speeds come from on-demand endpoint).
+        Reference implementation — process_race_telemetry uses the vectorized
+        lap_builder.build_laps; bench_lap_builder.py checks the two agree.
+        """
         lap_laps = laps[laps['LapNumber'] == lap_number]
 
         drivers = []
@@ -302,27 +483,14 @@ class FastF1Service:
         }
 
     def get_race_summary(self, year, race_round):
-        """Get quick race summary"""
-        try:
-            session = self.load_race_session(year, race_round)
-            if not session:
-                return None
-            
-            results = session.results
-            return {
-                'name':   session.event['EventName'],
-                'date':   session.event['EventDate'].isoformat(),
-                'winner': results.iloc[0]['Abbreviation'] if len(results) > 0 else None,
-                'podium': [results.iloc[i]['Abbreviation'] for i in range(min(3, len(results)))]
-            }
-        except Exception as e:
-            print(f"Error getting summary: {e}")
-            return None
+        """Quick race summary, from the precomputed summary artifact"""
+        return self.load_artifact(year, race_round, 'summary')
 
     def get_driver_lap_telemetry(self, year, race_round, driver_code, lap_number):
         """
-        Fetch speed telemetry for ONE driver on ONE lap, on demand.
-        Called by /api/replay/telemetry when user selects a driver in the UI.
+        Speed telemetry for ONE driver on ONE lap, from the per-race speeds
+        artifact. Called by /api/replay/telemetry when user selects a driver.
+        Per-lap *_tel_* files from older deploys are still honoured.
         """
         cache_key = self.processed_cache_dir / f"{year}_R{race_round}_tel_{driver_code}_L{lap_number}.json"
 
@@ -330,58 +498,46 @@ class FastF1Service:
             with open(cache_key) as f:
                 return json.load(f)
 
-        try:
-            session = fastf1.get_session(year, race_round, 'Race')
-            session.load(telemetry=False)
-
-            laps = session.laps
-            lap = laps[
-                (laps['Driver'] == driver_code) &
-                (laps['LapNumber'] == lap_number)
-            ]
-            if lap.empty:
+        # Precomputed by build_race_artifacts. On a miss, build the speeds for
+        # every driver and lap at once (in the extraction child if enabled)
+        # instead of loading a session per lap.
+        if not self.has_artifact(year, race_round, 'speeds'):
+            result = self.build_race_artifacts(year, race_round, artifacts=('speeds',))
+            if result.get('speeds') not in ('written', 'cached', 'empty'):
+                print(f"[get_driver_lap_telemetry] {result.get('error') or result.get('speeds')}")
                 return None
 
-            tel = lap.iloc[0].get_telemetry()
-            result = {
-                'driver':    driver_code,
-                'lap':       lap_number,
-                'avg_speed': round(float(tel['Speed'].mean()), 1) if 'Speed' in tel else None,
-                'max_speed': round(float(tel['Speed'].max()),  1) if 'Speed' in tel else None,
-            }
-
-            with open(cache_key, 'w') as f:
-                json.dump(result, f)
-
-            return result
-
-        except Exception as e:
-            print(f"[get_driver_lap_telemetry] {e}")
+        speeds = self.load_artifact(year, race_round, 'speeds') or {}
+        lap = speeds.get(driver_code, {}).get(str(lap_number))
+        if lap is None:
             return None
+        return {'driver': driver_code, 'lap': lap_number, **lap}
 
-    def _safe_json_list(self, url, timeout=5):
+    def _safe_json_list(self, url, timeout=5, deadline=None):
         """
         GET a URL and return parsed JSON only if it's a list.
         Protects against OpenF1 returning dicts on error or no-session.
         """
         try:
-            r = requests.get(url, timeout=timeout)
-            data = r.json()
+            data = http_client.get_json(url, timeout=timeout, deadline=deadline)
             return data if isinstance(data, list) else []
         except Exception:
             return []
 
     def get_live_session_key(self):
-        """Get the session_key for the current or most recent live session."""
-        try:
-            r = requests.get(f'{OPENF1_BASE}/sessions?session_type=Race', timeout=5)
-            sessions = r.json()
-            if not isinstance(sessions, list) or not sessions:
-                return None
-            return sessions[-1]['session_key']
-        except Exception as e:
-            print(f"[get_live_session_key] {e}")
-            return None
+        """
+        The session_key for the current or most recent live session.
+        Cached by self.live_session; OpenF1 is only asked again when the key
+        may have changed (see live_session.py).
+        """
+        return self.live_session.current()
+
+    def _fetch_race_sessions(self, year):
+        """All OpenF1 Race sessions of `year`, in date order. Raises on failure."""
+        sessions = http_client.get_json(
+            f'{OPENF1_BASE}/sessions?session_type=Race&year={year}', timeout=5
+        )
+        return sessions if isinstance(sessions, list) else []
 
     def get_live_positions(self, session_key=None):
         """
@@ -540,29 +696,10 @@ class FastF1Service:
             print(f"[get_live_stints] {e}")
             return {}
 
-    def get_live_full_state(self):
-        """
-        One call that assembles everything the frontend needs for live mode:
-        positions + intervals + stints + latest race control message.
-        The frontend polls this every 3 seconds via SSE or short polling.
-        """
-        session_key = self.get_live_session_key()
-        if not session_key:
-            return {'error': 'No live session', 'session_key': None}
-
-        positions = self.get_live_positions(session_key)
-        intervals = self.get_live_intervals(session_key)
-        stints    = self.get_live_stints(session_key)
-        rc_msgs   = self.get_live_race_control(session_key)
-        latest_rc = rc_msgs[-1] if rc_msgs else None
-
-        # Driver number → abbreviation/team mapping from OpenF1
+    def get_live_drivers_meta(self, session_key):
+        """Driver number → {'code', 'team'} mapping from OpenF1."""
         try:
-            drv_r = requests.get(
-                f'{OPENF1_BASE}/drivers?session_key={session_key}',
-                timeout=5
-            )
-            drv_data = drv_r.json()
+            drv_data = http_client.get_json(f'{OPENF1_BASE}/drivers?session_key={session_key}', timeout=5)
             drivers_meta = {}
             if isinstance(drv_data, list):
                 for d in drv_data:
@@ -571,10 +708,14 @@ class FastF1Service:
                             'code': d.get('name_acronym', '???'),
                             'team': d.get('team_name', 'Unknown'),
                         }
+            return drivers_meta
         except Exception:
-            drivers_meta = {}
+            return {}
+
+    def merge_live_state(self, session_key, positions, intervals, stints, rc_msgs, drivers_meta):
+        """Merge the per-endpoint live data into the /live/state shape."""
+        latest_rc = rc_msgs[-1] if rc_msgs else None
 
-        # Merge everything into one list
         merged = []
         for pos in positions:
             if not isinstance(pos, dict):
@@ -602,4 +743,95 @@ class FastF1Service:
             'timestamp':    datetime.utcnow().isoformat(),
         }
 
+    def get_live_full_state(self):
+        """
+        One call that assembles everything the frontend needs for live mode:
+        positions + intervals + stints + latest race control message.
+        Endpoints serve this from the shared live_poller snapshot rather than
+        calling it per request.
+        """
+        session_key = self.get_live_session_key()
+        if not session_key:
+            return {'error': 'No live session', 'session_key': None}
+
+        return self.merge_live_state(
+            session_key,
+            self.get_live_positions(session_key),
+            self.get_live_intervals(session_key),
+            self.get_live_stints(session_key),
+            self.get_live_race_control(session_key),
+            self.get_live_drivers_meta(session_key),
+        )
+
+    # ── Simulation (replaying a processed race as if it were live) ───────────
+
+    def get_sim_frame(self, year, race_round, lap_number):
+        """
+        (lap_number, total_laps, /live/state JSON bytes) for a processed race's
+        lap, with lap_number clamped to 1..total_laps — served straight from
+        the precomputed frames (see sim_frames) when the warm pipeline has
+        written them. None if the race hasn't been processed.
+        """
+        frames = load_sim_frames(self.processed_cache_dir, year, race_round)
+        if frames is not None:
+            lap_number = frames.clamp(lap_number)
+            return lap_number, frames.total_laps, frames.frame_bytes(lap_number)
+
+        state = self.get_sim_state(year, race_round, lap_number)
+        if state is None:
+            return None
+        return state['sim_lap'], state['sim_total_laps'], json.dumps(state).encode('utf-8')
+
+    def get_sim_state(self, year, race_round, lap_number):
+        """
+        A processed race's lap in the /live/state shape, with lap_number
+        clamped to 1..total_laps. None if the race hasn't been processed.
+        """
+        frames = load_sim_frames(self.processed_cache_dir, year, race_round)
+        if frames is not None:
+            return json.loads(frames.frame_bytes(lap_number))
+
+        meta, lap_data = self.get_processed_lap(year, race_round, lap_number)
+        if meta is None:
+            return None
+
+        total_laps = meta.get('total_laps') or meta.get('lap_count', 0)
+        clamped    = max(1, min(lap_number, total_laps))
+        if clamped != lap_number:
+            lap_number = clamped
+            _, lap_data = self.get_processed_lap(year, race_round, lap_number)
+        return self.sim_lap_state(meta, lap_data, lap_number)
+
+    def get_sim_timeline(self, year, race_round):
+        """
+        Everything a server-side sim clock needs, or None if the race hasn't
+        been processed: {'states': [/live/state per lap], 'lap_seconds': [leader lap time per lap]}.
+        """
+        frames = load_sim_frames(self.processed_cache_dir, year, race_round)
+        if frames is not None:
+            return {'states': frames.states(), 'lap_seconds': list(frames.lap_seconds)}
+
+        meta, _ = self.get_processed_lap(year, race_round, 1)
+        if meta is None:
+            return None
+        total_laps = meta.get('total_laps') or meta.get('lap_count', 0)
+
+        states, lap_seconds = [], []
+        for lap_number in range(1, total_laps + 1):
+            _, lap_data = self.get_processed_lap(year, race_round, lap_number)
+            states.append(lap_state(meta, lap_data, lap_number))
+            lap_seconds.append(leader_lap_seconds(lap_data))
+        return {'states': states, 'lap_seconds': fill_lap_seconds(lap_seconds)}
+
+    @staticmethod
+    def sim_lap_state(race_meta, lap_data, lap_number):
+        """
+        Convert a cached FastF1 lap into the exact same shape that
+        get_live_full_state() returns, so LiveRace.vue needs zero changes.
+        The warm pipeline precomputes these (sim_frames); this is the fallback.
+        """
+        state = lap_state(race_meta, lap_data, lap_number)
+        state['timestamp'] = datetime.utcnow().isoformat()
+        return state
+
 fastf1_service = FastF1Service()
@@ -0,0 +1,252 @@
+"""
+http_client.py — Shared HTTP client for OpenF1, Jolpica and the RSS feeds.
+
+Every external call used to be a bare requests.get(): a new TCP + TLS
+handshake each time, and independent calls made one after another. This
+module gives every upstream host one keep-alive connection pool and adds:
+
+    • fan_out()     run independent calls concurrently on a shared pool
+    • Deadline      one time budget for a composite call; each request's
+                    timeout is capped by what is left of it
+    • retries       bounded, with full-jitter backoff, on connection errors,
+                    timeouts, 429 and 5xx
+    • breaker       per-host circuit breaker: after BREAKER_FAILURES
+                    consecutive failures calls fail fast for BREAKER_COOLDOWN_S,
+                    then one trial call is let through
+    • metrics       per-host request/error/retry counts and latency percentiles
+
+    data = http_client.get_json('https://api.openf1.org/v1/position?session_key=9999')
+
+    deadline = Deadline(4.0)
+    results  = fan_out({'a': lambda: get_json(url_a, deadline=deadline),
+                        'b': lambda: get_json(url_b, deadline=deadline)}, deadline)
+
+Failures raise UpstreamError. Callers that used to catch everything from
+requests keep doing so — UpstreamError is a requests.RequestException.
+
+Environment:
+    HTTP_POOL_SIZE        keep-alive connections per host (default 8)
+    HTTP_FANOUT_WORKERS   threads for concurrent fan-out (default 8)
+    HTTP_RETRIES          retries after the first attempt (default 2)
+"""
+
+import os
+import time
+import random
+import threading
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor, wait
+from urllib.parse import urlsplit
+
+import requests
+from requests.adapters import HTTPAdapter
+
+HTTP_POOL_SIZE      = int(os.getenv('HTTP_POOL_SIZE', '8'))
+HTTP_FANOUT_WORKERS = int(os.getenv('HTTP_FANOUT_WORKERS', '8'))
+HTTP_RETRIES        = int(os.getenv('HTTP_RETRIES', '2'))
+
+DEFAULT_TIMEOUT_S  = 5.0
+BACKOFF_BASE_S     = 0.2
+BACKOFF_MAX_S      = 2.0
+BREAKER_FAILURES   = 5
+BREAKER_COOLDOWN_S = 30.0
+LATENCY_SAMPLES    = 256
+
+USER_AGENT = 'PitLaneLive/1.0'
+
+RETRY_STATUS = {429, 500, 502, 503, 504}
+
+
+class UpstreamError(requests.RequestException):
+    """An upstream call failed after retries, ran out of time, or was short-circuited."""
+
+
+class Deadline:
+    """Time budget shared by all requests of one composite call."""
+
+    def __init__(self, seconds: float):
+        self.expires = time.monotonic() + seconds
+
+    def remaining(self) -> float:
+        return max(0.0, self.expires - time.monotonic())
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+
+class _Upstream:
+    """Connection pool, circuit breaker and metrics for one host."""
+
+    def __init__(self, host):
+        self.host    = host
+        self.session = requests.Session()
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=HTTP_POOL_SIZE, max_retries=0)
+        self.session.mount('https://', adapter)
+        self.session.mount('http://', adapter)
+        self.session.headers['User-Agent'] = USER_AGENT
+
+        self._lock         = threading.Lock()
+        self.failures_row  = 0
+        self.open_until    = 0.0
+        self.trial_running = False
+        self.requests      = 0
+        self.errors        = 0
+        self.retries       = 0
+        self.short_circuit = 0
+        self.latencies     = deque(maxlen=LATENCY_SAMPLES)
+
+    # ── Breaker ───────────────────────────────────────────────────────────────
+
+    def allow(self) -> bool:
+        with self._lock:
+            if self.failures_row < BREAKER_FAILURES:
+                return True
+            if time.monotonic() < self.open_until or self.trial_running:
+                self.short_circuit += 1
+                return False
+            self.trial_running = True   # half-open: one call decides
+            return True
+
+    def record(self, ok: bool, latency_s: float):
+        with self._lock:
+            self.requests += 1
+            self.latencies.append(latency_s)
+            self.trial_running = False
+            if ok:
+                self.failures_row = 0
+                return
+            self.errors       += 1
+            self.failures_row += 1
+            if self.failures_row >= BREAKER_FAILURES:
+                self.open_until = time.monotonic() + BREAKER_COOLDOWN_S
+
+    def stats(self) -> dict:
+        with self._lock:
+            samples = sorted(self.latencies)
+            state   = 'closed'
+            if self.failures_row >= BREAKER_FAILURES:
+                state = 'open' if time.monotonic() < self.open_until else 'half-open'
+            return {
+                'requests':      self.requests,
+                'errors':        self.errors,
+                'retries':       self.retries,
+                'short_circuit': self.short_circuit,
+                'breaker':       state,
+                'latency_ms': {
+                    'p50': _percentile_ms(samples, 0.50),
+                    'p95': _percentile_ms(samples, 0.95),
+                    'max': _percentile_ms(samples, 1.00),
+                },
+            }
+
+
+def _percentile_ms(samples, q):
+    if not samples:
+        return None
+    return round(samples[min(len(samples) - 1, int(q * len(samples)))] * 1000, 1)
+
+
+_upstreams      = {}
+_upstreams_lock = threading.Lock()
+_fanout_pool    = ThreadPoolExecutor(max_workers=HTTP_FANOUT_WORKERS, thread_name_prefix='http')
+
+
+def _upstream(url) -> _Upstream:
+    host = urlsplit(url).netloc
+    with _upstreams_lock:
+        if host not in _upstreams:
+            _upstreams[host] = _Upstream(host)
+        return _upstreams[host]
+
+
+# ── Requests ──────────────────────────────────────────────────────────────────
+
+def get(url, timeout=DEFAULT_TIMEOUT_S, deadline=None, retries=None, headers=None):
+    """
+    GET through the host's pooled session with retries and the breaker.
+    Returns the Response (status < 400); raises UpstreamError otherwise.
+    """
+    up       = _upstream(url)
+    retries  = HTTP_RETRIES if retries is None else retries
+    last_err = None
+
+    for attempt in range(retries + 1):
+        budget = timeout if deadline is None else min(timeout, deadline.remaining())
+        if budget <= 0:
+            raise UpstreamError(f'{up.host}: deadline exceeded' + (f' ({last_err})' if last_err else ''))
+        if not up.allow():
+            raise UpstreamError(f'{up.host}: circuit open')
+
+        started = time.monotonic()
+        try:
+            resp = up.session.get(url, timeout=budget, headers=headers, allow_redirects=True)
+            if resp.status_code in RETRY_STATUS:
+                raise UpstreamError(f'{up.host}: HTTP {resp.status_code}')
+            up.record(True, time.monotonic() - started)
+            if resp.status_code >= 400:
+                # Not retryable, and not the upstream being unhealthy
+                raise UpstreamError(f'{up.host}: HTTP {resp.status_code}', response=resp)
+            return resp
+        except UpstreamError as e:
+            if e.response is not None:
+                raise
+            up.record(False, time.monotonic() - started)
+            last_err = e
+        except requests.RequestException as e:
+            # Connection/timeout, but also chunked-encoding, decoding, redirect, bad URL...
+            up.record(False, time.monotonic() - started)
+            last_err = e
+        except BaseException:
+            # Anything else must still end a half-open trial, or the host stays shut
+            up.record(False, time.monotonic() - started)
+            raise
+
+        if attempt < retries:
+            with up._lock:
+                up.retries += 1
+            pause = random.uniform(0, min(BACKOFF_MAX_S, BACKOFF_BASE_S * 2 ** attempt))
+            if deadline is not None:
+                pause = min(pause, deadline.remaining())
+            time.sleep(pause)
+
+    if isinstance(last_err, UpstreamError):
+        raise last_err
+    raise UpstreamError(f'{up.host}: {last_err}')
+
+
+def get_json(url, **kwargs):
+    """GET and decode JSON; raises UpstreamError on failure or invalid JSON."""
+    resp = get(url, **kwargs)
+    try:
+        return resp.json()
+    except ValueError as e:
+        raise UpstreamError(f'{_upstream(url).host}: invalid JSON ({e})')
+
+
+def fan_out(calls: dict, deadline: Deadline = None) -> dict:
+    """
+    Run independent zero-argument callables concurrently.
+    Returns {name: result}; a call that raised or didn't finish before the
+    deadline maps to its exception instead.
+    """
+    futures = {name: _fanout_pool.submit(fn) for name, fn in calls.items()}
+    wait(futures.values(), timeout=deadline.remaining() if deadline else None)
+
+    results = {}
+    for name, fut in futures.items():
+        if not fut.done():
+            fut.cancel()
+            results[name] = UpstreamError(f'{name}: deadline exceeded')
+            continue
+        try:
+            results[name] = fut.result()
+        except Exception as e:
+            results[name] = e
+    return results
+
+
+def stats() -> dict:
+    """Per-host metrics for every upstream used so far."""
+    with _upstreams_lock:
+        ups = list(_upstreams.values())
+    return {up.host: up.stats() for up in ups}
@@ -0,0 +1,182 @@
+"""
+job_queue.py — In-process background jobs for slow work (cold race processing).
+
+A request that would otherwise block a gthread worker for minutes submits a
+job here and returns 202 with the job id; the client polls /api/jobs/<id>.
+
+    job = job_queue.submit('race', (2025, 5), work)
+
+`work(progress)` runs on a small thread pool and reports progress by calling
+progress(stage, percent), optionally with a detail dict of counters that is
+shown as the job's 'progress'. Jobs are deduplicated by (kind, key): submitting
+while a job for the same key is queued or running returns that job, so
+concurrent requests for the same race join one job.
+
+Finished jobs are kept for JOB_RETENTION_S seconds (and at most
+JOB_MAX_FINISHED of them) so late pollers still see the result.
+
+Race scoring (scoring_jobs) runs on its own single-worker scoring_queue, so
+a post-race pass never waits behind a multi-minute cold FastF1 extraction.
+/api/jobs/<id> looks a job up in either queue (find_job).
+
+Environment:
+    JOB_WORKERS        background worker threads (default 1 — FastF1 is memory-heavy)
+    JOB_RETENTION_S    how long finished jobs stay queryable (default 900)
+"""
+
+import os
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+JOB_WORKERS      = int(os.getenv('JOB_WORKERS', '1'))
+JOB_RETENTION_S  = float(os.getenv('JOB_RETENTION_S', '900'))
+JOB_MAX_FINISHED = 200
+
+QUEUED  = 'queued'
+RUNNING = 'running'
+DONE    = 'done'
+FAILED  = 'failed'
+
+
+class Job:
+    """State of one background job. Mutated only under JobQueue._lock."""
+
+    def __init__(self, kind, key):
+        self.id          = uuid.uuid4().hex
+        self.kind        = kind
+        self.key         = key
+        self.status      = QUEUED
+        self.stage       = 'queued'
+        self.percent     = 0
+        self.detail      = None
+        self.result      = None
+        self.error       = None
+        self.created_at  = time.time()
+        self.started_at  = None
+        self.finished_at = None
+
+    @property
+    def active(self):
+        return self.status in (QUEUED, RUNNING)
+
+    def to_dict(self) -> dict:
+        end = self.finished_at or time.time()
+        return {
+            'job_id':    self.id,
+            'kind':      self.kind,
+            'key':       list(self.key) if isinstance(self.key, tuple) else self.key,
+            'status':    self.status,
+            'stage':     self.stage,
+            'percent':   self.percent,
+            'progress':  self.detail,
+            'result':    self.result,
+            'error':     self.error,
+            'elapsed_s': round(end - (self.started_at or self.created_at), 1),
+            'poll':      f'/api/jobs/{self.id}',
+        }
+
+
+class JobQueue:
+    """Thread-pool job runner with per-key deduplication and progress tracking."""
+
+    def __init__(self, workers: int, name: str = 'job'):
+        self._pool    = ThreadPoolExecutor(max_workers=workers, thread_name_prefix=name)
+        self._lock    = threading.Lock()
+        self._jobs    = OrderedDict()   # id -> Job, in submission order
+        self._active  = {}              # (kind, key) -> Job while queued/running
+
+    def submit(self, kind, key, work):
+        """
+        Queue work(progress) unless a job for (kind, key) is already queued or
+        running; returns (job_dict, created).
+        """
+        with self._lock:
+            self._prune()
+            existing = self._active.get((kind, key))
+            if existing is not None:
+                return existing.to_dict(), False
+
+            job = Job(kind, key)
+            self._jobs[job.id] = job
+            self._active[(kind, key)] = job
+            snapshot = job.to_dict()
+
+        self._pool.submit(self._run, job, work)
+        return snapshot, True
+
+    def get(self, job_id):
+        """Job status dict, or None if unknown or expired."""
+        with self._lock:
+            self._prune()
+            job = self._jobs.get(job_id)
+            return job.to_dict() if job else None
+
+    def find(self, kind, key):
+        """Most recent job for (kind, key), active or finished, or None."""
+        with self._lock:
+            job = self._active.get((kind, key))
+            if job is None:
+                job = next((j for j in reversed(self._jobs.values())
+                            if j.kind == kind and j.key == key), None)
+            return job.to_dict() if job else None
+
+    def stats(self) -> dict:
+        with self._lock:
+            counts = {QUEUED: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+            for job in self._jobs.values():
+                counts[job.status] += 1
+            return {**counts, 'tracked': len(self._jobs)}
+
+    # ── internals ─────────────────────────────────────────────────────────────
+
+    def _run(self, job, work):
+        def progress(stage, percent=None, detail=None):
+            with self._lock:
+                job.stage = stage
+                if detail is not None:
+                    job.detail = dict(detail)
+                if percent is not None:
+                    job.percent = max(job.percent, min(int(percent), 99))
+
+        with self._lock:
+            job.status     = RUNNING
+            job.stage      = 'starting'
+            job.started_at = time.time()
+
+        try:
+            result = work(progress)
+            error  = result.get('error') if isinstance(result, dict) else None
+        except Exception as e:
+            print(f"[job_queue] {job.kind} {job.key} crashed: {e}")
+            result, error = None, str(e) or type(e).__name__
+
+        with self._lock:
+            job.result      = result
+            job.error       = error
+            job.status      = FAILED if error else DONE
+            job.stage       = job.status
+            job.percent     = job.percent if error else 100
+            job.finished_at = time.time()
+            self._active.pop((job.kind, job.key), None)
+
+    def _prune(self):
+        """Drop expired finished jobs. Caller holds _lock."""
+        now      = time.time()
+        finished = [j for j in self._jobs.values() if not j.active]
+        overflow = len(finished) - JOB_MAX_FINISHED
+        for job in finished:
+            if overflow > 0 or now - job.finished_at > JOB_RETENTION_S:
+                del self._jobs[job.id]
+                overflow -= 1
+
+
+job_queue     = JobQueue(workers=JOB_WORKERS)
+scoring_queue = JobQueue(workers=1, name='scoring')
+
+
+def find_job(job_id):
+    """Job status dict from whichever queue runs it, or None."""
+    return job_queue.get(job_id) or scoring_queue.get(job_id)
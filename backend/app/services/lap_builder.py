@@ -0,0 +1,144 @@
+"""
+lap_builder.py — Vectorized lap-by-lap builder for process_race_telemetry.
+
+FastF1Service._build_lap filters the whole laps DataFrame once per lap, walks
+the matches with iterrows(), and re-scans the four speed-trap columns twice
+per row. That is O(laps × rows) pandas overhead per race.
+
+build_laps() does the same work in one pass over the columns:
+
+    1. drop rows without a LapTime, once
+    2. one stable sort by (LapNumber, Position) — same ordering as
+       drivers.sort(key=position or 999) over iterrows() order
+    3. speed aggregates, pit flags and gaps to the lap leader as columns
+    4. emit the per-lap dicts from plain Python lists
+
+The output is identical, value for value, to looping _build_lap over every
+lap. bench_lap_builder.py checks that and reports the speedup per race.
+"""
+
+import numpy as np
+import pandas as pd
+
+SPEED_COLUMNS = ['SpeedI1', 'SpeedI2', 'SpeedFL', 'SpeedST']
+
+NO_POSITION_KEY = 999   # where drivers without a position sort to
+
+_US_PER_DAY = 86_400 * 1_000_000
+
+
+def build_laps(laps: pd.DataFrame, total_laps: int) -> list:
+    """Lap dicts for laps 1..total_laps, in the *_processed.json shape."""
+    valid = laps[laps['LapTime'].notna()]
+    lap_numbers = valid['LapNumber'].to_numpy(dtype='float64')
+
+    # ── Ordering ──────────────────────────────────────────────────────────────
+    position = valid['Position'].to_numpy(dtype='float64')
+    ranked   = ~np.isnan(position) & (np.trunc(position) != 0)
+    sort_key = np.where(ranked, np.trunc(position), NO_POSITION_KEY)
+
+    # lexsort is stable, so ties keep DataFrame row order like iterrows() did
+    order = np.lexsort((sort_key, lap_numbers))
+    valid = valid.iloc[order]
+    lap_numbers = lap_numbers[order]
+    position    = position[order]
+
+    # First row of every lap 1..total_laps (+1 sentinel for the end)
+    bounds = np.searchsorted(lap_numbers, np.arange(1, total_laps + 2), side='left')
+
+    # ── Speed-trap aggregates ─────────────────────────────────────────────────
+    n = len(valid)
+    speed_sum   = np.zeros(n)
+    speed_count = np.zeros(n, dtype='int64')
+    speed_max   = np.full(n, -np.inf)
+    for col in SPEED_COLUMNS:
+        if col not in valid.columns:
+            continue
+        values = valid[col].to_numpy(dtype='float64')
+        usable = ~np.isnan(values) & (values > 0)
+        # Add column by column in the same order as sum() over the list did
+        speed_sum   = speed_sum + np.where(usable, values, 0.0)
+        speed_count = speed_count + usable
+        speed_max   = np.where(usable, np.maximum(speed_max, values), speed_max)
+    has_speed = speed_count > 0
+    speed_avg = np.divide(speed_sum, speed_count, out=np.zeros(n), where=has_speed)
+
+    # ── Pit flags — bool(Timedelta) is False for a zero timedelta ─────────────
+    pit_out = _truthy_timedelta(valid, 'PitOutTime')
+    pit_in  = _truthy_timedelta(valid, 'PitInTime')
+
+    # ── Gap to the lap leader (first row of each lap after sorting) ───────────
+    time_ns  = valid['Time'].to_numpy(dtype='timedelta64[ns]').astype('int64')
+    has_time = valid['Time'].notna().to_numpy()
+    row_lap  = np.clip(np.searchsorted(bounds, np.arange(n), side='right') - 1, 0, None)
+    # Rows outside 1..total_laps are never emitted; just keep their index valid
+    leader   = np.minimum(bounds[row_lap], max(n - 1, 0))
+    is_first = np.arange(n) == leader
+    gap_secs = _total_seconds(time_ns - time_ns[leader])
+    show_gap = ~is_first & has_time & has_time[leader]
+    gap_leader = ~show_gap | (gap_secs < 0)
+
+    # ── Emit ──────────────────────────────────────────────────────────────────
+    driver    = valid['Driver'].tolist()
+    team      = valid['Team'].tolist()
+    lap_time  = valid['LapTime'].tolist()
+    compound  = valid['Compound'].tolist()
+    tyre_life = valid['TyreLife'].to_numpy(dtype='float64')
+    has_tyre  = ~np.isnan(tyre_life)
+    has_pos   = ~np.isnan(position)
+
+    position  = position.tolist()
+    has_pos   = has_pos.tolist()
+    tyre_life = tyre_life.tolist()
+    has_tyre  = has_tyre.tolist()
+    pit_out   = pit_out.tolist()
+    pit_in    = pit_in.tolist()
+    has_speed = has_speed.tolist()
+    speed_avg = speed_avg.tolist()
+    speed_max = speed_max.tolist()
+    gap_secs  = gap_secs.tolist()
+    gap_leader = gap_leader.tolist()
+
+    out = []
+    for lap_number in range(1, total_laps + 1):
+        drivers = []
+        for i in range(bounds[lap_number - 1], bounds[lap_number]):
+            c = compound[i]
+            drivers.append({
+                'driver':    driver[i],
+                'team':      team[i],
+                'position':  int(position[i]) if has_pos[i] else None,
+                'lap_time':  str(lap_time[i]),
+                'compound':  c if pd.notna(c) else 'UNKNOWN',
+                'tire_life': int(tyre_life[i]) if has_tyre[i] else 0,
+                'pit_out':   pit_out[i],
+                'pit_in':    pit_in[i],
+                'distance':  0,
+                'avg_speed': round(speed_avg[i], 1) if has_speed[i] else None,
+                'max_speed': round(speed_max[i], 1) if has_speed[i] else None,
+                'gap':       'LEADER' if gap_leader[i] else f"+{gap_secs[i]:.3f}s",
+            })
+        out.append({'lap_number': lap_number, 'drivers': drivers})
+
+    return out
+
+
+def _truthy_timedelta(frame, col):
+    if col not in frame.columns:
+        return np.zeros(len(frame), dtype=bool)
+    values = frame[col]
+    return (values.notna() & (values != pd.Timedelta(0))).to_numpy()
+
+
+def _total_seconds(ns):
+    """
+    Vectorized Timedelta.total_seconds(): pandas computes it from the
+    microsecond-truncated components as days*86400 + seconds + us/1e6, and
+    the float result only matches bit-for-bit if we do the same.
+    """
+    us   = ns // 1000
+    days = us // _US_PER_DAY
+    rem  = us - days * _US_PER_DAY
+    secs = rem // 1_000_000
+    micro = rem - secs * 1_000_000
+    return (days * 86_400 + secs).astype('float64') + micro / 1e6
@@ -0,0 +1,113 @@
+"""
+lap_index.py — Per-race lap segment file + byte-offset index.
+
+The lap endpoints only ever need one lap, but *_processed.json has to be
+parsed whole to get at it. Alongside each processed race, the warm pipeline
+writes:
+
+    {year}_R{round}_laps.jsonl      one compact JSON lap per line
+    {year}_R{round}_laps.idx.json   race metadata + [offset, length] per lap
+
+A cold worker can then seek straight to the requested lap and decode only
+that lap. The index records the size and content hash of the processed JSON
+(see race_cache.source_fingerprint) and the size of the segment file it was
+built from; if any no longer matches, the index is treated as stale and
+callers fall back to the full file.
+"""
+
+import json
+import os
+
+from app.services.race_cache import RaceCache, source_fingerprint
+
+# Race metadata kept in the index so the lap endpoints never need the full file
+META_FIELDS = ('year', 'round', 'name', 'circuit', 'date', 'total_laps')
+
+# Indexes are tiny (a few KB) — keep every race's parsed index around
+_index_cache = RaceCache(max_bytes=8 * 1024 * 1024, max_entries=256)
+
+
+def lap_index_paths(processed_dir, year, race_round):
+    """(segments_path, index_path) for a race."""
+    return (
+        processed_dir / f"{year}_R{race_round}_laps.jsonl",
+        processed_dir / f"{year}_R{race_round}_laps.idx.json",
+    )
+
+
+def write_lap_index(processed_dir, year, race_round, race_data, source_size, source_hash):
+    """
+    Write the lap segment file and its index for an already-processed race.
+    Both files go through temp-file-then-rename so readers never see a
+    partial write.
+    """
+    segments_path, index_path = lap_index_paths(processed_dir, year, race_round)
+
+    offsets = []
+    pos = 0
+    tmp_segments = segments_path.with_suffix('.jsonl.tmp')
+    with open(tmp_segments, 'wb') as f:
+        for lap in race_data.get('laps', []):
+            line = json.dumps(lap, separators=(',', ':')).encode('utf-8') + b'\n'
+            f.write(line)
+            offsets.append([pos, len(line)])
+            pos += len(line)
+    os.replace(tmp_segments, segments_path)
+
+    index = {field: race_data.get(field) for field in META_FIELDS}
+    index.update({
+        'lap_count':       len(offsets),
+        'source_size':     source_size,
+        'source_hash':     source_hash,
+        'segments_size':   pos,
+        'offsets':         offsets,
+    })
+
+    tmp_index = index_path.with_suffix('.json.tmp')
+    with open(tmp_index, 'w') as f:
+        json.dump(index, f, separators=(',', ':'))
+    os.replace(tmp_index, index_path)
+
+    _index_cache.invalidate((year, race_round))
+    return index
+
+
+def load_lap_index(processed_dir, year, race_round):
+    """
+    Parsed index for a race, or None if missing or stale relative to the
+    processed JSON / segment file currently on disk.
+    """
+    segments_path, index_path = lap_index_paths(processed_dir, year, race_round)
+    index = _index_cache.get((year, race_round), index_path)
+    if index is None:
+        return None
+
+    processed_path = processed_dir / f"{year}_R{race_round}_processed.json"
+    try:
+        if source_fingerprint(processed_path) != (index['source_size'], index.get('source_hash')):
+            return None
+        if os.path.getsize(segments_path) != index['segments_size']:
+            return None
+    except (OSError, KeyError):
+        return None
+
+    return index
+
+
+def read_indexed_lap(processed_dir, index, year, race_round, lap_number):
+    """Seek to and decode a single lap. `lap_number` is 1-based."""
+    if lap_number < 1 or lap_number > index['lap_count']:
+        return None
+
+    segments_path, _ = lap_index_paths(processed_dir, year, race_round)
+    offset, length = index['offsets'][lap_number - 1]
+    with open(segments_path, 'rb') as f:
+        f.seek(offset)
+        return json.loads(f.read(length))
+
+
+def race_meta(race_data):
+    """The metadata subset of a full race dict, in the same shape as an index."""
+    meta = {field: race_data.get(field) for field in META_FIELDS}
+    meta['lap_count'] = len(race_data.get('laps', []))
+    return meta
@@ -0,0 +1,447 @@
+"""
+live_gateway.py — asyncio server for the long-lived live and simulate streams.
+
+Under gunicorn gthread every open /live/stream pins one of the worker's
+threads for as long as the viewer stays, so a handful of viewers starve
+the whole REST API. The gateway serves the streams from a single asyncio
+event loop instead — an idle subscriber is a socket and a small coroutine,
+not a thread — and runs as its own process next to the Flask app:
+
+    python gateway.py --port 8001
+
+Routes (same paths as the Flask app, so a proxy can split on path):
+
+    GET  /api/replay/live/stream                   live state, keyframe + delta SSE
+    GET  /api/replay/simulate/stream?year&round&lap&interval
+                                                   a processed race, one lap per event
+    POST /api/replay/simulate/sessions             start a shared sim (sim_clock)
+    GET  /api/replay/simulate/sessions/<id>        its status
+    POST /api/replay/simulate/sessions/<id>/control
+    GET  /api/replay/simulate/sessions/<id>/stream the sim, keyframe + delta SSE
+    GET  /api/gateway/stats                        connection and frame counters
+    GET  /health
+
+Live frames come from the same sse_broadcaster/live_poller pair the Flask
+route uses, sim frames from each sim's own Broadcaster: per broadcaster the
+gateway holds ONE subscription and fans each frame out on the event loop,
+writing the same pre-encoded bytes to every client. Slow clients get the
+broadcaster's treatment — a bounded backlog, dropped and replaced with a
+keyframe once it overflows. Simulation frames come pre-serialized from
+FastF1Service.get_sim_frame, run on the default executor so file reads
+never block the loop.
+
+Sim sessions live in the process that created them, so a deployment that
+runs the gateway should send all /simulate/sessions traffic to it.
+
+Only what an EventSource and the small sim control calls need is
+implemented: GET/POST with a Content-Length body, CORS preflight, responses
+that end when the connection closes. Everything else is the Flask app's job.
+
+Environment:
+    GATEWAY_HOST            bind address (default 0.0.0.0)
+    GATEWAY_PORT            port (default 8001)
+    GATEWAY_MAX_CLIENTS     open streams before answering 503 (default 10000)
+    SIM_STREAM_INTERVAL_S   default seconds between simulated laps (default 3)
+"""
+
+import os
+import json
+import time
+import asyncio
+import resource
+from collections import deque
+from urllib.parse import urlsplit, parse_qs
+
+from app.config import Config
+from app.services.fastf1_service import fastf1_service
+from app.services.sim_clock import sim_registry, create_sim, control_sim
+from app.services.sse_broadcaster import (
+    live_broadcaster, SSE_CLIENT_BUFFER, SSE_HEARTBEAT_S, HEARTBEAT, RETRY_MS,
+)
+
+GATEWAY_HOST          = os.getenv('GATEWAY_HOST', '0.0.0.0')
+GATEWAY_PORT          = int(os.getenv('GATEWAY_PORT', '8001'))
+GATEWAY_MAX_CLIENTS   = int(os.getenv('GATEWAY_MAX_CLIENTS', '10000'))
+SIM_STREAM_INTERVAL_S = float(os.getenv('SIM_STREAM_INTERVAL_S', '3'))
+
+HEAD_TIMEOUT_S  = 10
+HEAD_MAX_BYTES  = 16 * 1024
+BODY_MAX_BYTES  = 16 * 1024
+LISTEN_BACKLOG  = 4096
+SIM_INTERVAL_RANGE = (0.5, 60.0)
+
+SIM_SESSIONS = '/api/replay/simulate/sessions'
+
+REASONS = {200: 'OK', 201: 'Created', 204: 'No Content', 400: 'Bad Request',
+           404: 'Not Found', 405: 'Method Not Allowed', 413: 'Payload Too Large',
+           503: 'Service Unavailable'}
+
+
+class _StreamClient:
+    """One stream subscriber on the event loop — bounded backlog, drop on overflow."""
+
+    __slots__ = ('pending', 'wake', 'resync', 'dropped', 'last_seq')
+
+    def __init__(self):
+        self.pending  = deque()
+        self.wake     = asyncio.Event()
+        self.resync   = False
+        self.dropped  = 0
+        self.last_seq = None
+
+    def offer(self, frame):
+        if len(self.pending) >= SSE_CLIENT_BUFFER:
+            self.dropped += len(self.pending) + 1
+            self.pending.clear()
+            self.resync = True
+        else:
+            self.pending.append(frame)
+        self.wake.set()
+
+
+class _LoopRelay:
+    """
+    The gateway's subscription to one broadcaster. Called on the
+    broadcaster's thread; hands each frame to the loop in one hop.
+    """
+
+    def __init__(self, loop, deliver):
+        self._loop    = loop
+        self._deliver = deliver
+        self.dropped  = 0
+
+    def offer(self, frame):
+        self._loop.call_soon_threadsafe(self._deliver, frame)
+
+
+class LiveGateway:
+    """Serves SSE streams to many clients from one event loop."""
+
+    def __init__(self, broadcaster, service, cors_origins=()):
+        self._broadcaster  = broadcaster
+        self._service      = service
+        self._cors_origins = set(cors_origins)
+        self._loop         = None
+        self._feeds        = {}     # broadcaster -> (relay, set of _StreamClient)
+        self.sim_clients   = 0
+        self.connections   = 0
+        self.rejected      = 0
+        self.started_at    = time.time()
+
+    async def serve(self, host=GATEWAY_HOST, port=GATEWAY_PORT):
+        self._loop = asyncio.get_running_loop()
+        server = await asyncio.start_server(
+            self._handle, host, port, limit=HEAD_MAX_BYTES, backlog=LISTEN_BACKLOG,
+        )
+        print(f"[gateway] listening on {host}:{port}")
+        async with server:
+            await server.serve_forever()
+
+    def stats(self) -> dict:
+        live = self._clients_of(self._broadcaster)
+        return {
+            'live_clients':   len(live),
+            'sim_clients':    self.sim_clients + self._stream_clients() - len(live),
+            'connections':    self.connections,
+            'rejected':       self.rejected,
+            'dropped_frames': sum(c.dropped for _, clients in self._feeds.values() for c in clients),
+            'uptime_s':       round(time.time() - self.started_at),
+            'broadcaster':    self._broadcaster.stats(),
+            'sim_sessions':   sim_registry.stats()['sessions'],
+        }
+
+    # ── Connection handling ───────────────────────────────────────────────────
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        try:
+            try:
+                head = await asyncio.wait_for(reader.readuntil(b'\r\n\r\n'), HEAD_TIMEOUT_S)
+                method, path, query, headers = _parse_head(head)
+            except (asyncio.TimeoutError, asyncio.IncompleteReadError,
+                    asyncio.LimitOverrunError, ValueError):
+                return
+
+            if method == 'OPTIONS':
+                await self._send_preflight(writer, headers)
+            elif path.startswith(SIM_SESSIONS):
+                await self._sim_session(writer, reader, method, path, headers)
+            elif method != 'GET':
+                await self._send_json(writer, headers, 405, {'error': 'Method not allowed'})
+            elif path == '/api/replay/live/stream':
+                await self._broadcast_stream(writer, headers, self._broadcaster)
+            elif path == '/api/replay/simulate/stream':
+                await self._sim_stream(writer, headers, query)
+            elif path == '/api/gateway/stats':
+                await self._send_json(writer, headers, 200, self.stats())
+            elif path == '/health':
+                await self._send_json(writer, headers, 200, {'status': 'ok'})
+            else:
+                await self._send_json(writer, headers, 404, {'error': 'Not found'})
+        except (ConnectionError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    def _stream_clients(self):
+        return sum(len(clients) for _, clients in self._feeds.values())
+
+    def _open_streams(self):
+        return self._stream_clients() + self.sim_clients
+
+    async def _broadcast_stream(self, writer, headers, broadcaster):
+        """Keyframe + delta SSE from `broadcaster` (the live one or a sim's)."""
+        if self._open_streams() >= GATEWAY_MAX_CLIENTS:
+            self.rejected += 1
+            await self._send_json(writer, headers, 503, {'error': 'Too many streams'})
+            return
+
+        client = _StreamClient()
+        # Registered first: a frame published from here on reaches
+        # client.pending even if the backlog misses it (repeats are skipped by seq)
+        self._add_client(broadcaster, client)
+        backlog = broadcaster.resume_frames(_int(headers.get('last-event-id')))
+        try:
+            await self._send_stream_head(writer, headers)
+            for frame in backlog:
+                client.last_seq = frame.seq
+                writer.write(frame.data)
+            await writer.drain()
+
+            while True:
+                try:
+                    await asyncio.wait_for(client.wake.wait(), SSE_HEARTBEAT_S)
+                except asyncio.TimeoutError:
+                    writer.write(HEARTBEAT.encode())
+                    await writer.drain()
+                    continue
+
+                client.wake.clear()
+                if client.resync:
+                    client.resync = False
+                    keyframe = broadcaster.current_keyframe()
+                    frames = [keyframe] if keyframe else []
+                else:
+                    frames = list(client.pending)
+                client.pending.clear()
+
+                for frame in frames:
+                    if client.last_seq is not None and frame.seq <= client.last_seq:
+                        continue
+                    client.last_seq = frame.seq
+                    writer.write(frame.data)
+                await writer.drain()
+        finally:
+            self._remove_client(broadcaster, client)
+
+    async def _sim_session(self, writer, reader, method, path, headers):
+        """/simulate/sessions[/<id>[/control|/stream]] — the sim_clock routes."""
+        parts = [p for p in path[len(SIM_SESSIONS):].split('/') if p]
+        route = (method, len(parts), parts[1] if len(parts) == 2 else None)
+
+        if route == ('POST', 0, None):
+            params = await self._read_json(reader, writer, headers)
+            if params is not None:
+                payload, status = await self._loop.run_in_executor(None, create_sim, params)
+                await self._send_json(writer, headers, status, payload)
+        elif route == ('GET', 0, None):
+            await self._send_json(writer, headers, 200, sim_registry.stats())
+        elif route == ('POST', 2, 'control'):
+            params = await self._read_json(reader, writer, headers)
+            if params is not None:
+                payload, status = control_sim(parts[0], params)
+                await self._send_json(writer, headers, status, payload)
+        elif route[0] == 'GET' and route[1:] in ((1, None), (2, 'stream')):
+            sim = sim_registry.get(parts[0])
+            if sim is None:
+                await self._send_json(writer, headers, 404, {'error': 'Simulation not found'})
+            elif len(parts) == 1:
+                await self._send_json(writer, headers, 200, sim.status())
+            else:
+                await self._broadcast_stream(writer, headers, sim.broadcaster)
+        elif len(parts) <= 2:
+            await self._send_json(writer, headers, 405, {'error': 'Method not allowed'})
+        else:
+            await self._send_json(writer, headers, 404, {'error': 'Not found'})
+
+    async def _read_json(self, reader, writer, headers):
+        """The request's JSON object body ({} if empty), or None after answering 400/413."""
+        length = _int(headers.get('content-length')) or 0
+        if length > BODY_MAX_BYTES:
+            await self._send_json(writer, headers, 413, {'error': 'Body too large'})
+            return None
+        try:
+            body = await asyncio.wait_for(reader.readexactly(length), HEAD_TIMEOUT_S) if length else b''
+            params = json.loads(body) if body else {}
+        except (asyncio.TimeoutError, asyncio.IncompleteReadError, ValueError):
+            params = None
+        if not isinstance(params, dict):
+            await self._send_json(writer, headers, 400, {'error': 'Expected a JSON object'})
+            return None
+        return params
+
+    async def _sim_stream(self, writer, headers, query):
+        """One processed lap per event, every `interval` seconds, until the flag."""
+        try:
+            year       = int(query.get('year', 2025))
+            race_round = int(query.get('round', 1))
+            lap        = int(query.get('lap', 1))
+            interval   = float(query.get('interval', SIM_STREAM_INTERVAL_S))
+        except ValueError:
+            await self._send_json(writer, headers, 400, {'error': 'Invalid parameters'})
+            return
+        interval = max(SIM_INTERVAL_RANGE[0], min(interval, SIM_INTERVAL_RANGE[1]))
+
+        resumed = _int(headers.get('last-event-id'))
+        if resumed is not None:
+            lap = resumed + 1
+
+        if self._open_streams() >= GATEWAY_MAX_CLIENTS:
+            self.rejected += 1
+            await self._send_json(writer, headers, 503, {'error': 'Too many streams'})
+            return
+
+        get_frame = self._service.get_sim_frame
+        frame = await self._loop.run_in_executor(None, get_frame, year, race_round, lap)
+        if frame is None:
+            await self._send_json(writer, headers, 404, {
+                'error':     f'Race not cached: {year} R{race_round}',
+                'simulated': True,
+            })
+            return
+
+        self.sim_clients += 1
+        try:
+            await self._send_stream_head(writer, headers)
+            while True:
+                lap, total_laps, data = frame
+                writer.write(b'id: %d\ndata: %s\n\n' % (lap, data))
+                await writer.drain()
+                if lap >= total_laps:
+                    writer.write(b"event: end\ndata: {}\n\n")
+                    await writer.drain()
+                    return
+                await asyncio.sleep(interval)
+                frame = await self._loop.run_in_executor(None, get_frame, year, race_round, lap + 1)
+        finally:
+            self.sim_clients -= 1
+
+    # ── Fan-out ───────────────────────────────────────────────────────────────
+
+    def _clients_of(self, broadcaster):
+        feed = self._feeds.get(broadcaster)
+        return feed[1] if feed else set()
+
+    def _add_client(self, broadcaster, client):
+        feed = self._feeds.get(broadcaster)
+        if feed is None:
+            clients = set()
+            relay = broadcaster.subscribe(
+                subscription_cls=lambda _b, _id: _LoopRelay(
+                    self._loop, lambda frame: self._fan_out(clients, frame)),
+            )
+            feed = self._feeds[broadcaster] = (relay, clients)
+        feed[1].add(client)
+
+    def _remove_client(self, broadcaster, client):
+        relay, clients = self._feeds[broadcaster]
+        clients.discard(client)
+        if not clients:
+            # Nobody left — let the broadcaster and its poller/clock go idle
+            del self._feeds[broadcaster]
+            broadcaster.unsubscribe(relay)
+
+    @staticmethod
+    def _fan_out(clients, frame):
+        for client in clients:
+            client.offer(frame)
+
+    # ── Responses ─────────────────────────────────────────────────────────────
+
+    def _cors_header(self, headers):
+        origin = headers.get('origin')
+        if origin and origin in self._cors_origins:
+            return f'Access-Control-Allow-Origin: {origin}\r\nVary: Origin\r\n'
+        return ''
+
+    async def _send_preflight(self, writer, headers):
+        writer.write((
+            'HTTP/1.1 204 No Content\r\n'
+            'Access-Control-Allow-Methods: GET, POST, OPTIONS\r\n'
+            'Access-Control-Allow-Headers: Content-Type, Last-Event-ID\r\n'
+            'Access-Control-Max-Age: 600\r\n'
+            'Connection: close\r\n'
+            f'{self._cors_header(headers)}'
+            '\r\n'
+        ).encode())
+        await writer.drain()
+
+    async def _send_stream_head(self, writer, headers):
+        writer.write((
+            'HTTP/1.1 200 OK\r\n'
+            'Content-Type: text/event-stream\r\n'
+            'Cache-Control: no-cache\r\n'
+            'X-Accel-Buffering: no\r\n'
+            'Connection: close\r\n'
+            f'{self._cors_header(headers)}'
+            '\r\n'
+            f'retry: {RETRY_MS}\n\n'
+        ).encode())
+        await writer.drain()
+
+    async def _send_json(self, writer, headers, status, payload):
+        body = json.dumps(payload).encode()
+        writer.write((
+            f'HTTP/1.1 {status} {REASONS.get(status, "")}\r\n'
+            'Content-Type: application/json\r\n'
+            f'Content-Length: {len(body)}\r\n'
+            'Cache-Control: no-cache\r\n'
+            'Connection: close\r\n'
+            f'{self._cors_header(headers)}'
+            '\r\n'
+        ).encode() + body)
+        await writer.drain()
+
+
+def _parse_head(head: bytes):
+    """(method, path, {query: first value}, {lowercased header: value})."""
+    lines = head.decode('latin-1').split('\r\n')
+    method, target, _version = lines[0].split(' ', 2)
+    url     = urlsplit(target)
+    query   = {k: v[0] for k, v in parse_qs(url.query).items()}
+    headers = {}
+    for line in lines[1:]:
+        if ':' in line:
+            name, value = line.split(':', 1)
+            headers[name.strip().lower()] = value.strip()
+    return method.upper(), url.path, query, headers
+
+
+def _int(value):
+    try:
+        return int(value)
+    except (TypeError, ValueError):
+        return None
+
+
+def raise_fd_limit():
+    """Lift the soft open-files limit to the hard limit — one fd per subscriber."""
+    soft, hard = resource.getrlimit(resource.RLIMIT_NOFILE)
+    if hard == resource.RLIM_INFINITY or soft < hard:
+        target = hard if hard != resource.RLIM_INFINITY else max(soft, 65536)
+        try:
+            resource.setrlimit(resource.RLIMIT_NOFILE, (target, hard))
+            soft = target
+        except (ValueError, OSError):
+            pass
+    return soft
+
+
+def run(host=GATEWAY_HOST, port=GATEWAY_PORT):
+    limit = raise_fd_limit()
+    print(f"[gateway] open files limit {limit}, max streams {GATEWAY_MAX_CLIENTS}")
+    gateway = LiveGateway(live_broadcaster, fastf1_service, Config.CORS_ORIGINS)
+    try:
+        asyncio.run(gateway.serve(host, port))
+    except KeyboardInterrupt:
+        pass
@@ -0,0 +1,238 @@
+"""
+live_poller.py — One background OpenF1 poller per process, shared by every live endpoint.
+
+Before this, every /live/state poll and every /live/stream connection made
+its own round of OpenF1 calls, so upstream load grew with the number of
+viewers. Now a single daemon thread refreshes one live snapshot on a fixed
+cadence and all /live/* endpoints and SSE subscribers read that snapshot.
+
+A snapshot is a plain dict that is built once per refresh and then swapped
+in by reference — it is never mutated after publishing, so readers can use
+it without locks. Treat it as read-only:
+
+    {
+        'version':      int, bumped on every publish
+        'session_key':  current OpenF1 session or None
+        'state':        the /live/state payload
+        'positions':    latest position entry per driver, ordered
+        'race_control': all race control messages
+        'pit_stops':    all pit stops
+        'car':          {driver_number: latest car data} for watched drivers
+        'fetched_at':   wall-clock time the data was fetched
+        'error':        last refresh error, if the snapshot is stale
+        'store':        LiveStore.stats() as of this refresh
+    }
+
+The poller starts on the first read and stops again once nobody has read a
+snapshot for LIVE_POLL_IDLE_S, so a quiet worker makes no upstream calls.
+Car data is only fetched for drivers requested in the last LIVE_CAR_WATCH_S,
+and kept in per-driver ring buffers for car_trace().
+Each refresh only downloads rows newer than the last one (see live_store),
+and the session key itself comes from a cached resolver (see live_session),
+so a rollover shows up in one snapshot and LiveStore resets on it.
+
+Environment:
+    LIVE_POLL_INTERVAL_S   refresh cadence in seconds (default 3)
+    LIVE_POLL_IDLE_S       stop after this long without readers (default 60)
+    LIVE_CAR_WATCH_S       keep polling a driver's car data this long (default 30)
+    LIVE_POLL_DEADLINE_S   time budget for one refresh's concurrent fetches (default 4)
+"""
+
+import os
+import time
+import threading
+
+from app.services.fastf1_service import fastf1_service, OPENF1_BASE
+from app.services.http_client import Deadline
+from app.services.live_store import LiveStore
+
+LIVE_POLL_INTERVAL_S = float(os.getenv('LIVE_POLL_INTERVAL_S', '3'))
+LIVE_POLL_IDLE_S     = float(os.getenv('LIVE_POLL_IDLE_S', '60'))
+LIVE_CAR_WATCH_S     = float(os.getenv('LIVE_CAR_WATCH_S', '30'))
+LIVE_POLL_DEADLINE_S = float(os.getenv('LIVE_POLL_DEADLINE_S', '4'))
+
+MAX_BACKOFF_S = 30
+
+
+def _empty_snapshot(version=0, error=None):
+    return {
+        'version':      version,
+        'session_key':  None,
+        'state':        {'error': 'No live session', 'session_key': None},
+        'positions':    [],
+        'race_control': [],
+        'pit_stops':    [],
+        'car':          {},
+        'fetched_at':   None,
+        'error':        error,
+        'store':        None,
+    }
+
+
+class LivePoller:
+    """Background refresher of a shared, immutable live snapshot."""
+
+    def __init__(self, service, interval: float, idle_after: float, car_watch: float):
+        self._service    = service
+        self._store      = LiveStore(service._safe_json_list, OPENF1_BASE)
+        self.interval    = interval
+        self.idle_after  = idle_after
+        self.car_watch   = car_watch
+        self._snapshot   = _empty_snapshot()
+        self._cond       = threading.Condition()
+        self._start_lock = threading.Lock()
+        self._thread     = None
+        self._last_read  = 0.0
+        self._watched    = {}   # driver_number -> monotonic time last requested
+        self.refreshes        = 0
+        self.failures         = 0
+        self.last_duration_s  = None
+
+    # ── Readers ───────────────────────────────────────────────────────────────
+
+    def snapshot(self, wait_first: float = None) -> dict:
+        """
+        Current snapshot; starts the poller if it isn't running. On a cold
+        start, waits up to `wait_first` seconds (default 2 intervals) for the
+        first refresh instead of returning an empty snapshot.
+        """
+        self._touch()
+        snap = self._snapshot
+        if snap['version'] == 0:
+            snap = self.wait_for_update(0, self.interval * 2 if wait_first is None else wait_first)
+        return snap
+
+    def wait_for_update(self, version: int, timeout: float) -> dict:
+        """Block until a snapshot newer than `version` is published (or timeout)."""
+        self._touch()
+        with self._cond:
+            self._cond.wait_for(lambda: self._snapshot['version'] != version, timeout)
+            return self._snapshot
+
+    def watch_car(self, driver_number: int):
+        """Include this driver's car data in the next refreshes."""
+        self._watched[driver_number] = time.monotonic()
+
+    def car_trace(self, driver_number: int, seconds: float, points: int):
+        """Last `seconds` of a driver's car data at most `points` long, or None if none yet."""
+        return self._store.telemetry.window(driver_number, seconds, points)
+
+    @staticmethod
+    def age(snap: dict):
+        """Seconds since the snapshot's data was fetched, or None if never."""
+        if snap['fetched_at'] is None:
+            return None
+        return round(time.time() - snap['fetched_at'], 2)
+
+    def state_payload(self, snap: dict) -> dict:
+        """The /live/state payload for a snapshot, with its age and staleness."""
+        return {**snap['state'], 'snapshot_age_s': self.age(snap), 'stale': bool(snap['error'])}
+
+    def stats(self) -> dict:
+        snap = self._snapshot
+        return {
+            'running':         self._thread is not None,
+            'version':         snap['version'],
+            'session_key':     snap['session_key'],
+            'age_s':           self.age(snap),
+            'interval_s':      self.interval,
+            'refreshes':       self.refreshes,
+            'failures':        self.failures,
+            'last_duration_s': self.last_duration_s,
+            'last_error':      snap['error'],
+            'watched_cars':    sorted(self._watched),
+            'live_session':    self._service.live_session.stats(),
+            'store':           snap['store'],
+        }
+
+    # ── Poll loop ─────────────────────────────────────────────────────────────
+
+    def _touch(self):
+        self._last_read = time.monotonic()
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name='live-poller', daemon=True)
+                    self._thread.start()
+
+    def _run(self):
+        print(f"[live_poller] started (every {self.interval:.1f}s)")
+        failures_in_row = 0
+        while True:
+            with self._start_lock:
+                if time.monotonic() - self._last_read > self.idle_after:
+                    self._thread = None
+                    print("[live_poller] idle — stopped")
+                    return
+
+            started = time.monotonic()
+            ok = self._refresh()
+            self.last_duration_s = round(time.monotonic() - started, 3)
+
+            failures_in_row = 0 if ok else failures_in_row + 1
+            delay = min(self.interval * (2 ** failures_in_row), MAX_BACKOFF_S)
+            time.sleep(max(0.0, delay - (time.monotonic() - started)))
+
+    def _refresh(self) -> bool:
+        svc = self._service
+        try:
+            fetched_at  = time.time()
+            session_key = svc.get_live_session_key()
+            if not session_key:
+                self._publish(_empty_snapshot(self._snapshot['version'] + 1), fetched_at)
+                return True
+
+            parts = self._store.update(
+                session_key,
+                car_drivers=self._watched_drivers(),
+                deadline=Deadline(LIVE_POLL_DEADLINE_S),
+            )
+            state = svc.merge_live_state(
+                session_key, parts['positions'], parts['intervals'], parts['stints'],
+                parts['race_control'], parts['drivers_meta'],
+            )
+
+            self._publish({
+                'version':      self._snapshot['version'] + 1,
+                'session_key':  session_key,
+                'state':        state,
+                'positions':    parts['positions'],
+                'race_control': parts['race_control'],
+                'pit_stops':    parts['pit_stops'],
+                'car':          parts['car'],
+                'error':        None,
+            }, fetched_at)
+            return True
+
+        except Exception as e:
+            # Keep serving the last good data, flagged with the error
+            self.failures += 1
+            print(f"[live_poller] refresh failed: {e}")
+            stale = dict(self._snapshot, version=self._snapshot['version'] + 1, error=str(e))
+            self._publish(stale, stale['fetched_at'])
+            return False
+
+    def _watched_drivers(self):
+        cutoff = time.monotonic() - self.car_watch
+        for drv, seen in list(self._watched.items()):
+            if seen < cutoff:
+                self._watched.pop(drv, None)
+        return list(self._watched)
+
+    def _publish(self, snap, fetched_at):
+        # Store stats are taken here, on the poller thread — the only one that
+        # changes the feed dicts — so stats() never iterates them mid-update
+        snap['fetched_at'] = fetched_at
+        snap['store']      = self._store.stats()
+        with self._cond:
+            self._snapshot = snap
+            self.refreshes += 1
+            self._cond.notify_all()
+
+
+live_poller = LivePoller(
+    fastf1_service,
+    interval=LIVE_POLL_INTERVAL_S,
+    idle_after=LIVE_POLL_IDLE_S,
+    car_watch=LIVE_CAR_WATCH_S,
+)
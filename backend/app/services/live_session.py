@@ -0,0 +1,208 @@
+"""
+live_session.py — Cached resolution of the current live OpenF1 session key.
+
+Every live method without an explicit session_key used to download the
+full list of Race sessions from OpenF1 first, so each poll paid one extra
+upstream round trip just to learn a number that changes a few times a
+month. The resolver caches the key and only asks OpenF1 again when it may
+actually have changed:
+
+    far from any race      refresh every LIVE_SESSION_TTL_S (default 15 min),
+                           but never later than shortly before the next race
+    near a start or end    refresh every LIVE_SESSION_NEAR_TTL_S (default 30s),
+                           within NEAR_WINDOW_S of a race start / expected end
+    no schedule available  plain LIVE_SESSION_TTL_S
+
+Race start times come from the FastF1 event schedule (Session5DateUtc, as
+in prediction_window_service); the end is the OpenF1 session's date_end
+when known, else start + RACE_DURATION_MIN.
+
+The resolved entry is an immutable dict swapped in by reference, so every
+reader sees either the old key or the new one — a rollover is atomic. Only
+one caller refreshes at a time; while it does, others keep getting the
+previous key instead of queueing behind the upstream call. If OpenF1 is
+unreachable the last key is kept and retried after FAIL_TTL_S.
+
+Environment:
+    LIVE_SESSION_TTL_S        cache lifetime away from races (default 900)
+    LIVE_SESSION_NEAR_TTL_S   cache lifetime around race start/end (default 30)
+"""
+
+import os
+import time
+import threading
+from datetime import datetime, timezone
+
+from app.services.prediction_window_service import _parse_utc, RACE_DURATION_MIN
+
+LIVE_SESSION_TTL_S      = float(os.getenv('LIVE_SESSION_TTL_S', '900'))
+LIVE_SESSION_NEAR_TTL_S = float(os.getenv('LIVE_SESSION_NEAR_TTL_S', '30'))
+
+NEAR_WINDOW_S      = 15 * 60
+FAIL_TTL_S         = 30
+SCHEDULE_REFRESH_S = 6 * 3600
+SCHEDULE_RETRY_S   = 30 * 60
+
+
+class LiveSessionResolver:
+    """Current live session key, cached with a schedule-driven TTL."""
+
+    def __init__(self, fetch_sessions, load_schedule, ttl: float, near_ttl: float):
+        """
+        fetch_sessions(year) -> list of OpenF1 Race session rows (raises on failure)
+        load_schedule(year)  -> FastF1 EventSchedule (raises on failure)
+        """
+        self._fetch_sessions = fetch_sessions
+        self._load_schedule  = load_schedule
+        self.ttl             = ttl
+        self.near_ttl        = near_ttl
+        self._entry          = None    # immutable, swapped by reference
+        self._lock           = threading.Lock()
+        self._schedules      = {}      # year -> (loaded_at, [race start epoch seconds])
+        self.refreshes       = 0
+        self.rollovers       = 0
+        self.failures        = 0
+
+    def current(self):
+        """The current session key (or None) — an upstream call only when the entry expired."""
+        entry = self._entry
+        if entry is not None and time.time() < entry['expires_at']:
+            return entry['session_key']
+
+        if entry is not None:
+            if not self._lock.acquire(blocking=False):
+                return entry['session_key']   # being refreshed — previous key meanwhile
+        else:
+            self._lock.acquire()
+        try:
+            entry = self._entry
+            if entry is None or time.time() >= entry['expires_at']:
+                entry = self._refresh()
+            return entry['session_key']
+        finally:
+            self._lock.release()
+
+    def invalidate(self):
+        """Force a refresh on the next call."""
+        entry = self._entry
+        if entry is not None:
+            self._entry = dict(entry, expires_at=0)
+
+    def stats(self) -> dict:
+        entry = self._entry or {}
+        expires_at = entry.get('expires_at')
+        return {
+            'session_key':  entry.get('session_key'),
+            'resolved_at':  entry.get('resolved_at'),
+            'expires_in_s': round(expires_at - time.time(), 1) if expires_at else None,
+            'ttl_reason':   entry.get('reason'),
+            'last_error':   entry.get('error'),
+            'refreshes':    self.refreshes,
+            'rollovers':    self.rollovers,
+            'failures':     self.failures,
+        }
+
+    # ── internals ─────────────────────────────────────────────────────────────
+
+    def _refresh(self):
+        now  = time.time()
+        prev = self._entry
+        self.refreshes += 1
+        try:
+            year     = datetime.now(timezone.utc).year
+            sessions = self._fetch_sessions(year) or self._fetch_sessions(year - 1)
+        except Exception as e:
+            self.failures += 1
+            print(f"[live_session] refresh failed: {e}")
+            entry = {
+                'session_key': prev['session_key'] if prev else None,
+                'resolved_at': prev['resolved_at'] if prev else None,
+                'expires_at':  now + FAIL_TTL_S,
+                'reason':      'retry after error',
+                'error':       str(e),
+            }
+            self._entry = entry
+            return entry
+
+        latest = sessions[-1] if sessions else None
+        key    = latest.get('session_key') if isinstance(latest, dict) else None
+        ttl, reason = self._ttl_for(now, latest if isinstance(latest, dict) else None)
+
+        if prev is not None and prev['session_key'] != key:
+            self.rollovers += 1
+            print(f"[live_session] session {prev['session_key']} → {key}")
+
+        entry = {
+            'session_key': key,
+            'resolved_at': now,
+            'expires_at':  now + ttl,
+            'reason':      reason,
+            'error':       None,
+        }
+        self._entry = entry
+        return entry
+
+    def _ttl_for(self, now, latest):
+        """(seconds, reason) the key just resolved can be trusted for."""
+        boundaries = []
+        for start in self._race_starts(now):
+            boundaries += [start, start + RACE_DURATION_MIN * 60]
+        if latest:
+            for field in ('date_start', 'date_end'):
+                parsed = _parse_iso(latest.get(field))
+                if parsed is not None:
+                    boundaries.append(parsed)
+
+        if not boundaries:
+            return self.ttl, 'no schedule'
+        if any(abs(b - now) <= NEAR_WINDOW_S for b in boundaries):
+            return self.near_ttl, 'near race start/end'
+
+        upcoming = [b for b in boundaries if b > now]
+        if upcoming:
+            until_near = min(upcoming) - NEAR_WINDOW_S - now
+            if until_near < self.ttl:
+                return max(self.near_ttl, until_near), 'until next race window'
+        return self.ttl, 'no race nearby'
+
+    def _race_starts(self, now):
+        """Race start times (epoch seconds) from the FastF1 schedule — next year's too after the finale."""
+        year   = datetime.fromtimestamp(now, timezone.utc).year
+        starts = self._cached_starts(year, now)
+        if not any(s > now for s in starts):
+            starts = starts + self._cached_starts(year + 1, now)
+        return starts
+
+    def _cached_starts(self, year, now):
+        cached = self._schedules.get(year)
+        max_age = SCHEDULE_REFRESH_S if cached and cached[1] else SCHEDULE_RETRY_S
+        if cached is None or now - cached[0] > max_age:
+            cached = (now, self._schedule_starts(year))
+            self._schedules[year] = cached
+        return cached[1]
+
+    def _schedule_starts(self, year):
+        try:
+            schedule = self._load_schedule(year)
+        except Exception as e:
+            print(f"[live_session] schedule {year} unavailable: {e}")
+            return []
+        starts = []
+        for value in schedule.get('Session5DateUtc', []):
+            parsed = _parse_utc(value)
+            if parsed is not None:
+                starts.append(parsed.timestamp())
+        return starts
+
+
+def _parse_iso(value):
+    """OpenF1 ISO timestamp → epoch seconds, or None."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
@@ -0,0 +1,265 @@
+"""
+live_store.py — Incremental OpenF1 state for the live poller.
+
+The /position, /intervals, /race_control, /pit and /car_data endpoints are
+append-only logs. Downloading the whole session history on every poll means
+the payload grows all race long, only to be reduced to "latest per driver"
+in Python. LiveStore keeps a `date>` cursor per feed, fetches only rows from
+CURSOR_OVERLAP_S behind the last one it saw, and folds them into per-driver
+state — so each poll costs O(new rows), roughly constant regardless of race
+progress. OpenF1 can publish a row after newer ones (another driver's, or a
+late race-control message); the overlap picks those up, and rows already
+seen in it are dropped by (date, driver_number).
+
+    store = LiveStore(fetch_list, OPENF1_BASE)
+    parts = store.update(session_key, car_drivers=[1, 44], deadline=Deadline(4))
+
+fetch_list(url, deadline=None) returns a list (empty on any failure). The
+feeds of one update are fetched concurrently through http_client.fan_out.
+
+Feeds without a date (stints, drivers) are small and bounded:
+  • stints are fetched from the lowest current stint number up
+  • driver metadata is refetched every DRIVERS_REFRESH_S
+
+Car data is kept in per-driver ring buffers (see car_telemetry), which
+serve both the latest sample and recent traces.
+
+When session_key changes everything is reset and the next update starts
+from a full fetch. The first fetch of a session is the only full one.
+"""
+
+import time
+from datetime import datetime, timedelta
+from urllib.parse import quote
+
+from app.services.http_client import fan_out
+from app.services.car_telemetry import CarTelemetry, TELEMETRY_RING_POINTS
+
+DRIVERS_REFRESH_S = 300
+
+# A new car_data feed starts this far behind the newest row seen anywhere,
+# instead of downloading the driver's whole history
+CAR_BACKFILL_S = 30
+
+# Each fetch re-reads this far behind the cursor, for rows published late
+CURSOR_OVERLAP_S = 5
+
+
+class DateFeed:
+    """One OpenF1 endpoint read forward with an overlapping `date>` cursor."""
+
+    def __init__(self, path, params='', key_fields=('date', 'driver_number')):
+        self.path       = path
+        self.params     = params
+        self.key_fields = key_fields
+        self.cursor     = None
+        self.last_rows     = 0
+        self.total_rows    = 0
+        self.repeated_rows = 0
+        self._seen = {}   # row key -> date, for rows inside the overlap window
+
+    def fetch(self, fetch_list, base, session_key, deadline=None):
+        """
+        Rows from CURSOR_OVERLAP_S behind the cursor on — including some
+        already returned; advance() drops those. Safe to run on a fan-out
+        thread: the cursor only moves in advance(), once the rows have been
+        folded in.
+        """
+        url = f'{base}/{self.path}?session_key={session_key}{self.params}'
+        if self.cursor:
+            since = _shift_iso(self.cursor, -CURSOR_OVERLAP_S) or self.cursor
+            url += f'&date>{quote(since)}'
+        return [r for r in fetch_list(url, deadline=deadline) if isinstance(r, dict)]
+
+    def advance(self, rows):
+        """The rows not returned before; moves the cursor past them."""
+        fresh = []
+        for r in rows:
+            key = tuple(r.get(f) for f in self.key_fields)
+            if r.get('date') and key in self._seen:
+                continue
+            fresh.append(r)
+        new_keys = {tuple(r.get(f) for f in self.key_fields): r['date'] for r in fresh if r.get('date')}
+        self._seen.update(new_keys)
+
+        dates = list(new_keys.values())
+        if dates:
+            self.cursor = max(dates + ([self.cursor] if self.cursor else []))
+            # Forget what the next fetch can no longer return
+            since = _shift_iso(self.cursor, -CURSOR_OVERLAP_S) or self.cursor
+            self._seen = {k: d for k, d in self._seen.items() if d > since}
+
+        self.last_rows      = len(fresh)
+        self.total_rows    += len(fresh)
+        self.repeated_rows += len(rows) - len(fresh)
+        return fresh
+
+
+class LiveStore:
+    """Per-session live state kept current from incremental OpenF1 fetches."""
+
+    def __init__(self, fetch_list, base):
+        self._fetch_list = fetch_list
+        self._base       = base
+        self.resets      = 0
+        self.reset(None)
+
+    def reset(self, session_key):
+        """Forget everything — called when the live session changes."""
+        self.session_key   = session_key
+        self._feeds = {
+            'position':     DateFeed('position'),
+            'intervals':    DateFeed('intervals'),
+            'race_control': DateFeed('race_control', key_fields=('date', 'driver_number', 'message')),
+            'pit':          DateFeed('pit'),
+        }
+        self._car_feeds    = {}   # driver_number -> DateFeed
+        self.positions     = {}   # driver_number -> latest /position row
+        self.intervals     = {}   # driver_number -> latest /intervals row
+        self.stints        = {}   # driver_number -> latest /stints row
+        self.race_control  = []
+        self.pit_stops     = []
+        self.telemetry     = CarTelemetry(TELEMETRY_RING_POINTS)   # ring buffer per driver
+        self.drivers_meta  = {}
+        self._drivers_at   = 0.0
+        self.latest_date   = None
+
+    def update(self, session_key, car_drivers=(), deadline=None):
+        """
+        Fetch what's new for `session_key` and return the merged parts.
+        All feeds are fetched concurrently within `deadline`; a feed that
+        fails or runs out of time is simply picked up on the next update.
+        """
+        if session_key != self.session_key:
+            if self.session_key is not None:
+                print(f"[live_store] session {self.session_key} → {session_key}, resetting")
+                self.resets += 1
+            self.reset(session_key)
+
+        for drv in list(self._car_feeds):
+            if drv not in car_drivers:
+                # Not watched any more — stop fetching; its ring keeps what it has
+                self._car_feeds.pop(drv)
+        for drv in car_drivers:
+            if drv not in self._car_feeds:
+                feed = DateFeed('car_data', f'&driver_number={drv}')
+                feed.cursor = _shift_iso(self.latest_date, -CAR_BACKFILL_S)
+                self._car_feeds[drv] = feed
+
+        fetch = lambda feed: (lambda: feed.fetch(self._fetch_list, self._base, session_key, deadline))
+        calls = {name: fetch(feed) for name, feed in self._feeds.items()}
+        calls.update({('car', drv): fetch(feed) for drv, feed in self._car_feeds.items()})
+        calls['stints'] = lambda: self._fetch_list(self._stints_url(session_key), deadline=deadline)
+        if self._drivers_due():
+            calls['drivers'] = lambda: self._fetch_list(
+                f'{self._base}/drivers?session_key={session_key}', deadline=deadline)
+
+        results = fan_out(calls, deadline)
+        rows = {name: (r if isinstance(r, list) else []) for name, r in results.items()}
+
+        # Fold on this thread only — cursors advance with the rows they cover
+        feeds = self._feeds
+        _fold_latest(self.positions, feeds['position'].advance(rows['position']))
+        _fold_latest(self.intervals, feeds['intervals'].advance(rows['intervals']))
+        self.race_control.extend(feeds['race_control'].advance(rows['race_control']))
+        self.pit_stops.extend(feeds['pit'].advance(rows['pit']))
+        self._fold_stints(rows['stints'])
+        if 'drivers' in rows:
+            self._fold_drivers(rows['drivers'])
+        for drv, feed in self._car_feeds.items():
+            self.telemetry.extend(drv, feed.advance(rows.get(('car', drv), [])))
+
+        self.latest_date = max(
+            (f.cursor for f in feeds.values() if f.cursor), default=self.latest_date
+        )
+
+        return {
+            'positions':    sorted(self.positions.values(), key=lambda x: x.get('position', 99)),
+            'intervals':    {
+                drv: {'gap_to_leader': e.get('gap_to_leader'), 'interval': e.get('interval')}
+                for drv, e in self.intervals.items()
+            },
+            'stints':       {
+                drv: {
+                    'compound': s.get('compound'),
+                    'tyre_age': s.get('tyre_age_at_start', 0),
+                    'stint_no': s.get('stint_number'),
+                }
+                for drv, s in self.stints.items()
+            },
+            # Lists are copied so a published snapshot never changes under readers
+            'race_control': list(self.race_control),
+            'pit_stops':    list(self.pit_stops),
+            'drivers_meta': dict(self.drivers_meta),
+            'car':          {
+                drv: latest for drv in self._car_feeds
+                if (latest := self.telemetry.latest(drv)) is not None
+            },
+        }
+
+    def stats(self) -> dict:
+        feeds = dict(self._feeds, **{f'car_data/{d}': f for d, f in self._car_feeds.items()})
+        return {
+            'session_key': self.session_key,
+            'resets':      self.resets,
+            'telemetry':   self.telemetry.stats(),
+            'feeds': {
+                name: {'cursor': f.cursor, 'last_rows': f.last_rows, 'total_rows': f.total_rows,
+                       'repeated_rows': f.repeated_rows}
+                for name, f in feeds.items()
+            },
+        }
+
+    # ── Undated feeds ─────────────────────────────────────────────────────────
+
+    def _stints_url(self, session_key):
+        url = f'{self._base}/stints?session_key={session_key}'
+        if self.stints:
+            # Everyone's current stint and anything after it
+            lowest = min(s.get('stint_number', 1) for s in self.stints.values())
+            url += f'&stint_number>={lowest}'
+        return url
+
+    def _fold_stints(self, rows):
+        for entry in rows:
+            if not isinstance(entry, dict) or entry.get('driver_number') is None:
+                continue
+            drv  = entry['driver_number']
+            prev = self.stints.get(drv)
+            if prev is None or entry.get('stint_number', 0) >= prev.get('stint_number', 0):
+                self.stints[drv] = entry
+
+    def _drivers_due(self):
+        return not self.drivers_meta or time.monotonic() - self._drivers_at >= DRIVERS_REFRESH_S
+
+    def _fold_drivers(self, rows):
+        meta = {}
+        for d in rows:
+            if isinstance(d, dict):
+                meta[str(d.get('driver_number', ''))] = {
+                    'code': d.get('name_acronym', '???'),
+                    'team': d.get('team_name', 'Unknown'),
+                }
+        if meta:
+            self.drivers_meta = meta
+            self._drivers_at  = time.monotonic()
+
+
+def _fold_latest(latest, rows):
+    """Keep the newest row per driver — O(len(rows))."""
+    for entry in rows:
+        drv = entry.get('driver_number')
+        if drv is None:
+            continue
+        if drv not in latest or entry.get('date', '') >= latest[drv].get('date', ''):
+            latest[drv] = entry
+
+
+def _shift_iso(date_str, seconds):
+    """ISO timestamp moved by `seconds`, or None if there is none / it won't parse."""
+    if not date_str:
+        return None
+    try:
+        return (datetime.fromisoformat(date_str) + timedelta(seconds=seconds)).isoformat()
+    except ValueError:
+        return None
@@ -0,0 +1,303 @@
+"""
+openf1_log.py — On-disk OpenF1 session logs and the stand-in server that replays them.
+
+The live code paths only run against api.openf1.org during a race weekend.
+This module lets them run anywhere: a session is captured once into a
+compact log (recorded from OpenF1, or synthesized from *_processed.json by
+openf1_standin.py) and served back by a local HTTP server that answers the
+same /v1/<endpoint> queries FastF1Service and LiveStore make. Point the app
+at it with the OPENF1_BASE environment variable:
+
+    python openf1_standin.py serve fastf1_cache/openf1_logs/2024_R10.jsonl.gz --speed 10
+    OPENF1_BASE=http://127.0.0.1:8765/v1 python run.py
+
+Log format — gzip'd JSON lines:
+
+    {"format": "openf1-log", "version": 1, "session_key": 9158,
+     "start": "2024-06-23T13:00:00+00:00", "source": "...", "created": "..."}
+    {"e": "position", "rows": [...]}                 dated rows, any number of lines
+    {"e": "stints", "t": 412.0, "rows": [...]}       full snapshot, visible from t
+
+Dated endpoints (position, intervals, race_control, pit, car_data) are
+append-only logs in OpenF1 too, so each row becomes visible at its own
+`date`. Undated ones (sessions, drivers, stints) change in place and are
+stored as snapshots, each visible from `t` seconds after `start`.
+
+Replay: session time runs from --start seconds at --speed × wall clock.
+A query sees dated rows with date <= now and the newest snapshot with
+t <= now. Filters work like OpenF1's: field=value, field>value, >=, <, <=
+(e.g. date>2024-06-23T13:05:00, stint_number>=2, driver_number=44).
+`session_key` must match the log or be `latest`; `year` is ignored so the
+replayed session is always "the current one" to the live code.
+"""
+
+import gzip
+import json
+import re
+import time
+import threading
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import unquote, urlsplit
+
+LOG_FORMAT  = 'openf1-log'
+LOG_VERSION = 1
+
+DATED_ENDPOINTS    = ('position', 'intervals', 'race_control', 'pit', 'car_data')
+SNAPSHOT_ENDPOINTS = ('sessions', 'drivers', 'stints')
+
+IGNORED_FILTERS = {'year', 'meeting_key'}
+
+_FILTER = re.compile(r'^([a-z_]+)(>=|<=|>|<|=)(.*)$')
+
+
+# ── Writing ───────────────────────────────────────────────────────────────────
+
+class LogWriter:
+    """Append-only writer: `with LogWriter(path, session_key, start) as log: ...`"""
+
+    def __init__(self, path, session_key, start: datetime, source=''):
+        self.path  = path
+        self.start = start
+        self.rows  = 0
+        self._fh   = gzip.open(path, 'wt', encoding='utf-8')
+        self._line({
+            'format':      LOG_FORMAT,
+            'version':     LOG_VERSION,
+            'session_key': session_key,
+            'start':       start.isoformat(),
+            'source':      source,
+            'created':     datetime.now(timezone.utc).isoformat(),
+        })
+
+    def dated(self, endpoint, rows):
+        """Rows that carry their own `date`."""
+        rows = [r for r in rows if isinstance(r, dict) and r.get('date')]
+        if rows:
+            self._line({'e': endpoint, 'rows': rows})
+            self.rows += len(rows)
+
+    def snapshot(self, endpoint, t: float, rows):
+        """The full response of an undated endpoint as of `t` seconds after start."""
+        self._line({'e': endpoint, 't': round(t, 3), 'rows': list(rows)})
+        self.rows += len(rows)
+
+    def close(self):
+        self._fh.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def _line(self, obj):
+        self._fh.write(json.dumps(obj, separators=(',', ':')) + '\n')
+
+
+# ── Reading / querying ────────────────────────────────────────────────────────
+
+class OpenF1Log:
+    """A loaded log, indexed for time-bounded queries."""
+
+    def __init__(self, header, dated, snapshots):
+        self.header      = header
+        self.session_key = header['session_key']
+        self.start_ts    = parse_ts(header['start'])
+        self._dated      = {}   # endpoint -> (sorted epoch times, rows in the same order)
+        for endpoint, rows in dated.items():
+            keyed = sorted(((parse_ts(r['date']), r) for r in rows), key=lambda x: x[0])
+            self._dated[endpoint] = ([ts for ts, _ in keyed], [r for _, r in keyed])
+        self._snapshots = {ep: sorted(snaps, key=lambda s: s[0]) for ep, snaps in snapshots.items()}
+
+    @property
+    def duration_s(self):
+        last = [times[-1] for times, _ in self._dated.values() if times]
+        return max(last) - self.start_ts if last else 0.0
+
+    def counts(self) -> dict:
+        out = {ep: len(rows) for ep, (_, rows) in self._dated.items()}
+        out.update({ep: len(snaps) for ep, snaps in self._snapshots.items()})
+        return out
+
+    def query(self, endpoint, filters, now_ts):
+        """Rows of `endpoint` visible at `now_ts` that pass the (field, op, value) filters."""
+        filters = [f for f in filters if f[0] not in IGNORED_FILTERS]
+        for field, op, value in filters:
+            if field == 'session_key':
+                if value != 'latest' and _coerce(value) != self.session_key:
+                    return []
+        filters = [f for f in filters if f[0] != 'session_key']
+
+        if endpoint in self._dated:
+            times, rows = self._dated[endpoint]
+            lo, hi = 0, bisect_right(times, now_ts)
+            rest = []
+            for field, op, value in filters:
+                if field != 'date':
+                    rest.append((field, op, value))
+                    continue
+                ts = parse_ts(value)
+                if ts is None:
+                    continue
+                if op == '>':
+                    lo = max(lo, bisect_right(times, ts))
+                elif op == '>=':
+                    lo = max(lo, bisect_left(times, ts))
+                elif op == '<':
+                    hi = min(hi, bisect_left(times, ts))
+                elif op == '<=':
+                    hi = min(hi, bisect_right(times, ts))
+            candidates = rows[lo:hi]
+            filters = rest
+        elif endpoint in self._snapshots:
+            elapsed = now_ts - self.start_ts
+            snaps   = self._snapshots[endpoint]
+            idx     = bisect_right([t for t, _ in snaps], elapsed) - 1
+            candidates = snaps[idx][1] if idx >= 0 else []
+        else:
+            return []
+
+        if not filters:
+            return list(candidates)
+        return [r for r in candidates if all(_match(r, f) for f in filters)]
+
+
+def read_log(path) -> OpenF1Log:
+    dated, snapshots, header = {}, {}, None
+    with gzip.open(path, 'rt', encoding='utf-8') as fh:
+        for line in fh:
+            obj = json.loads(line)
+            if header is None:
+                if obj.get('format') != LOG_FORMAT:
+                    raise ValueError(f'{path}: not an {LOG_FORMAT} file')
+                header = obj
+            elif 't' in obj:
+                snapshots.setdefault(obj['e'], []).append((obj['t'], obj['rows']))
+            else:
+                dated.setdefault(obj['e'], []).extend(obj['rows'])
+    if header is None:
+        raise ValueError(f'{path}: empty log')
+    return OpenF1Log(header, dated, snapshots)
+
+
+def parse_filters(query: str):
+    """OpenF1-style query string → [(field, op, value)]; accepts raw or %-encoded operators."""
+    filters = []
+    for part in query.split('&'):
+        match = _FILTER.match(unquote(part))
+        if match:
+            filters.append(match.groups())
+    return filters
+
+
+def parse_ts(value):
+    """ISO timestamp → epoch seconds (naive means UTC), or None."""
+    if not value:
+        return None
+    try:
+        parsed = datetime.fromisoformat(value)
+    except (TypeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return parsed.timestamp()
+
+
+def _coerce(value):
+    try:
+        return int(value)
+    except ValueError:
+        try:
+            return float(value)
+        except ValueError:
+            return value
+
+
+def _match(row, flt):
+    field, op, value = flt
+    have = row.get(field)
+    if have is None:
+        return False
+    want = _coerce(value) if isinstance(have, (int, float)) else value
+    try:
+        if op == '=':
+            return have == want
+        if op == '>':
+            return have > want
+        if op == '>=':
+            return have >= want
+        if op == '<':
+            return have < want
+        return have <= want
+    except TypeError:
+        return False
+
+
+# ── Stand-in server ───────────────────────────────────────────────────────────
+
+class ReplayClock:
+    """Session time = start + (wall time since creation) × speed."""
+
+    def __init__(self, start_ts: float, offset_s: float = 0.0, speed: float = 1.0):
+        self.start_ts = start_ts
+        self.offset_s = offset_s
+        self.speed    = speed
+        self._t0      = time.monotonic()
+
+    def elapsed(self) -> float:
+        return self.offset_s + (time.monotonic() - self._t0) * self.speed
+
+    def now_ts(self) -> float:
+        return self.start_ts + self.elapsed()
+
+
+class _Handler(BaseHTTPRequestHandler):
+    server_version = 'OpenF1StandIn/1.0'
+    protocol_version = 'HTTP/1.1'
+
+    def do_GET(self):
+        url   = urlsplit(self.path)
+        parts = [p for p in url.path.split('/') if p]
+        log, clock = self.server.log, self.server.clock
+
+        if parts == ['_replay']:
+            return self._json({
+                'session_key': log.session_key,
+                'elapsed_s':   round(clock.elapsed(), 1),
+                'duration_s':  round(log.duration_s, 1),
+                'speed':       clock.speed,
+                'now':         datetime.fromtimestamp(clock.now_ts(), timezone.utc).isoformat(),
+                'requests':    self.server.requests,
+                'rows':        log.counts(),
+            })
+        if len(parts) != 2 or parts[0] != 'v1':
+            return self._json({'error': 'Not found'}, status=404)
+
+        with self.server.lock:
+            self.server.requests += 1
+        rows = log.query(parts[1], parse_filters(url.query), clock.now_ts())
+        self._json(rows)
+
+    def _json(self, payload, status=200):
+        body = json.dumps(payload).encode()
+        self.send_response(status)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def make_server(log: OpenF1Log, host='127.0.0.1', port=8765, speed=1.0, offset_s=0.0):
+    """A ThreadingHTTPServer replaying `log`; call serve_forever() on it."""
+    server = ThreadingHTTPServer((host, port), _Handler)
+    server.daemon_threads = True
+    server.log      = log
+    server.clock    = ReplayClock(log.start_ts, offset_s, speed)
+    server.requests = 0
+    server.lock     = threading.Lock()
+    return server
@@ -0,0 +1,201 @@
+"""
+race_cache.py — In-process LRU of parsed race artifacts.
+
+Every replay, simulate and scoring call used to json.load the whole
+*_processed.json on each request. This module keeps the parsed dicts in
+memory, keyed by (year, round), and re-reads a file only when its mtime or
+size changes on disk (e.g. after warm_cache.py rewrote it).
+
+Budget is approximate and driven by the size of the file on disk:
+a parsed race dict costs roughly PARSED_SIZE_FACTOR × its JSON size.
+
+Environment:
+    RACE_CACHE_MAX_MB        approximate memory budget (default 48)
+    RACE_CACHE_MAX_ENTRIES   hard cap on cached races (default 16)
+
+Cached dicts are shared between threads — callers must treat them as
+read-only.
+
+source_fingerprint() is for derived files (lap index, columns, sim frames)
+that must notice their *_processed.json changing. They record its size and
+content hash rather than its mtime: a deploy is a git checkout, which gives
+every file a new mtime.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from collections import OrderedDict
+
+from app.services.session_cache import KeyedLocks
+
+RACE_CACHE_MAX_MB      = float(os.getenv('RACE_CACHE_MAX_MB', '48'))
+RACE_CACHE_MAX_ENTRIES = int(os.getenv('RACE_CACHE_MAX_ENTRIES', '16'))
+
+# Parsed JSON (dicts, lists, small ints, interned keys) measured at ~2× the
+# indent=2 file size on CPython 3.11. Rounded up to stay on the safe side.
+PARSED_SIZE_FACTOR = 2.5
+
+
+class RaceCache:
+    """Bounded, thread-safe LRU of parsed race files."""
+
+    def __init__(self, max_bytes: int, max_entries: int):
+        self.max_bytes   = max_bytes
+        self.max_entries = max_entries
+        self._entries    = OrderedDict()   # key -> (mtime_ns, size, approx_bytes, data)
+        self._bytes      = 0
+        self._lock       = threading.Lock()
+        self._load_locks = KeyedLocks()    # one thread parses per race; dropped when idle
+        self.hits          = 0
+        self.misses        = 0
+        self.evictions     = 0
+        self.invalidations = 0
+
+    def get(self, key, path, loader=None):
+        """
+        Return the parsed artifact at `path`, cached under `key`.
+
+        `loader(path)` parses the file; defaults to json.load. Returns None if
+        the file does not exist.
+        """
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            self.invalidate(key)
+            return None
+
+        data = self._lookup(key, st)
+        if data is not None:
+            return data
+
+        with self._load_locks.hold(key):
+            # Another thread may have parsed it while we waited
+            data = self._lookup(key, st, count=False)
+            if data is not None:
+                return data
+
+            data = loader(path) if loader else _load_json(path)
+            self._store(key, st, data)
+            return data
+
+    def peek(self, key, path):
+        """Return the cached artifact only if it is already in memory and fresh."""
+        try:
+            st = os.stat(path)
+        except FileNotFoundError:
+            return None
+
+        data = self._lookup(key, st, count=False)
+        if data is not None:
+            with self._lock:
+                self.hits += 1
+        return data
+
+    def invalidate(self, key):
+        """Drop a single race, e.g. after rewriting its file."""
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._bytes -= entry[2]
+                self.invalidations += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries':       len(self._entries),
+                'approx_mb':     round(self._bytes / (1024 * 1024), 1),
+                'max_mb':        round(self.max_bytes / (1024 * 1024), 1),
+                'max_entries':   self.max_entries,
+                'hits':          self.hits,
+                'misses':        self.misses,
+                'evictions':     self.evictions,
+                'invalidations': self.invalidations,
+                'load_locks':    len(self._load_locks),
+                'keys':          [f"{y}_R{r}" for (y, r) in self._entries.keys()],
+            }
+
+    # ── internals ─────────────────────────────────────────────────────────────
+
+    def _lookup(self, key, st, count=True):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] == st.st_mtime_ns and entry[1] == st.st_size:
+                self._entries.move_to_end(key)
+                if count:
+                    self.hits += 1
+                return entry[3]
+
+            if entry:
+                # File changed on disk — stale
+                self._entries.pop(key)
+                self._bytes -= entry[2]
+                self.invalidations += 1
+            if count:
+                self.misses += 1
+            return None
+
+    def _store(self, key, st, data):
+        approx = int(st.st_size * PARSED_SIZE_FACTOR)
+        if approx > self.max_bytes:
+            return   # Bigger than the whole budget — serve it, don't keep it
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old[2]
+
+            self._entries[key] = (st.st_mtime_ns, st.st_size, approx, data)
+            self._bytes += approx
+
+            while self._entries and (
+                self._bytes > self.max_bytes or len(self._entries) > self.max_entries
+            ):
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[2]
+                self.evictions += 1
+
+
+# ── Source fingerprints ───────────────────────────────────────────────────────
+
+_fingerprints     = {}   # str(path) -> (mtime_ns, size, digest)
+_fingerprint_lock = threading.Lock()
+
+
+def source_fingerprint(path):
+    """
+    (size, blake2b hex digest) of a file's content. Each version of a file
+    (mtime + size) is hashed once per process. Raises OSError if missing.
+    """
+    st  = os.stat(path)
+    key = str(path)
+    with _fingerprint_lock:
+        cached = _fingerprints.get(key)
+    if cached and cached[:2] == (st.st_mtime_ns, st.st_size):
+        return st.st_size, cached[2]
+
+    h = hashlib.blake2b(digest_size=16)
+    with open(path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            h.update(block)
+    digest = h.hexdigest()
+    with _fingerprint_lock:
+        _fingerprints[key] = (st.st_mtime_ns, st.st_size, digest)
+    return st.st_size, digest
+
+
+def _load_json(path):
+    with open(path, 'r') as f:
+        return json.load(f)
+
+
+race_cache = RaceCache(
+    max_bytes=int(RACE_CACHE_MAX_MB * 1024 * 1024),
+    max_entries=RACE_CACHE_MAX_ENTRIES,
+)
@@ -0,0 +1,318 @@
+"""
+race_columns.py — Compact columnar race artifact, memory-mapped with NumPy.
+
+*_processed.json repeats every key ('compound', 'tire_life', ...) once per
+driver per lap and is written with indent=2. This format stores the same
+information as typed column arrays in a single file:
+
+    {year}_R{round}_columns.bin
+
+    magic (8 bytes) | header length (uint32) | JSON header | padded column blocks
+
+The header holds race metadata, the entrant table (driver code + team), the
+compound names, and dtype/offset/count for each column. Rows are ordered by
+lap, then by position within the lap (same order as the JSON driver lists);
+`lap_start` gives the first row of every lap so a lap is a plain slice.
+
+Columns are opened with np.memmap, so every worker process shares the same
+pages through the OS page cache instead of holding its own parsed copy.
+The JSON shape the API serves is rebuilt on demand by lap_dict(); a whole
+race is served as race_view(), whose laps (ColumnarLaps) are decoded one at
+a time as callers reach them and never kept. race_json_chunks() streams it
+as JSON the same way. JSON stays the fallback whenever this file is missing or was
+built from a different version of the processed JSON (size or content hash,
+see race_cache.source_fingerprint).
+"""
+
+import json
+import os
+import struct
+from collections.abc import Sequence
+
+import numpy as np
+
+from app.services.race_cache import RaceCache, source_fingerprint
+
+MAGIC   = b'PLRACE01'
+ALIGN   = 8
+
+# Sentinels for nullable columns
+NO_POSITION = 0
+NO_TIME     = -1
+GAP_LEADER  = -1
+GAP_NONE    = -2
+NO_SPEED    = -1
+
+PIT_OUT = 1
+PIT_IN  = 2
+
+COLUMNS = (
+    ('lap_number',  '<i2'),
+    ('driver',      '<u2'),   # index into header['entrants']
+    ('position',    '<i2'),
+    ('lap_time_ms', '<i4'),
+    ('compound',    '<u1'),   # index into header['compounds']
+    ('tire_life',   '<i2'),
+    ('pit_flags',   '<u1'),
+    ('gap_ms',      '<i4'),
+    ('avg_speed',   '<i2'),   # tenths of km/h
+    ('max_speed',   '<i2'),   # tenths of km/h
+)
+
+META_FIELDS = ('year', 'round', 'name', 'circuit', 'date', 'total_laps')
+
+
+def columns_path(processed_dir, year, race_round):
+    return processed_dir / f"{year}_R{race_round}_columns.bin"
+
+
+# ── Encoding ──────────────────────────────────────────────────────────────────
+
+def _encode_lap_time(value):
+    """'0 days 00:01:23.648000' → 83648"""
+    if value is None:
+        return NO_TIME
+    days, clock = value.split(' days ')
+    hms, _, frac = clock.partition('.')
+    h, m, s = (int(x) for x in hms.split(':'))
+    micros = int(frac) if frac else 0
+    if micros % 1000:
+        raise ValueError(f'Sub-millisecond lap time not representable: {value!r}')
+    return ((int(days) * 24 + h) * 60 + m) * 60_000 + s * 1000 + micros // 1000
+
+
+def _decode_lap_time(ms):
+    """Inverse of _encode_lap_time — matches str(pd.Timedelta) exactly."""
+    if ms == NO_TIME:
+        return None
+    days, rem = divmod(ms, 86_400_000)
+    h, rem    = divmod(rem, 3_600_000)
+    m, rem    = divmod(rem, 60_000)
+    s, millis = divmod(rem, 1000)
+    text = f"{days} days {h:02d}:{m:02d}:{s:02d}"
+    return f"{text}.{millis * 1000:06d}" if millis else text
+
+
+def _encode_gap(value):
+    if value is None:
+        return GAP_NONE
+    if value == 'LEADER':
+        return GAP_LEADER
+    return int(round(float(value[1:-1]) * 1000))
+
+
+def _decode_gap(ms):
+    if ms == GAP_NONE:
+        return None
+    if ms == GAP_LEADER:
+        return 'LEADER'
+    return f"+{ms / 1000:.3f}s"
+
+
+def _encode_speed(value):
+    return NO_SPEED if value is None else int(round(value * 10))
+
+
+def _decode_speed(tenths):
+    return None if tenths == NO_SPEED else tenths / 10
+
+
+def write_columnar(processed_dir, year, race_round, race_data, source_size, source_hash):
+    """
+    Encode a processed race dict into the columnar file (temp file + rename).
+    Raises ValueError if the race can't be represented losslessly.
+    """
+    entrants, entrant_index = [], {}
+    compounds, compound_index = [], {}
+    rows = {name: [] for name, _ in COLUMNS}
+    lap_start = [0]
+
+    for lap in race_data.get('laps', []):
+        for d in lap['drivers']:
+            entrant = (d['driver'], d['team'])
+            if entrant not in entrant_index:
+                entrant_index[entrant] = len(entrants)
+                entrants.append(list(entrant))
+            if d['compound'] not in compound_index:
+                compound_index[d['compound']] = len(compounds)
+                compounds.append(d['compound'])
+            if d.get('distance', 0) != 0:
+                raise ValueError('Non-zero distance is not stored in the columnar format')
+
+            rows['lap_number'].append(lap['lap_number'])
+            rows['driver'].append(entrant_index[entrant])
+            rows['position'].append(d['position'] if d['position'] is not None else NO_POSITION)
+            rows['lap_time_ms'].append(_encode_lap_time(d['lap_time']))
+            rows['compound'].append(compound_index[d['compound']])
+            rows['tire_life'].append(d['tire_life'])
+            rows['pit_flags'].append((PIT_OUT if d['pit_out'] else 0) | (PIT_IN if d['pit_in'] else 0))
+            rows['gap_ms'].append(_encode_gap(d['gap']))
+            rows['avg_speed'].append(_encode_speed(d['avg_speed']))
+            rows['max_speed'].append(_encode_speed(d['max_speed']))
+        lap_start.append(len(rows['lap_number']))
+
+    blocks = [('lap_start', np.asarray(lap_start, dtype='<i4'))]
+    blocks += [(name, np.asarray(rows[name], dtype=dtype)) for name, dtype in COLUMNS]
+
+    header = {field: race_data.get(field) for field in META_FIELDS}
+    header.update({
+        'lap_count':       len(lap_start) - 1,
+        'row_count':       len(rows['lap_number']),
+        'source_size':     source_size,
+        'source_hash':     source_hash,
+        'entrants':        entrants,
+        'compounds':       compounds,
+        'columns':         {},
+    })
+
+    # Column offsets are stored in the header, so the header size feeds back
+    # into the offsets. Reserve space and grow it until the header fits.
+    reserved = 0
+    while True:
+        offset = _align(len(MAGIC) + 4 + reserved)
+        for name, arr in blocks:
+            header['columns'][name] = {'dtype': arr.dtype.str, 'offset': offset, 'count': len(arr)}
+            offset = _align(offset + arr.nbytes)
+        header_bytes = json.dumps(header, separators=(',', ':')).encode('utf-8')
+        if len(header_bytes) <= reserved:
+            break
+        reserved = len(header_bytes) + 64
+
+    path = columns_path(processed_dir, year, race_round)
+    tmp  = path.with_suffix('.bin.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(MAGIC)
+        f.write(struct.pack('<I', len(header_bytes)))
+        f.write(header_bytes)
+        for name, arr in blocks:
+            f.write(b'\0' * (header['columns'][name]['offset'] - f.tell()))
+            f.write(arr.tobytes())
+    os.replace(tmp, path)
+    return path
+
+
+def _align(n):
+    return (n + ALIGN - 1) // ALIGN * ALIGN
+
+
+# ── Decoding ──────────────────────────────────────────────────────────────────
+
+class ColumnarRace:
+    """Read-only view over a memory-mapped columnar race file."""
+
+    def __init__(self, path):
+        self._mm = np.memmap(path, dtype=np.uint8, mode='r')
+        if bytes(self._mm[:len(MAGIC)]) != MAGIC:
+            raise ValueError(f'{path} is not a columnar race file')
+
+        (header_len,) = struct.unpack('<I', bytes(self._mm[len(MAGIC):len(MAGIC) + 4]))
+        start = len(MAGIC) + 4
+        self.header = json.loads(bytes(self._mm[start:start + header_len]))
+
+        self.columns = {
+            name: np.frombuffer(self._mm, dtype=spec['dtype'], count=spec['count'], offset=spec['offset'])
+            for name, spec in self.header['columns'].items()
+        }
+        self.meta = {field: self.header.get(field) for field in META_FIELDS}
+        self.meta['lap_count'] = self.header['lap_count']
+
+    def lap_dict(self, lap_number):
+        """One lap in the *_processed.json shape, or None if out of range."""
+        if lap_number < 1 or lap_number > self.header['lap_count']:
+            return None
+
+        lo, hi = self.columns['lap_start'][lap_number - 1:lap_number + 1]
+        entrants  = self.header['entrants']
+        compounds = self.header['compounds']
+        c = {name: self.columns[name][lo:hi].tolist() for name, _ in COLUMNS}
+
+        drivers = []
+        for i in range(hi - lo):
+            code, team = entrants[c['driver'][i]]
+            flags = c['pit_flags'][i]
+            drivers.append({
+                'driver':    code,
+                'team':      team,
+                'position':  c['position'][i] if c['position'][i] != NO_POSITION else None,
+                'lap_time':  _decode_lap_time(c['lap_time_ms'][i]),
+                'compound':  compounds[c['compound'][i]],
+                'tire_life': c['tire_life'][i],
+                'pit_out':   bool(flags & PIT_OUT),
+                'pit_in':    bool(flags & PIT_IN),
+                'distance':  0,
+                'avg_speed': _decode_speed(c['avg_speed'][i]),
+                'max_speed': _decode_speed(c['max_speed'][i]),
+                'gap':       _decode_gap(c['gap_ms'][i]),
+            })
+
+        return {'lap_number': lap_number, 'drivers': drivers}
+
+    def race_view(self):
+        """The race in the *_processed.json shape, laps decoded on access (read-only)."""
+        race = dict(self.meta)
+        race.pop('lap_count')
+        race['laps'] = ColumnarLaps(self)
+        return race
+
+    def race_dict(self):
+        """The full race in the *_processed.json shape, every lap decoded up front."""
+        race = self.race_view()
+        race['laps'] = list(race['laps'])
+        return race
+
+
+class ColumnarLaps(Sequence):
+    """A race's laps as a sequence of lap dicts, each decoded when it is read."""
+
+    __slots__ = ('_race',)
+
+    def __init__(self, race):
+        self._race = race
+
+    def __len__(self):
+        return self._race.header['lap_count']
+
+    def __getitem__(self, i):
+        if isinstance(i, slice):
+            return [self[j] for j in range(*i.indices(len(self)))]
+        n = len(self)
+        if i < 0:
+            i += n
+        if not 0 <= i < n:
+            raise IndexError('lap index out of range')
+        return self._race.lap_dict(i + 1)
+
+
+def race_json_chunks(race):
+    """A race dict as JSON bytes, one lap per chunk — for streaming a race_view()."""
+    meta = {k: v for k, v in race.items() if k != 'laps'}
+    head = json.dumps(meta, separators=(',', ':'))[:-1]
+    yield (head + (',' if meta else '') + '"laps":[').encode('utf-8')
+    for i, lap in enumerate(race['laps']):
+        yield (b',' if i else b'') + json.dumps(lap, separators=(',', ':')).encode('utf-8')
+    yield b']}'
+
+
+# Mapped files cost page cache, not heap — the budget only covers the headers
+_columnar_cache = RaceCache(max_bytes=64 * 1024 * 1024, max_entries=256)
+
+
+def load_columnar(processed_dir, year, race_round):
+    """
+    Memory-mapped ColumnarRace for a race, or None if there is no columnar
+    file or it was built from a different *_processed.json than the one on disk.
+    """
+    path = columns_path(processed_dir, year, race_round)
+    race = _columnar_cache.get((year, race_round), path, loader=ColumnarRace)
+    if race is None:
+        return None
+
+    json_path = processed_dir / f"{year}_R{race_round}_processed.json"
+    try:
+        if source_fingerprint(json_path) != (race.header['source_size'], race.header.get('source_hash')):
+            return None
+    except FileNotFoundError:
+        pass   # Columnar-only deploy — nothing to be stale against
+
+    return race
+
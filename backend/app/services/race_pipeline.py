@@ -0,0 +1,179 @@
+"""
+race_pipeline.py — Everything the API serves for a race, from ONE FastF1 load.
+
+Before this, one race went through FastF1 up to three times:
+get_circuit_data loaded it with telemetry, load_race_session loaded it again
+without, and get_driver_lap_telemetry loaded a fresh session on every miss.
+FastF1Service.build_race_artifacts() loads the session once with telemetry
+and hands it to the extractors below, which write:
+
+    {year}_R{round}_processed.json   lap-by-lap replay data (+ lap index, columnar)
+    {year}_R{round}_circuit.json     track coordinates
+    {year}_R{round}_weather.json     weather timeline
+    {year}_R{round}_summary.json     name, date, winner, podium
+    {year}_R{round}_speeds.json      avg/max speed per driver per lap
+
+Extractors are plain functions of a loaded session so the on-demand paths in
+FastF1Service can reuse them.
+"""
+
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+from app.services.lap_builder import build_laps
+
+ARTIFACTS = ('processed', 'circuit', 'weather', 'summary', 'speeds')
+
+# Only these need session.load(telemetry=True)
+TELEMETRY_ARTIFACTS = ('circuit', 'speeds')
+
+
+def artifact_paths(processed_dir, year, race_round) -> dict:
+    """{artifact name: path} for one race."""
+    return {name: processed_dir / f"{year}_R{race_round}_{name}.json" for name in ARTIFACTS}
+
+
+def write_json_atomic(path, data, **dump_kwargs):
+    """Temp file + rename so readers never see a partial file."""
+    tmp = path.with_suffix('.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(data, f, **dump_kwargs)
+    os.replace(tmp, path)
+
+
+# ── Extractors ────────────────────────────────────────────────────────────────
+
+def extract_race_data(session, year, race_round) -> dict:
+    """Lap-by-lap replay data in the *_processed.json shape."""
+    race_data = {
+        'year':       year,
+        'round':      race_round,
+        'name':       session.event['EventName'],
+        'circuit':    session.event['Location'],
+        'date':       session.event['EventDate'].isoformat(),
+        'total_laps': int(session.total_laps) if hasattr(session, 'total_laps') else 0,
+        'laps':       []
+    }
+    race_data['laps'] = build_laps(session.laps, race_data['total_laps'])
+    return race_data
+
+
+def extract_circuit(session):
+    """
+    Track outline from the first valid lap's telemetry.
+    Requires the session to be loaded with telemetry=True.
+    """
+    laps = session.laps
+    valid_laps = laps[laps['LapTime'].notna()]
+    if valid_laps.empty:
+        return None
+
+    telemetry = valid_laps.iloc[0].get_telemetry()
+
+    coords = []
+    for _, point in telemetry.iterrows():
+        if pd.notna(point['X']) and pd.notna(point['Y']):
+            coords.append({
+                'x':        float(point['X']),
+                'y':        float(point['Y']),
+                'distance': float(point['Distance']) if pd.notna(point['Distance']) else 0
+            })
+
+    if not coords:
+        return None
+
+    return {
+        'coordinates':    coords,
+        'total_distance': max(c['distance'] for c in coords),
+        'name':           session.event['EventName']
+    }
+
+
+def weather_sample(row) -> dict:
+    """One weather_data row in the /replay/weather response shape."""
+    return {
+        'track_temp':     float(row['TrackTemp'])    if pd.notna(row['TrackTemp'])     else None,
+        'air_temp':       float(row['AirTemp'])      if pd.notna(row['AirTemp'])       else None,
+        'humidity':       float(row['Humidity'])     if pd.notna(row['Humidity'])      else None,
+        'wind_speed':     float(row['WindSpeed'])    if pd.notna(row['WindSpeed'])     else None,
+        'wind_direction': int(row['WindDirection'])  if pd.notna(row['WindDirection']) else None,
+        'rainfall':       bool(row['Rainfall'])      if pd.notna(row['Rainfall'])      else False
+    }
+
+
+def extract_weather(session):
+    """
+    Weather timeline: one sample per FastF1 weather reading, each tagged with
+    its session time in seconds. The last sample is what /replay/weather shows.
+    """
+    weather = session.weather_data
+    if weather is None or weather.empty:
+        return None
+
+    samples = []
+    for _, row in weather.iterrows():
+        sample = weather_sample(row)
+        sample['time'] = round(row['Time'].total_seconds(), 3) if pd.notna(row['Time']) else None
+        samples.append(sample)
+
+    return {'samples': samples}
+
+
+def extract_summary(session):
+    """Quick race summary: name, date, winner and podium."""
+    results = session.results
+    return {
+        'name':   session.event['EventName'],
+        'date':   session.event['EventDate'].isoformat(),
+        'winner': results.iloc[0]['Abbreviation'] if len(results) > 0 else None,
+        'podium': [results.iloc[i]['Abbreviation'] for i in range(min(3, len(results)))]
+    }
+
+
+def extract_lap_speeds(session):
+    """
+    {driver_code: {lap_number: {'avg_speed', 'max_speed'}}} from car data.
+
+    Each driver's car_data is sliced by lap start/end session time with one
+    searchsorted, then reduced per lap. This uses the raw car channel rather
+    than the position-merged get_telemetry(), so values can differ from the
+    old on-demand endpoint in the first decimal.
+    """
+    laps   = session.laps
+    speeds = {}
+
+    for driver_number, car in session.car_data.items():
+        if car is None or car.empty or 'Speed' not in car:
+            continue
+
+        drv_laps = laps[
+            (laps['DriverNumber'] == str(driver_number))
+            & laps['LapStartTime'].notna() & laps['Time'].notna()
+        ]
+        if drv_laps.empty:
+            continue
+
+        t     = car['SessionTime'].to_numpy(dtype='timedelta64[ns]').astype('int64')
+        speed = car['Speed'].to_numpy(dtype='float64')
+        start = np.searchsorted(t, drv_laps['LapStartTime'].to_numpy(dtype='timedelta64[ns]').astype('int64'), side='left')
+        end   = np.searchsorted(t, drv_laps['Time'].to_numpy(dtype='timedelta64[ns]').astype('int64'), side='right')
+
+        code = str(drv_laps['Driver'].iloc[0])
+        per_lap = {}
+        for lap_number, lo, hi in zip(drv_laps['LapNumber'].tolist(), start.tolist(), end.tolist()):
+            window = speed[lo:hi]
+            window = window[~np.isnan(window)]
+            if window.size == 0 or pd.isna(lap_number):
+                continue
+            per_lap[str(int(lap_number))] = {
+                'avg_speed': round(float(window.mean()), 1),
+                'max_speed': round(float(window.max()), 1),
+            }
+
+        if per_lap:
+            speeds[code] = per_lap
+
+    return speeds or None
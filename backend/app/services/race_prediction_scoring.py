@@ -20,11 +20,22 @@ Tyre scoring (segment-by-segment):
         match    → +5
         mismatch → -2
         missing or extra segments → 0 contribution
+
+score_predictions_batch() scores a whole chunk at once with NumPy and gives
+exactly the same points as score_positions / score_tyres per prediction.
+
+Pending rows are streamed in keyset chunks with one bulk UPDATE and one commit
+per chunk; an interrupted run resumes where it stopped (see scoring_executor).
 """
 
-import json
-from app.models import db, RacePrediction
+from itertools import chain, repeat
+
+import numpy as np
+
+from app.models import RacePrediction
 from app.services.fastf1_service import fastf1_service
+from app.services.scoring_executor import ScoringPass, run_scoring, SCORING_CHUNK
+from app.services.user_totals import recompute_user_totals, apply_race_prediction_deltas
 
 # Position scoring constants
 SLOT_POINTS = [25, 18, 15, 12, 10, 8, 6, 4, 2, 1]
@@ -167,91 +178,214 @@ def score_tyres(predicted_strategies: dict[str, list[str]],
     return total
 
 
-# ── Aggregate user scoring (mirrors existing pattern) ─────────────────────────
+# ── Scoring many predictions at once (NumPy) ──────────────────────────────────
+#
+# The same rules as above, for a whole chunk of predictions:
+#
+#   orders     → users × 10 matrix of driver indices into actual_order
+#                (the driver's finishing slot; NOT_CLASSIFIED where the driver
+#                isn't in actual_order or the slot was left empty)
+#   strategies → actual stints as a drivers × stints padded compound-code
+#                matrix; the predicted stints of every (prediction, driver)
+#                pair flattened to one compound code per segment and compared
+#                against that driver's row
+#
+# Encoding is one C-level map() of dict lookups over the flattened values;
+# the scoring itself is a few array ops.
+
+NOT_CLASSIFIED = -1
+NO_COMPOUND    = -1   # padding
+OTHER_COMPOUND = -2   # predicted compound that no driver actually ran
+
+# SLOT_VALUES[slot, diff] for diff 0, 1, 2 — same int() truncation as score_positions
+SLOT_VALUES = np.array([[int(v * EXACT_MULT), int(v * ONE_OFF_MULT), int(v * TWO_OFF_MULT)]
+                        for v in SLOT_POINTS], dtype=np.int64)
 
-def update_user_aggregate_scores():
+
+def _ragged(lengths, values, width, fill, dtype):
+    """
+    len(lengths) × width matrix from row-major ragged `values` (row i has
+    lengths[i] of them); values past `width` in a row are dropped, short rows
+    are padded with fill.
+    """
+    if len(lengths) and (lengths == width).all():
+        return values.reshape(len(lengths), width)
+    starts = np.cumsum(lengths) - lengths
+    column = np.arange(int(lengths.sum())) - np.repeat(starts, lengths)
+    keep   = column < width
+    matrix = np.full((len(lengths), width), fill, dtype=dtype)
+    matrix[np.repeat(np.arange(len(lengths)), lengths)[keep], column[keep]] = values[keep]
+    return matrix
+
+
+def _lookup(table, items, default, count, dtype):
+    """np array of table.get(item, default) for every item — the loop runs in C."""
+    return np.fromiter(map(table.get, items, repeat(default)), dtype=dtype, count=count)
+
+
+def _lengths(seqs):
+    return np.fromiter(map(len, seqs), dtype=np.int64, count=len(seqs))
+
+
+def encode_orders(predicted_orders, actual_order) -> np.ndarray:
+    """Predictions × 10 int16 matrix of actual finishing slots (NOT_CLASSIFIED if none)."""
+    slot_of = {code: i for i, code in enumerate(actual_order)}
+    lengths = _lengths(predicted_orders)
+    slots   = _lookup(slot_of, chain.from_iterable(predicted_orders), NOT_CLASSIFIED,
+                      int(lengths.sum()), np.int16)
+    return _ragged(lengths, slots, len(SLOT_POINTS), NOT_CLASSIFIED, np.int16)
+
+
+def batch_position_points(predicted_orders, actual_order) -> np.ndarray:
+    """score_positions() for every prediction, as an int64 array."""
+    actual = encode_orders(predicted_orders, actual_order)
+    slots  = np.arange(len(SLOT_POINTS), dtype=np.int16)
+    diff   = np.abs(actual - slots)
+    hit    = (actual != NOT_CLASSIFIED) & (diff <= 2)
+    points = SLOT_VALUES[slots, np.minimum(diff, 2)]
+    return np.where(hit, points, 0).sum(axis=1)
+
+
+def batch_tyre_points(tyre_strategies, actual_stints) -> np.ndarray:
+    """score_tyres() for every prediction, as an int64 array."""
+    compounds = {}
+    for stints in actual_stints.values():
+        for compound in stints:
+            compounds.setdefault(compound, len(compounds))
+
+    # Actual stints as a drivers × stints matrix, plus an empty row for unknown drivers
+    actual_seqs = list(actual_stints.values()) + [[]]
+    actual_len  = _lengths(actual_seqs)
+    width       = int(actual_len.max())
+    actual      = _ragged(actual_len, _lookup(compounds, chain.from_iterable(actual_seqs), NO_COMPOUND,
+                                              int(actual_len.sum()), np.int16),
+                          width, NO_COMPOUND, np.int16)
+    # score_tyres looks drivers up by code.upper(), so other keys can never match
+    driver_of   = {code: i for i, code in enumerate(actual_stints) if code == code.upper()}
+
+    # Every predicted (prediction, driver) pair, and its stints flattened
+    n         = len(tyre_strategies)
+    codes     = list(chain.from_iterable(tyre_strategies))
+    if not codes or width == 0:
+        return np.zeros(n, dtype=np.int64)
+    drivers   = _lookup(driver_of, codes, -1, len(codes), np.int64)
+    for i in np.flatnonzero(drivers < 0).tolist():   # keys are normally upper case already
+        drivers[i] = driver_of.get(codes[i].upper(), len(actual_seqs) - 1)
+    seqs      = list(chain.from_iterable(map(dict.values, tyre_strategies)))
+    seq_len   = _lengths(seqs)
+    predicted = _lookup(compounds, chain.from_iterable(seqs), OTHER_COMPOUND, int(seq_len.sum()), np.int16)
+
+    # One element per predicted segment: compare with the same driver's actual segment
+    driver    = np.repeat(drivers, seq_len)
+    segment   = np.arange(len(predicted)) - np.repeat(np.cumsum(seq_len) - seq_len, seq_len)
+    compared  = segment < actual_len[driver]
+    same      = predicted == actual[driver, np.minimum(segment, width - 1)]
+    points    = np.where(compared, np.where(same, TYRE_CORRECT, TYRE_WRONG), 0)
+    owner     = np.repeat(np.repeat(np.arange(n), _lengths(tyre_strategies)), seq_len)
+    return np.bincount(owner, weights=points, minlength=n).astype(np.int64)
+
+
+def score_predictions_batch(predicted_orders, tyre_strategies, actual_order, actual_stints):
     """
-    Recomputes User.total_score and User.accuracy_rate to include
-    BOTH the in-race pit-call predictions AND the race predictions.
+    (position_points, tyre_points) int64 arrays for a list of predictions,
+    element for element equal to score_positions() / score_tyres().
+    """
+    return (batch_position_points(predicted_orders, actual_order),
+            batch_tyre_points(tyre_strategies, actual_stints))
+
 
-    accuracy_rate stays based on the in-race game only — race predictions
-    are graded on partial credit so a binary correct/wrong doesn't fit.
-    Race-prediction totals are simply added to total_score.
+# ── Aggregate user scoring ────────────────────────────────────────────────────
+
+def update_user_aggregate_scores(user_ids=None):
+    """
+    Rebuilds User.total_score (in-race pit calls + scored race predictions)
+    and User.accuracy_rate (in-race game only) from full history, for
+    user_ids or every user when None — for reconciliation. Scoring a race
+    applies deltas instead (see user_totals).
     """
-    from app.models import User, Prediction
+    return recompute_user_totals(user_ids)
+
+
+# ── Chunked pass ──────────────────────────────────────────────────────────────
+
+class RacePredictionPass(ScoringPass):
+    """One race's top-10 + tyre predictions: status scored + the three point columns."""
 
-    users = User.query.all()
-    for user in users:
-        # In-race game (unchanged logic from existing scoring_service.py)
-        in_race_preds = [p for p in user.predictions]
-        scored        = [p for p in in_race_preds if p.status in ('correct', 'wrong')]
-        correct       = [p for p in scored if p.status == 'correct']
+    kind        = 'race'
+    table       = RacePrediction.__table__
+    columns     = (table.c.id, table.c.user_id, table.c.predicted_order, table.c.tyre_strategies)
+    result_cols = (('position_points', table.c.position_points.type),
+                   ('tyre_points',     table.c.tyre_points.type),
+                   ('total_points',    table.c.total_points.type))
 
-        in_race_points = sum(p.points_earned for p in in_race_preds)
-        accuracy       = round(len(correct) / len(scored) * 100, 1) if scored else 0.0
+    def __init__(self, year: int, round_num: int, actual_order: list, actual_stints: dict):
+        self.year          = year
+        self.round_num     = round_num
+        self.actual_order  = actual_order
+        self.actual_stints = actual_stints
 
-        # Race predictions (new)
-        race_preds   = RacePrediction.query.filter_by(user_id=user.id, status='scored').all()
-        race_points  = sum(p.total_points for p in race_preds)
+    def pending(self):
+        c = self.table.c
+        return (c.year == self.year) & (c.round_num == self.round_num) & (c.status == 'pending')
 
-        user.total_score   = in_race_points + race_points
-        user.accuracy_rate = accuracy
+    def score(self, row):
+        pos_pts  = score_positions(row.predicted_order, self.actual_order)
+        tyre_pts = score_tyres(row.tyre_strategies or {}, self.actual_stints)
+        return 'scored', pos_pts, tyre_pts, pos_pts + tyre_pts
 
-    db.session.commit()
-    return len(users)
+    def score_chunk(self, rows):
+        pos_pts, tyre_pts = score_predictions_batch(
+            [row.predicted_order for row in rows], [row.tyre_strategies or {} for row in rows],
+            self.actual_order, self.actual_stints)
+        return [('scored', p, t, p + t) for p, t in zip(pos_pts.tolist(), tyre_pts.tolist())]
+
+    def apply_deltas(self, ids) -> int:
+        return apply_race_prediction_deltas(ids)
 
 
 # ── Main entry point ──────────────────────────────────────────────────────────
 
-def score_race_predictions(year: int, round_num: int) -> dict:
+def score_race_predictions(year: int, round_num: int,
+                           chunk_size: int = SCORING_CHUNK, progress=None) -> dict:
     """
-    Score every pending RacePrediction for the given race.
+    Score every pending RacePrediction for the given race, chunk by chunk.
+    progress(stage, percent, detail) is called once per chunk when given,
+    detail holding the running counts (see run_scoring).
     """
-    cache_file = fastf1_service.processed_cache_dir / f"{year}_R{round_num}_processed.json"
-    if not cache_file.exists():
+    race_data = fastf1_service.load_processed_race(year, round_num)
+    if race_data is None:
         return {
             'error': f'Race not cached: {year} R{round_num}. '
                      f'Run warm_cache.py --year {year} --round {round_num} first.'
         }
 
-    with open(cache_file) as f:
-        race_data = json.load(f)
-
     actual_order  = extract_finishing_order(race_data)
     actual_stints = extract_stint_sequences(race_data)
 
     if not actual_order:
         return {'error': 'Could not extract finishing order from cached data.'}
 
-    pending = RacePrediction.query.filter_by(
-        year=year, round_num=round_num, status='pending'
-    ).all()
+    run = run_scoring(RacePredictionPass(year, round_num, actual_order, actual_stints),
+                      year, round_num, chunk_size, progress)
 
-    if not pending:
+    if run.get('already_scored') or not run['total']:
         return {
-            'race':    race_data.get('name'),
-            'message': 'No pending race predictions to score.',
-            'scored':  0,
+            'race':     race_data.get('name'),
+            'message':  'No pending race predictions to score.',
+            'scored':   0,
+            'last_run': run if run.get('already_scored') else None,
         }
 
-    for pred in pending:
-        pos_pts  = score_positions(pred.predicted_order, actual_order)
-        tyre_pts = score_tyres(pred.tyre_strategies, actual_stints)
-
-        pred.position_points = pos_pts
-        pred.tyre_points     = tyre_pts
-        pred.total_points    = pos_pts + tyre_pts
-        pred.status          = 'scored'
-
-    db.session.commit()
-    users_updated = update_user_aggregate_scores()
-
     return {
         'race':           race_data.get('name'),
         'year':           year,
         'round':          round_num,
         'actual_order':   actual_order,
         'actual_stints':  actual_stints,
-        'scored':         len(pending),
-        'users_updated':  users_updated,
-    }
\ No newline at end of file
+        'scored':         run['scored'],
+        'user_updates':   run['user_updates'],
+        'chunks':         run['chunks'],
+        'resumed':        run['resumed'],
+        'elapsed_s':      run['elapsed_s'],
+        'rows_per_s':     run['rows_per_s'],
+    }
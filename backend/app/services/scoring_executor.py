@@ -0,0 +1,215 @@
+"""
+scoring_executor.py — Chunked, resumable scoring passes with bulk writes.
+
+Scoring used to load every pending prediction as an ORM object, mutate each
+one and flush them all in one commit: memory and transaction size grew with
+the backlog. run_scoring() streams instead:
+
+    1. read the next SCORING_CHUNK pending rows by keyset (id > cursor, ORDER BY id)
+       as plain tuples
+    2. score them (the ScoringPass decides how — row by row or the whole chunk)
+    3. write every result with ONE UPDATE ... FROM (VALUES ...) statement,
+       guarded by status = 'pending' and RETURNING the ids it really changed
+    4. apply those rows' user deltas (user_totals)
+    5. advance the checkpoint row in scoring_runs and commit — all of 3–5 together
+
+A pass that dies mid-way leaves a 'running' checkpoint; calling run_scoring
+for the same (kind, race) again resumes after the last committed chunk.
+Rows created after a run started (id > max_id) wait for the next run.
+A finished ('done') checkpoint is never reset: rows at or below its max_id
+that are still pending were skipped by it and would be skipped again, so
+calling run_scoring again only continues it over pending rows past max_id,
+adding to its tallies — or returns it untouched if there are none.
+Because writes only touch rows still pending and deltas only follow the
+ids the UPDATE returned, a chunk is never counted twice — even if two
+passes for the same race overlap.
+
+Each pass reports rows/s for the part it ran.
+
+Environment:
+    SCORING_CHUNK   rows per chunk / transaction (default 2000)
+"""
+
+import os
+import time
+from datetime import datetime
+
+from sqlalchemy import column, func, select, update, values
+
+from app.models import db, ScoringRun
+
+SCORING_CHUNK = int(os.getenv('SCORING_CHUNK', '2000'))
+
+TALLY_FIELDS = ('scored', 'correct', 'wrong', 'skipped')
+
+
+class ScoringPass:
+    """
+    One kind of prediction to score for one race. Subclasses set:
+
+        kind          checkpoint kind ('pit', 'race')
+        table         the predictions Table
+        columns       columns read per row (must include id)
+        result_cols   ((name, type), ...) written back per scored row, besides status
+    """
+
+    kind        = None
+    table       = None
+    columns     = ()
+    result_cols = ()
+
+    def pending(self):
+        """WHERE clause selecting this race's pending rows."""
+        return self.table.c.status == 'pending'
+
+    def score(self, row):
+        """(status, *result values) for one row, or None to leave it pending (skipped)."""
+        raise NotImplementedError
+
+    def score_chunk(self, rows):
+        """score() for every row of a chunk, in order — override to score them in one go."""
+        return [self.score(row) for row in rows]
+
+    def tally(self, status):
+        """Tally field a scored row counts towards besides 'scored' (or None)."""
+        return status if status in ('correct', 'wrong') else None
+
+    def apply_deltas(self, ids) -> int:
+        """Add the just-scored rows to their users' totals (see user_totals)."""
+        raise NotImplementedError
+
+
+def run_scoring(scoring_pass, year, round_num, chunk_size=SCORING_CHUNK, progress=None) -> dict:
+    """
+    Score every pending row of `scoring_pass` for a race, resuming an
+    interrupted run. progress(stage, percent, detail) is called after each
+    chunk with the running counts (see job_queue). Returns the checkpoint
+    as a dict plus 'resumed', 'elapsed_s' and 'rows_per_s' for this call,
+    and 'already_scored' when a finished run was left untouched because
+    nothing is pending.
+    """
+    progress = progress or (lambda stage, percent=None, detail=None: None)
+    table    = scoring_pass.table
+    run, state = _start_run(scoring_pass, year, round_num)
+    if state == 'finished':
+        return {**run.to_dict(), 'resumed': False, 'already_scored': True,
+                'elapsed_s': 0.0, 'rows_per_s': None}
+    resumed = state == 'resumed'
+
+    t0, rows_seen = time.time(), 0
+    while True:
+        rows = db.session.execute(
+            select(*scoring_pass.columns)
+            .where(scoring_pass.pending(), table.c.id > run.last_id, table.c.id <= run.max_id)
+            .order_by(table.c.id)
+            .limit(chunk_size)
+        ).all()
+        if not rows:
+            break
+
+        updates, tally = [], dict.fromkeys(TALLY_FIELDS, 0)
+        for row, result in zip(rows, scoring_pass.score_chunk(rows)):
+            if result is None:
+                tally['skipped'] += 1
+                continue
+            updates.append((row.id,) + tuple(result))
+
+        written = _bulk_update(scoring_pass, updates) if updates else []
+        status_of = {u[0]: u[1] for u in updates}
+        for pred_id in written:
+            tally['scored'] += 1
+            field = scoring_pass.tally(status_of[pred_id])
+            if field:
+                tally[field] += 1
+
+        if written:
+            # Rows changed in users — a user with rows in several chunks counts in each
+            run.user_updates += scoring_pass.apply_deltas(written)
+
+        run.last_id    = rows[-1].id
+        run.processed += len(rows)
+        run.chunks    += 1
+        for field, count in tally.items():
+            setattr(run, field, getattr(run, field) + count)
+        db.session.commit()
+
+        rows_seen += len(rows)
+        rate = rows_seen / max(time.time() - t0, 1e-6)
+        progress(f'scored {run.scored:,} of {run.total:,} ({rate:,.0f} rows/s)',
+                 run.processed * 100 / run.total if run.total else None,
+                 {'processed': run.processed, 'total': run.total, 'scored': run.scored,
+                  'user_updates': run.user_updates, 'rows_per_s': round(rate)})
+
+    run.status      = 'done'
+    run.finished_at = datetime.utcnow()
+    db.session.commit()
+
+    elapsed = time.time() - t0
+    return {
+        **run.to_dict(),
+        'resumed':    resumed,
+        'elapsed_s':  round(elapsed, 2),
+        'rows_per_s': round(rows_seen / elapsed) if elapsed > 0 else None,
+    }
+
+
+def _start_run(scoring_pass, year, round_num):
+    """
+    (checkpoint, state): 'resumed' for an interrupted run, 'finished' for a
+    done run with no new pending rows (returned unchanged), 'continued' for
+    a done run extended over new rows, else 'started'.
+    """
+    run = ScoringRun.query.filter_by(kind=scoring_pass.kind, year=year, round_num=round_num).first()
+    if run is not None and run.status == 'running':
+        print(f"[scoring] resuming {scoring_pass.kind} {year} R{round_num} after id {run.last_id} "
+              f"({run.processed:,}/{run.total:,} done)")
+        return run, 'resumed'
+
+    table   = scoring_pass.table
+    pending = scoring_pass.pending()
+    if run is not None:
+        # Pending rows up to max_id were skipped by the finished run
+        pending = pending & (table.c.id > run.max_id)
+    max_id, total = db.session.execute(
+        select(func.coalesce(func.max(table.c.id), 0), func.count()).where(pending)
+    ).one()
+
+    if run is not None:
+        if not total:
+            return run, 'finished'
+        print(f"[scoring] continuing {scoring_pass.kind} {year} R{round_num} after id {run.max_id} "
+              f"({total:,} new rows)")
+        run.last_id     = run.max_id
+        run.max_id      = max_id
+        run.total      += total
+        run.status      = 'running'
+        run.finished_at = None
+        db.session.commit()
+        return run, 'continued'
+
+    run = ScoringRun(kind=scoring_pass.kind, year=year, round_num=round_num)
+    db.session.add(run)
+    for field in TALLY_FIELDS + ('processed', 'user_updates', 'chunks', 'last_id'):
+        setattr(run, field, 0)
+    run.status      = 'running'
+    run.max_id      = max_id
+    run.total       = total
+    run.started_at  = datetime.utcnow()
+    run.finished_at = None
+    db.session.commit()
+    return run, 'started'
+
+
+def _bulk_update(scoring_pass, updates):
+    """One UPDATE ... FROM (VALUES ...) for a chunk; returns the ids actually changed."""
+    table = scoring_pass.table
+    cols  = [('id', table.c.id.type), ('status', table.c.status.type)] + list(scoring_pass.result_cols)
+    data  = values(*(column(name, type_) for name, type_ in cols), name='scored').data(updates).cte('scored')
+    stmt = (
+        update(table)
+        .where(table.c.id == data.c.id, table.c.status == 'pending')
+        .values({name: data.c[name] for name, _ in cols[1:]})
+        .add_cte(data)
+        .returning(table.c.id)
+    )
+    return [row[0] for row in db.session.execute(stmt)]
@@ -0,0 +1,89 @@
+"""
+scoring_jobs.py — Race scoring as background jobs.
+
+Scoring a race can take longer than the proxy allows for one request, and
+it would hold a gthread worker for the whole pass. The admin endpoints
+submit it to job_queue.scoring_queue instead (its own worker, apart from
+FastF1 extraction) and answer straight away:
+
+    job, status = submit_scoring(app, 'pit', 2026, 1)   # 202 queued/running, 200 already done
+
+Submitting is idempotent per (kind, race): while a job is queued or running
+the same job comes back, and once the race is scored the finished job —
+or, after the queue has let it go, the 'done' scoring_runs checkpoint —
+comes back with 200. A new pass only starts with force=True, and it only
+scores predictions added after the last run; rows already scored are never
+touched again. A failed job, or a 'running' checkpoint without a job
+(restart), is replaced by a new job, which resumes from the checkpoint
+(see scoring_executor).
+
+scoring_status() answers from the job while the queue still tracks it,
+and from the scoring_runs row after that (another worker, a restart).
+
+Kinds:
+    pit    in-race pit-call predictions    (scoring_service.score_race)
+    race   top-10 + tyre race predictions  (race_prediction_scoring.score_race_predictions)
+"""
+
+from app.models import ScoringRun
+from app.services.job_queue import scoring_queue, FAILED, DONE
+
+
+def _scorer(kind):
+    # Imported lazily: both services pull in fastf1_service
+    if kind == 'pit':
+        from app.services.scoring_service import score_race
+        return score_race
+    from app.services.race_prediction_scoring import score_race_predictions
+    return score_race_predictions
+
+
+def _scoring_job(app, kind, year, round_num):
+    """Job body: run the scorer inside an app context on the job thread."""
+    scorer = _scorer(kind)
+
+    def work(progress):
+        with app.app_context():
+            return scorer(year, round_num, progress=progress)
+    return work
+
+
+def _checkpoint_payload(run):
+    return {'status': run.status, 'checkpoint': run.to_dict()}
+
+
+def submit_scoring(app, kind: str, year: int, round_num: int, force: bool = False):
+    """
+    (payload, HTTP status) — the existing job or finished checkpoint for this
+    race, or a new job. force starts a new pass over a scored race for the
+    predictions added since (an active job is still joined, never doubled).
+    """
+    job_kind = f'score-{kind}'
+    key      = (year, round_num)
+
+    job = scoring_queue.find(job_kind, key)
+    if job and job['status'] not in (DONE, FAILED):
+        return job, 202
+    if not force:
+        if job and job['status'] == DONE:
+            return job, 200
+        run = ScoringRun.query.filter_by(kind=kind, year=year, round_num=round_num).first()
+        if run is not None and run.status == 'done':
+            return _checkpoint_payload(run), 200
+
+    job, created = scoring_queue.submit(job_kind, key, _scoring_job(app, kind, year, round_num))
+    if created:
+        print(f"[scoring_jobs] queued {kind} scoring for {year} R{round_num} ({job['job_id']})")
+    return job, 202
+
+
+def scoring_status(kind: str, year: int, round_num: int):
+    """(payload, HTTP status) for the latest scoring of a race."""
+    job = scoring_queue.find(f'score-{kind}', (year, round_num))
+    if job is not None:
+        return job, 200
+
+    run = ScoringRun.query.filter_by(kind=kind, year=year, round_num=round_num).first()
+    if run is None:
+        return {'error': f'No scoring job for {year} R{round_num}'}, 404
+    return _checkpoint_payload(run), 200
@@ -4,7 +4,11 @@ scoring_service.py — Prediction scoring engine for Pitlane Live.
 Called after a race weekend ends to:
   1. Build a pit stop registry from the cached FastF1 processed JSON
   2. Evaluate every pending prediction as correct / wrong
-  3. Award points and update user total_score / accuracy_rate
+  3. Award points and add them to the scored users' total_score / accuracy_rate
+     (per-race deltas, committed with the status updates — see user_totals)
+
+Pending rows are streamed in keyset chunks with one bulk UPDATE and one commit
+per chunk; an interrupted run resumes where it stopped (see scoring_executor).
 
 Usage (from Flask shell or a cron job):
     from app.services.scoring_service import score_race
@@ -18,13 +22,11 @@ Or via the API endpoint:
          -d '{"year": 2026, "round": 1}'
 """
 
-import json
-import os
-from pathlib import Path
-
 # These imports work when called inside a Flask app context
-from app.models import db, Prediction, User
+from app.models import Prediction
 from app.services.fastf1_service import fastf1_service
+from app.services.scoring_executor import ScoringPass, run_scoring, SCORING_CHUNK
+from app.services.user_totals import recompute_user_totals, apply_prediction_deltas
 
 # ─── Constants ────────────────────────────────────────────────────────────────
 
@@ -179,96 +181,94 @@ def calculate_points(confidence: int, lap_diff) -> int:
 
 # ─── User score aggregation ───────────────────────────────────────────────────
 
-def update_user_scores():
+def update_user_scores(user_ids=None):
     """
-    Recompute total_score and accuracy_rate for every user from their predictions.
-    Called after all predictions have been marked correct/wrong.
+    Rebuild total_score and accuracy_rate from the users' whole prediction
+    history (every user when user_ids is None) — for reconciliation, see
+    rebuild_user_totals.py. score_race applies per-race deltas instead.
     """
-    users = User.query.all()
-    for user in users:
-        all_preds    = user.predictions
-        scored       = [p for p in all_preds if p.status in ('correct', 'wrong')]
-        correct      = [p for p in scored    if p.status == 'correct']
+    return recompute_user_totals(user_ids)
+
+
+# ─── Chunked pass ─────────────────────────────────────────────────────────────
+
+class PitPredictionPass(ScoringPass):
+    """In-race pit calls: status correct|wrong + points_earned."""
+
+    kind        = 'pit'
+    table       = Prediction.__table__
+    columns     = (table.c.id, table.c.user_id, table.c.driver_name, table.c.action,
+                   table.c.predicted_lap, table.c.confidence)
+    result_cols = (('points_earned', table.c.points_earned.type),)
 
-        user.total_score   = sum(p.points_earned for p in all_preds)
-        user.accuracy_rate = (
-            round(len(correct) / len(scored) * 100, 1)
-            if scored else 0.0
-        )
+    def __init__(self, pit_registry: dict, race_drivers: set):
+        self.pit_registry = pit_registry
+        self.race_drivers = race_drivers
 
-    db.session.commit()
-    return len(users)
+    def score(self, row):
+        # If the driver didn't race at all, skip (don't score)
+        # This handles predictions made for a different race or a DNQ driver.
+        if self.race_drivers and row.driver_name.upper() not in self.race_drivers:
+            return None
+
+        result = evaluate_prediction(row, self.pit_registry)
+        if result['correct']:
+            return 'correct', calculate_points(row.confidence, result['lap_diff'])
+        return 'wrong', 0
+
+    def apply_deltas(self, ids) -> int:
+        return apply_prediction_deltas(ids)
 
 
 # ─── Main entry point ─────────────────────────────────────────────────────────
 
-def score_race(year: int, round_num: int) -> dict:
+def score_race(year: int, round_num: int, chunk_size: int = SCORING_CHUNK, progress=None) -> dict:
     """
     Score all pending predictions against a completed FastF1 race.
 
     Args:
-        year:      e.g. 2026
-        round_num: e.g. 1  (Australian GP)
+        year:       e.g. 2026
+        round_num:  e.g. 1  (Australian GP)
+        chunk_size: predictions per chunk / commit
+        progress:   optional progress(stage, percent, detail) callback, once per
+                    chunk; detail holds the running counts (see run_scoring)
 
     Returns:
-        Summary dict with counts and race name.
+        Summary dict with counts, race name and throughput.
     """
-    cache_file = fastf1_service.processed_cache_dir / f"{year}_R{round_num}_processed.json"
+    race_data = fastf1_service.load_processed_race(year, round_num)
 
-    if not cache_file.exists():
+    if race_data is None:
         return {
             'error': f'Race not cached yet: {year} R{round_num}. '
                      f'Run warm_cache.py --year {year} --round {round_num} first.'
         }
 
-    with open(cache_file) as f:
-        race_data = json.load(f)
-
     pit_registry  = build_pit_registry(race_data)
     race_drivers  = get_race_drivers(race_data)
     race_name     = race_data.get('name', f'{year} R{round_num}')
 
-    pending = Prediction.query.filter_by(status='pending').all()
+    run = run_scoring(PitPredictionPass(pit_registry, race_drivers),
+                      year, round_num, chunk_size, progress)
 
-    if not pending:
+    if run.get('already_scored') or not run['total']:
         return {
-            'race':    race_name,
-            'message': 'No pending predictions found.',
-            'scored':  0,
+            'race':     race_name,
+            'message':  'No pending predictions found.',
+            'scored':   0,
+            'last_run': run if run.get('already_scored') else None,
         }
 
-    tally = {'correct': 0, 'wrong': 0, 'skipped': 0}
-
-    for pred in pending:
-        driver_code = pred.driver_name.upper()
-
-        # If the driver didn't race at all, skip (don't score)
-        # This handles predictions made for a different race or a DNQ driver.
-        if race_drivers and driver_code not in race_drivers:
-            tally['skipped'] += 1
-            continue
-
-        result = evaluate_prediction(pred, pit_registry)
-
-        if result['correct']:
-            pred.status        = 'correct'
-            pred.points_earned = calculate_points(pred.confidence, result['lap_diff'])
-            tally['correct'] += 1
-        else:
-            pred.status        = 'wrong'
-            pred.points_earned = 0
-            tally['wrong'] += 1
-
-    db.session.commit()
-
-    users_updated = update_user_scores()
-
     return {
         'race':          race_name,
-        'total_pending': len(pending),
-        'scored':        tally['correct'] + tally['wrong'],
-        'correct':       tally['correct'],
-        'wrong':         tally['wrong'],
-        'skipped':       tally['skipped'],
-        'users_updated': users_updated,
-    }
\ No newline at end of file
+        'total_pending': run['total'],
+        'scored':        run['scored'],
+        'correct':       run['correct'],
+        'wrong':         run['wrong'],
+        'skipped':       run['skipped'],
+        'user_updates':  run['user_updates'],
+        'chunks':        run['chunks'],
+        'resumed':       run['resumed'],
+        'elapsed_s':     run['elapsed_s'],
+        'rows_per_s':    run['rows_per_s'],
+    }
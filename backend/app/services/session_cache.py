@@ -0,0 +1,192 @@
+"""
+session_cache.py — Bounded LRU of loaded FastF1 sessions.
+
+FastF1Service used to keep every Session it ever loaded in a plain dict, and
+a Session holds laps, results, weather and (with telemetry) car/position
+DataFrames — easily hundreds of MB. This cache caps both the number of
+sessions and their approximate size, measured with
+DataFrame.memory_usage(deep=True), and evicts least-recently-used first.
+
+Eviction only drops the cache's reference. A thread that already got the
+Session keeps using it safely; the memory is freed once the last reader is
+done with it. Sessions are shared between threads — treat them as read-only.
+
+Environment:
+    SESSION_CACHE_MAX_MB        approximate memory budget (default 256)
+    SESSION_CACHE_MAX_ENTRIES   hard cap on cached sessions (default 2)
+"""
+
+import os
+import threading
+from collections import OrderedDict
+from contextlib import contextmanager
+
+import pandas as pd
+
+SESSION_CACHE_MAX_MB      = float(os.getenv('SESSION_CACHE_MAX_MB', '256'))
+SESSION_CACHE_MAX_ENTRIES = int(os.getenv('SESSION_CACHE_MAX_ENTRIES', '2'))
+
+# Session attributes that hold the bulk of the data. car_data / pos_data are
+# dicts of per-driver frames and only exist when loaded with telemetry=True.
+_FRAME_ATTRS = ('laps', 'results', 'weather_data', 'race_control_messages', 'track_status')
+_DICT_ATTRS  = ('car_data', 'pos_data')
+
+
+class KeyedLocks:
+    """
+    One lock per key, created on first use and dropped once nobody holds or
+    waits for it — so per-race locks don't pile up for the process lifetime.
+    """
+
+    def __init__(self):
+        self._lock  = threading.Lock()
+        self._locks = {}   # key -> [Lock, users]
+
+    @contextmanager
+    def hold(self, key):
+        with self._lock:
+            entry = self._locks.setdefault(key, [threading.Lock(), 0])
+            entry[1] += 1
+        try:
+            with entry[0]:
+                yield
+        finally:
+            with self._lock:
+                entry[1] -= 1
+                if entry[1] == 0:
+                    del self._locks[key]
+
+    def __len__(self):
+        with self._lock:
+            return len(self._locks)
+
+
+def estimate_session_bytes(session) -> int:
+    """Approximate in-memory size of a loaded Session's DataFrames."""
+    total = 0
+    for attr in _FRAME_ATTRS:
+        total += _frame_bytes(_loaded_attr(session, attr))
+    for attr in _DICT_ATTRS:
+        frames = _loaded_attr(session, attr)
+        if isinstance(frames, dict):
+            total += sum(_frame_bytes(f) for f in frames.values())
+    return total
+
+
+def _loaded_attr(session, attr):
+    # FastF1 raises DataNotLoadedError for data the session wasn't loaded with
+    try:
+        return getattr(session, attr, None)
+    except Exception:
+        return None
+
+
+def _frame_bytes(frame) -> int:
+    if isinstance(frame, pd.DataFrame):
+        return int(frame.memory_usage(deep=True, index=True).sum())
+    if isinstance(frame, pd.Series):
+        return int(frame.memory_usage(deep=True, index=True))
+    return 0
+
+
+class SessionCache:
+    """Bounded, thread-safe LRU of FastF1 Session objects."""
+
+    def __init__(self, max_bytes: int, max_entries: int, sizeof=estimate_session_bytes):
+        self.max_bytes   = max_bytes
+        self.max_entries = max_entries
+        self._sizeof     = sizeof
+        self._entries    = OrderedDict()   # key -> (approx_bytes, session)
+        self._bytes      = 0
+        self._lock       = threading.Lock()
+        self._load_locks = KeyedLocks()    # one loader per key at a time
+        self.hits        = 0
+        self.misses      = 0
+        self.evictions   = 0
+        self.oversized   = 0
+
+    def get(self, key):
+        """Cached session or None. Counts as a use for LRU order."""
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return entry[1]
+
+    def get_or_load(self, key, loader):
+        """
+        Cached session for `key`, or loader() run at most once concurrently
+        per key. A loader returning None is not cached.
+        """
+        session = self.get(key)
+        if session is not None:
+            return session
+
+        with self._load_locks.hold(key):
+            # Another thread may have loaded it while we waited
+            session = self.get(key)
+            if session is not None:
+                return session
+
+            with self._lock:
+                self.misses += 1
+            session = loader()
+            if session is not None:
+                self.put(key, session)
+            return session
+
+    def put(self, key, session):
+        approx = self._sizeof(session)
+        if approx > self.max_bytes:
+            with self._lock:
+                self.oversized += 1
+            return   # Bigger than the whole budget — serve it, don't keep it
+
+        with self._lock:
+            old = self._entries.pop(key, None)
+            if old:
+                self._bytes -= old[0]
+
+            self._entries[key] = (approx, session)
+            self._bytes += approx
+
+            while self._entries and (
+                self._bytes > self.max_bytes or len(self._entries) > self.max_entries
+            ):
+                # Readers that already hold the evicted session keep their reference
+                _, evicted = self._entries.popitem(last=False)
+                self._bytes -= evicted[0]
+                self.evictions += 1
+
+    def invalidate(self, key):
+        with self._lock:
+            entry = self._entries.pop(key, None)
+            if entry:
+                self._bytes -= entry[0]
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._bytes = 0
+
+    def __contains__(self, key):
+        with self._lock:
+            return key in self._entries
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                'entries':     len(self._entries),
+                'approx_mb':   round(self._bytes / (1024 * 1024), 1),
+                'max_mb':      round(self.max_bytes / (1024 * 1024), 1),
+                'max_entries': self.max_entries,
+                'hits':        self.hits,
+                'misses':      self.misses,
+                'evictions':   self.evictions,
+                'oversized':   self.oversized,
+                'load_locks':  len(self._load_locks),
+                'keys':        list(self._entries.keys()),
+                'sizes_mb':    {k: round(v[0] / (1024 * 1024), 1) for k, v in self._entries.items()},
+            }
@@ -0,0 +1,279 @@
+"""
+sim_clock.py — Server-side race simulations: one clock per sim, shared by all viewers.
+
+Simulation mode used to be driven by the browser: every viewer bumped `lap`
+every 3 seconds and re-polled /simulate/state, which re-read and rebuilt the
+lap each time. Now a sim is a session on the server:
+
+    POST /simulate/sessions              {year, round, speed?, lap?} → {sim_id, ...}
+    POST /simulate/sessions/<id>/control {action: play|pause|seek|speed, lap?, speed?}
+    GET  /simulate/sessions/<id>/stream  SSE in the /live/stream format
+
+A SimSession precomputes the /live/state frame for every lap once, then
+runs a clock in race seconds: at speed 1 a lap takes as long as the
+leader's real lap did, at the default SIM_DEFAULT_SPEED (30) about 3 s.
+Pause, seek and speed changes rebase the clock and wake the stream.
+
+Each sim implements the poller interface sse_broadcaster.Broadcaster reads
+(snapshot / wait_for_update / state_payload), so its stream gets the same
+keyframe + delta frames, Last-Event-ID resume and slow-consumer handling as
+/live/stream — and a watch party of any size costs one frame per lap.
+
+Sims live in the process that created them (the Flask worker or the
+asyncio gateway) and are dropped SIM_IDLE_S after their last viewer left.
+
+Environment:
+    SIM_DEFAULT_SPEED   race seconds per wall second for new sims (default 30)
+    SIM_IDLE_S          drop an unwatched sim after this long (default 600)
+    SIM_MAX_SESSIONS    sims kept per process (default 50)
+"""
+
+import os
+import time
+import secrets
+import threading
+from bisect import bisect_right
+from datetime import datetime
+
+from app.services.sse_broadcaster import Broadcaster, SSE_KEYFRAME_EVERY
+
+SIM_DEFAULT_SPEED = float(os.getenv('SIM_DEFAULT_SPEED', '30'))
+SIM_IDLE_S        = float(os.getenv('SIM_IDLE_S', '600'))
+SIM_MAX_SESSIONS  = int(os.getenv('SIM_MAX_SESSIONS', '50'))
+
+SIM_SPEED_RANGE = (0.25, 600.0)
+ACTIONS = ('play', 'pause', 'seek', 'speed')
+
+
+class SimSession:
+    """A processed race replayed on a server-side clock."""
+
+    def __init__(self, sim_id, year, race_round, timeline, speed, lap=1):
+        self.sim_id      = sim_id
+        self.year        = year
+        self.race_round  = race_round
+        self._states     = timeline['states']
+        self.total_laps  = len(self._states)
+        self._lap_start  = [0.0]                   # race second each lap starts at
+        for seconds in timeline['lap_seconds'][:-1]:
+            self._lap_start.append(self._lap_start[-1] + seconds)
+        self._end_t      = self._lap_start[-1]     # start of the final lap
+
+        self._cond       = threading.Condition()
+        self.speed       = _clamp_speed(speed)
+        self.playing     = True
+        self._race_t     = self._lap_start[_clamp_lap(lap, self.total_laps) - 1]
+        self._wall_t     = time.monotonic()
+        self._version    = 0
+        self._snap       = None
+        self._snap_key   = None
+        self.created_at  = time.time()
+        self.last_seen   = time.monotonic()
+        self.broadcaster = Broadcaster(self, keyframe_every=SSE_KEYFRAME_EVERY)
+
+    # ── Controls ──────────────────────────────────────────────────────────────
+
+    def play(self):
+        with self._cond:
+            if not self.playing:
+                if self._race_t >= self._end_t:
+                    self._race_t = 0.0   # replay from the start once finished
+                self._wall_t  = time.monotonic()
+                self.playing  = True
+            self._cond.notify_all()
+
+    def pause(self):
+        with self._cond:
+            self._race_t  = self._race_time()
+            self.playing  = False
+            self._cond.notify_all()
+
+    def seek(self, lap: int):
+        with self._cond:
+            self._race_t = self._lap_start[_clamp_lap(lap, self.total_laps) - 1]
+            self._wall_t = time.monotonic()
+            self._cond.notify_all()
+
+    def set_speed(self, speed: float):
+        with self._cond:
+            self._race_t = self._race_time()
+            self._wall_t = time.monotonic()
+            self.speed   = _clamp_speed(speed)
+            self._cond.notify_all()
+
+    def status(self) -> dict:
+        snap = self.snapshot()
+        return {
+            'sim_id':     self.sim_id,
+            'year':       self.year,
+            'round':      self.race_round,
+            'lap':        snap['state']['sim_lap'],
+            'total_laps': self.total_laps,
+            'playing':    self.playing,
+            'speed':      self.speed,
+            'viewers':    self.broadcaster.stats()['subscribers'],
+            'stream':     f'/api/replay/simulate/sessions/{self.sim_id}/stream',
+        }
+
+    # ── Poller interface for Broadcaster ─────────────────────────────────────
+
+    def snapshot(self, wait_first=None) -> dict:
+        self.last_seen = time.monotonic()
+        with self._cond:
+            return self._current_locked()
+
+    def wait_for_update(self, version: int, timeout: float) -> dict:
+        """Block until the lap or the controls change (or timeout)."""
+        self.last_seen = time.monotonic()
+        deadline = time.monotonic() + timeout
+        with self._cond:
+            while True:
+                snap = self._current_locked()
+                remaining = deadline - time.monotonic()
+                if snap['version'] != version or remaining <= 0:
+                    return snap
+                self._cond.wait(min(remaining, self._until_next_lap()))
+
+    def state_payload(self, snap: dict) -> dict:
+        return snap['state']
+
+    # ── internals (hold self._cond) ──────────────────────────────────────────
+
+    def _race_time(self):
+        if not self.playing:
+            return self._race_t
+        return self._race_t + (time.monotonic() - self._wall_t) * self.speed
+
+    def _current_locked(self):
+        t = self._race_time()
+        if self.playing and t >= self._end_t:
+            # Chequered flag — hold the final lap
+            self._race_t, self.playing, t = self._end_t, False, self._end_t
+
+        lap = _clamp_lap(bisect_right(self._lap_start, t), self.total_laps)
+        key = (lap, self.playing, self.speed)
+        if key != self._snap_key:
+            self._version += 1
+            state = dict(
+                self._states[lap - 1],
+                timestamp=datetime.utcnow().isoformat(),
+                sim_id=self.sim_id,
+                sim_playing=self.playing,
+                sim_speed=self.speed,
+            )
+            self._snap     = {'version': self._version, 'state': state}
+            self._snap_key = key
+        return self._snap
+
+    def _until_next_lap(self):
+        if not self.playing:
+            return float('inf')
+        t   = self._race_time()
+        idx = bisect_right(self._lap_start, t)
+        nxt = self._lap_start[idx] if idx < self.total_laps else self._end_t
+        return max(0.01, (nxt - t) / self.speed)
+
+
+class SimRegistry:
+    """The sims of this process, by id."""
+
+    def __init__(self, service, max_sessions: int, idle_s: float):
+        self._service     = service
+        self.max_sessions = max_sessions
+        self.idle_s       = idle_s
+        self._sims        = {}
+        self._lock        = threading.Lock()
+
+    def create(self, year, race_round, speed=None, lap=1):
+        """A new sim, or {'error'} dict if the race isn't processed / the registry is full."""
+        timeline = self._service.get_sim_timeline(year, race_round)
+        if timeline is None or not timeline['states']:
+            return {'error': f'Race not cached: {year} R{race_round}'}
+
+        with self._lock:
+            self._prune_locked()
+            if len(self._sims) >= self.max_sessions:
+                return {'error': 'Too many simulations running, try again later'}
+            sim_id = secrets.token_urlsafe(6)
+            sim = SimSession(sim_id, year, race_round, timeline,
+                             speed=SIM_DEFAULT_SPEED if speed is None else speed, lap=lap)
+            self._sims[sim_id] = sim
+        print(f"[sim_clock] {sim_id}: {year} R{race_round} at {sim.speed:g}×")
+        return sim
+
+    def get(self, sim_id):
+        with self._lock:
+            sim = self._sims.get(sim_id)
+        if sim is not None:
+            sim.last_seen = time.monotonic()
+        return sim
+
+    def stats(self) -> dict:
+        with self._lock:
+            sims = list(self._sims.values())
+        return {'sessions': len(sims), 'max_sessions': self.max_sessions,
+                'sims': [sim.status() for sim in sims]}
+
+    def _prune_locked(self):
+        now = time.monotonic()
+        for sim_id, sim in list(self._sims.items()):
+            watched = sim.broadcaster.stats()['subscribers'] > 0
+            if not watched and now - sim.last_seen > self.idle_s:
+                del self._sims[sim_id]
+
+
+# ── Request handling shared by the Flask routes and the gateway ──────────────
+
+def create_sim(params: dict):
+    """(payload, status) for POST /simulate/sessions."""
+    try:
+        year       = int(params.get('year', 2025))
+        race_round = int(params.get('round', 1))
+        lap        = int(params.get('lap', 1))
+        speed      = float(params['speed']) if params.get('speed') is not None else None
+    except (TypeError, ValueError):
+        return {'error': 'Invalid parameters'}, 400
+
+    sim = sim_registry.create(year, race_round, speed=speed, lap=lap)
+    if isinstance(sim, dict):
+        return sim, 404 if 'not cached' in sim['error'] else 503
+    return sim.status(), 201
+
+
+def control_sim(sim_id: str, params: dict):
+    """(payload, status) for POST /simulate/sessions/<id>/control."""
+    sim = sim_registry.get(sim_id)
+    if sim is None:
+        return {'error': 'Simulation not found'}, 404
+
+    action = params.get('action')
+    if action not in ACTIONS:
+        return {'error': f"action must be one of {', '.join(ACTIONS)}"}, 400
+    try:
+        if action == 'play':
+            sim.play()
+        elif action == 'pause':
+            sim.pause()
+        elif action == 'seek':
+            sim.seek(int(params['lap']))
+        else:
+            sim.set_speed(float(params['speed']))
+    except (KeyError, TypeError, ValueError):
+        return {'error': f'{action} needs a numeric ' + ('lap' if action == 'seek' else 'speed')}, 400
+    return sim.status(), 200
+
+
+def _clamp_lap(lap, total_laps):
+    return max(1, min(int(lap), total_laps))
+
+
+def _clamp_speed(speed):
+    return max(SIM_SPEED_RANGE[0], min(float(speed), SIM_SPEED_RANGE[1]))
+
+
+def _make_registry():
+    from app.services.fastf1_service import fastf1_service
+    return SimRegistry(fastf1_service, max_sessions=SIM_MAX_SESSIONS, idle_s=SIM_IDLE_S)
+
+
+sim_registry = _make_registry()
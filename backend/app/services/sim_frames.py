@@ -0,0 +1,240 @@
+"""
+sim_frames.py — Pre-serialized simulation frames, one per lap of a processed race.
+
+Simulation mode serves a processed race in the /live/state shape. Building
+that shape per request meant reading the lap, building driver dicts,
+synthesizing the pit race-control message and re-encoding it all as JSON.
+The warm pipeline now does it once per race and writes:
+
+    {year}_R{round}_sim.jsonl     line 1: header, then one compact frame per lap
+
+    {"format": "sim-frames", "version": 1, "source_size": ...,
+     "source_hash": ..., "name": ...,
+     "total_laps": 66, "lap_seconds": [80.9, 79.9, ...]}
+    {"session_key":"SIM_2024_10","drivers":[...],...,"sim_lap":1,...}
+
+Frames are stored without `timestamp`; frame_bytes() splices the current
+one in before the closing brace, so the sim endpoints write bytes straight
+to the response without decoding anything.
+
+This offline pass is also where the derived fields are computed: each
+driver's `interval` to the car ahead (seconds, from the gaps to the leader)
+and the leader's lap time per lap, which paces the sim clock (sim_clock).
+
+Like the lap index, the file records the size and content hash of the
+processed JSON it was built from (see race_cache.source_fingerprint); a
+mismatch means it is stale and callers rebuild frames on the fly.
+"""
+
+import json
+import os
+from datetime import datetime
+
+import pandas as pd
+
+from app.services.race_cache import RaceCache, source_fingerprint
+
+FRAMES_FORMAT  = 'sim-frames'
+FRAMES_VERSION = 1
+
+SIM_FALLBACK_LAP_S = 90.0   # lap length for sims when a race has no lap times
+
+# A race's frames are ~100–300 KB — keep a handful of races' bytes around
+_frames_cache = RaceCache(max_bytes=16 * 1024 * 1024, max_entries=32)
+
+
+def sim_frames_path(processed_dir, year, race_round):
+    return processed_dir / f"{year}_R{race_round}_sim.jsonl"
+
+
+# ── Building (offline) ───────────────────────────────────────────────────────
+
+def lap_state(race_meta, lap_data, lap_number):
+    """
+    One processed lap in the /live/state shape (without `timestamp`).
+
+    race_meta is either the full race dict or its lap index (same header fields).
+    """
+    total_laps  = race_meta.get('total_laps') or race_meta.get('lap_count', 0)
+    drivers_raw = (lap_data or {}).get('drivers', [])
+
+    drivers = []
+    for i, d in enumerate(drivers_raw):
+        drivers.append({
+            'driver_number': i + 1,          # fake number, not needed by UI
+            'driver':        d.get('driver', '???'),
+            'team':          d.get('team', 'Unknown'),
+            'position':      d.get('position') or (i + 1),
+            'gap':           d.get('gap', 'LEADER'),
+            'interval':      None,
+            'compound':      d.get('compound', 'UNKNOWN'),
+            'tire_age':      d.get('tire_life', 0),
+        })
+    _fill_intervals(drivers)
+
+    # Build a fake race_control message for pit events
+    pit_drivers = [
+        d.get('driver') for d in drivers_raw
+        if d.get('pit_in') or d.get('pit_out')
+    ]
+    race_control = None
+    if pit_drivers:
+        race_control = {
+            'flag':    'PIT',
+            'message': f"PIT STOP: {', '.join(pit_drivers)}"
+        }
+
+    return {
+        'session_key':  f'SIM_{race_meta.get("year")}_{race_meta.get("round")}',
+        'drivers':      drivers,
+        'race_control': race_control,
+        # Extra fields the frontend can use to show simulation status
+        'simulated':    True,
+        'sim_lap':      lap_number,
+        'sim_total_laps': total_laps,
+        'sim_race_name':  race_meta.get('name', ''),
+    }
+
+
+def leader_lap_seconds(lap_data):
+    """The leader's lap time on a processed lap, in seconds (None if unknown)."""
+    drivers = (lap_data or {}).get('drivers', [])
+    leader  = min(drivers, key=lambda d: d.get('position') or 99, default=None)
+    if not leader or not leader.get('lap_time'):
+        return None
+    try:
+        seconds = pd.Timedelta(leader['lap_time']).total_seconds()
+    except (ValueError, TypeError):
+        return None
+    return seconds if seconds > 0 else None
+
+
+def fill_lap_seconds(lap_seconds):
+    """Unknown lap times → the median of the known ones (or SIM_FALLBACK_LAP_S)."""
+    known = sorted(s for s in lap_seconds if s)
+    if known:
+        mid = len(known) // 2
+        fallback = known[mid] if len(known) % 2 else (known[mid - 1] + known[mid]) / 2
+    else:
+        fallback = SIM_FALLBACK_LAP_S
+    return [round(s, 3) if s else fallback for s in lap_seconds]
+
+
+def write_sim_frames(processed_dir, year, race_round, race_data, source_size, source_hash):
+    """Write the frame file for a processed race (temp file + rename)."""
+    path  = sim_frames_path(processed_dir, year, race_round)
+    laps  = race_data.get('laps', [])
+    total = race_data.get('total_laps') or len(laps)
+
+    lines, lap_seconds = [], []
+    for lap_number in range(1, total + 1):
+        lap_data = laps[lap_number - 1] if lap_number <= len(laps) else None
+        frame    = lap_state(race_data, lap_data, lap_number)
+        lines.append(json.dumps(frame, separators=(',', ':')).encode('utf-8'))
+        lap_seconds.append(leader_lap_seconds(lap_data))
+
+    header = {
+        'format':          FRAMES_FORMAT,
+        'version':         FRAMES_VERSION,
+        'source_size':     source_size,
+        'source_hash':     source_hash,
+        'year':            year,
+        'round':           race_round,
+        'name':            race_data.get('name', ''),
+        'total_laps':      total,
+        'lap_seconds':     fill_lap_seconds(lap_seconds),
+    }
+
+    tmp = path.with_suffix('.jsonl.tmp')
+    with open(tmp, 'wb') as f:
+        f.write(json.dumps(header, separators=(',', ':')).encode('utf-8') + b'\n')
+        for line in lines:
+            f.write(line + b'\n')
+    os.replace(tmp, path)
+
+    _frames_cache.invalidate((year, race_round))
+    return path
+
+
+# ── Serving ──────────────────────────────────────────────────────────────────
+
+class SimFrames:
+    """A race's serialized frames. Read-only, shared between threads."""
+
+    __slots__ = ('header', 'frames')
+
+    def __init__(self, header, frames):
+        self.header = header
+        self.frames = frames      # bytes per lap, lap 1 first
+
+    @property
+    def total_laps(self):
+        return len(self.frames)
+
+    @property
+    def lap_seconds(self):
+        return self.header['lap_seconds']
+
+    def clamp(self, lap_number):
+        return max(1, min(int(lap_number), self.total_laps))
+
+    def frame_bytes(self, lap_number, timestamp=None):
+        """The lap's /live/state JSON with `timestamp` set, as bytes. Lap is clamped."""
+        frame = self.frames[self.clamp(lap_number) - 1]
+        stamp = (timestamp or datetime.utcnow().isoformat()).encode()
+        return frame[:-1] + b',"timestamp":"' + stamp + b'"}'
+
+    def states(self):
+        """Every frame decoded (no timestamp) — for consumers that diff dicts."""
+        return [json.loads(frame) for frame in self.frames]
+
+
+def load_sim_frames(processed_dir, year, race_round):
+    """SimFrames for a race, or None if missing or stale relative to the processed JSON."""
+    path   = sim_frames_path(processed_dir, year, race_round)
+    frames = _frames_cache.get((year, race_round), path, loader=_read_frames)
+    if frames is None:
+        return None
+
+    processed_path = processed_dir / f"{year}_R{race_round}_processed.json"
+    try:
+        if source_fingerprint(processed_path) != (frames.header['source_size'], frames.header.get('source_hash')):
+            return None
+    except OSError:
+        return None
+    return frames
+
+
+def _read_frames(path):
+    with open(path, 'rb') as f:
+        header = json.loads(f.readline())
+        if header.get('format') != FRAMES_FORMAT or header.get('version') != FRAMES_VERSION:
+            return None
+        frames = [line.rstrip(b'\n') for line in f]
+    if not frames or len(frames) != header['total_laps']:
+        return None
+    return SimFrames(header, frames)
+
+
+def _fill_intervals(drivers):
+    """`interval` = seconds to the car one position ahead, where both gaps are known."""
+    ahead = None
+    for d in sorted(drivers, key=lambda d: d['position']):
+        gap = _gap_seconds(d['gap'])
+        if ahead is not None and gap is not None:
+            d['interval'] = round(max(0.0, gap - ahead), 3)
+        ahead = gap
+
+
+def _gap_seconds(gap):
+    """'LEADER' → 0.0, '+1.474s' → 1.474, anything else (e.g. lapped) → None."""
+    if gap == 'LEADER':
+        return 0.0
+    if isinstance(gap, (int, float)):
+        return float(gap)
+    if isinstance(gap, str) and gap.startswith('+') and gap.endswith('s'):
+        try:
+            return float(gap[1:-1])
+        except ValueError:
+            return None
+    return None
@@ -0,0 +1,273 @@
+"""
+sse_broadcaster.py — One live frame per tick, published to every SSE subscriber.
+
+/live/stream used to serialize the full state for each connection every
+3 seconds, changed or not. The broadcaster follows the shared live_poller
+instead: for every new snapshot it computes ONE frame, serializes it once,
+and hands the same bytes to every subscriber.
+
+Frames on the wire:
+
+    id: 41                       ← keyframe: the full /live/state payload,
+    data: {"type": "keyframe", ...}  sent as a default "message" event
+
+    id: 42
+    event: delta                 ← only what changed since frame 41
+    data: {"type": "delta", "drivers": {"44": {"position": 3}}, ...}
+
+A delta carries changed fields per driver (new drivers in full), removed
+driver numbers, the new running order only if it changed, and changed
+top-level fields. A keyframe goes out every SSE_KEYFRAME_EVERY frames and
+whenever the session changes.
+
+Clients resume with the standard Last-Event-ID header: missed frames are
+replayed from a short history, or a fresh keyframe is sent if they are too
+far behind. Each subscriber has a small bounded buffer — a consumer that
+falls behind has its backlog dropped and gets a keyframe instead of the
+server buffering without limit. Idle connections get a comment line
+(": heartbeat") every SSE_HEARTBEAT_S so proxies keep them open.
+
+Environment:
+    SSE_KEYFRAME_EVERY    frames between keyframes (default 20)
+    SSE_CLIENT_BUFFER     frames queued per subscriber before dropping (default 16)
+    SSE_HEARTBEAT_S       seconds between heartbeat comments (default 15)
+"""
+
+import os
+import json
+import queue
+import threading
+from collections import deque
+
+SSE_KEYFRAME_EVERY = int(os.getenv('SSE_KEYFRAME_EVERY', '20'))
+SSE_CLIENT_BUFFER  = int(os.getenv('SSE_CLIENT_BUFFER', '16'))
+SSE_HEARTBEAT_S    = float(os.getenv('SSE_HEARTBEAT_S', '15'))
+
+HISTORY_FRAMES = 64
+RETRY_MS       = 3000
+
+HEARTBEAT = ': heartbeat\n\n'
+
+
+class Frame:
+    """One serialized SSE event, shared by all subscribers."""
+
+    __slots__ = ('seq', 'kind', 'text', 'data')
+
+    def __init__(self, seq, kind, payload):
+        self.seq  = seq
+        self.kind = kind
+        event = '' if kind == 'keyframe' else f'event: {kind}\n'
+        self.text = f"id: {seq}\n{event}data: {json.dumps(payload)}\n\n"
+        self.data = self.text.encode()
+
+
+def diff_state(prev: dict, cur: dict) -> dict:
+    """Delta payload turning live state `prev` into `cur`."""
+    prev_drivers = {d.get('driver_number'): d for d in prev.get('drivers', [])}
+    cur_order    = [d.get('driver_number') for d in cur.get('drivers', [])]
+
+    drivers = {}
+    for d in cur.get('drivers', []):
+        old = prev_drivers.get(d.get('driver_number'))
+        changed = d if old is None else {k: v for k, v in d.items() if old.get(k) != v}
+        if changed:
+            drivers[str(d.get('driver_number'))] = changed
+
+    delta = {
+        'type':    'delta',
+        'drivers': drivers,
+        'removed': [n for n in prev_drivers if n not in set(cur_order)],
+        'fields':  {k: v for k, v in cur.items() if k != 'drivers' and prev.get(k) != v},
+    }
+    if cur_order != list(prev_drivers):
+        delta['order'] = cur_order
+    return delta
+
+
+class Subscription:
+    """A subscriber's bounded frame queue; iterate stream() to get SSE text."""
+
+    def __init__(self, broadcaster, last_event_id=None):
+        self._broadcaster = broadcaster
+        self._queue       = queue.Queue(maxsize=SSE_CLIENT_BUFFER)
+        self._resync      = False
+        self.last_seq     = None
+        self.dropped      = 0
+        self.backlog      = []     # set by Broadcaster.subscribe, under its lock
+
+    def offer(self, frame):
+        """Called by the publisher — never blocks."""
+        try:
+            self._queue.put_nowait(frame)
+        except queue.Full:
+            # Slow consumer: throw the backlog away, resync with a keyframe
+            while True:
+                try:
+                    self._queue.get_nowait()
+                    self.dropped += 1
+                except queue.Empty:
+                    break
+            self.dropped += 1
+            self._resync = True
+            self._queue.put_nowait(None)   # wake the consumer
+
+    def next_text(self, timeout):
+        """Next SSE chunk to write, or HEARTBEAT if nothing arrived in time."""
+        if self.backlog:
+            return self._emit(self.backlog.pop(0))
+        try:
+            frame = self._queue.get(timeout=timeout)
+        except queue.Empty:
+            return HEARTBEAT
+
+        if self._resync or frame is None:
+            self._resync = False
+            frame = self._broadcaster.current_keyframe()
+            if frame is None:
+                return HEARTBEAT
+        if self.last_seq is not None and frame.seq <= self.last_seq:
+            return ''   # already covered by a resync keyframe
+        return self._emit(frame)
+
+    def stream(self, heartbeat_s=None):
+        """Generator of SSE text for a threaded response."""
+        heartbeat_s = heartbeat_s or SSE_HEARTBEAT_S
+        yield f'retry: {RETRY_MS}\n\n'
+        while True:
+            text = self.next_text(heartbeat_s)
+            if text:
+                yield text
+
+    def _emit(self, frame):
+        self.last_seq = frame.seq
+        return frame.text
+
+
+class Broadcaster:
+    """Turns live_poller snapshots into keyframe/delta frames for all subscribers."""
+
+    def __init__(self, poller, keyframe_every: int):
+        self._poller        = poller
+        self.keyframe_every = keyframe_every
+        self._lock          = threading.Lock()
+        self._subscribers   = set()
+        self._history       = deque(maxlen=HISTORY_FRAMES)
+        self._thread        = None
+        self._seq           = 0
+        self._state         = None    # last published state
+        self._keyframe      = None    # cached keyframe for (seq, state)
+        self._since_key     = 0
+        self.frames_sent    = 0
+        self.keyframes_sent = 0
+
+    def subscribe(self, last_event_id=None, subscription_cls=Subscription):
+        """
+        Register a subscriber; starts the publisher thread if needed. Its
+        backlog (resume_frames) is taken in the same critical section as the
+        registration, so every frame is either in the backlog or offered to it.
+        """
+        sub = subscription_cls(self, last_event_id)
+        with self._lock:
+            sub.backlog = self._resume_frames(last_event_id)
+            self._subscribers.add(sub)
+            if self._thread is None:
+                self._thread = threading.Thread(target=self._run, name='sse-broadcaster', daemon=True)
+                self._thread.start()
+        return sub
+
+    def unsubscribe(self, sub):
+        with self._lock:
+            self._subscribers.discard(sub)
+
+    def current_keyframe(self):
+        """Keyframe for the latest published state (built once per seq)."""
+        with self._lock:
+            return self._current_keyframe()
+
+    def resume_frames(self, last_event_id):
+        """Frames a reconnecting client missed, or a keyframe if that's not possible."""
+        with self._lock:
+            return self._resume_frames(last_event_id)
+
+    def stats(self) -> dict:
+        with self._lock:
+            subs = list(self._subscribers)
+            return {
+                'subscribers':    len(subs),
+                'seq':            self._seq,
+                'frames_sent':    self.frames_sent,
+                'keyframes_sent': self.keyframes_sent,
+                'dropped_frames': sum(s.dropped for s in subs),
+                'history':        len(self._history),
+            }
+
+    # ── internals ─────────────────────────────────────────────────────────────
+
+    def _current_keyframe(self):
+        # Caller holds _lock
+        if self._state is None:
+            return None
+        if self._keyframe is None or self._keyframe.seq != self._seq:
+            self._keyframe = Frame(self._seq, 'keyframe', dict(self._state, type='keyframe'))
+        return self._keyframe
+
+    def _resume_frames(self, last_event_id):
+        # Caller holds _lock
+        if last_event_id is not None and last_event_id == self._seq:
+            return []
+        history = self._history
+        if last_event_id is not None and history and history[0].seq <= last_event_id + 1:
+            missed = [f for f in history if f.seq > last_event_id]
+            if missed and missed[0].seq == last_event_id + 1:
+                return missed
+        keyframe = self._current_keyframe()
+        return [keyframe] if keyframe else []
+
+    def _run(self):
+        version = None
+        while True:
+            with self._lock:
+                if not self._subscribers:
+                    self._thread = None
+                    return
+            snap = self._poller.snapshot() if version is None else \
+                self._poller.wait_for_update(version, SSE_HEARTBEAT_S)
+            if snap['version'] == version:
+                continue
+            version = snap['version']
+            self._publish(self._poller.state_payload(snap))
+
+    def _publish(self, state):
+        with self._lock:
+            prev = self._state
+            self._seq += 1
+            seq = self._seq
+            keyframe = (
+                prev is None
+                or self._since_key + 1 >= self.keyframe_every
+                or prev.get('session_key') != state.get('session_key')
+            )
+            if keyframe:
+                frame = Frame(seq, 'keyframe', dict(state, type='keyframe'))
+                self._keyframe  = frame
+                self._since_key = 0
+                self.keyframes_sent += 1
+            else:
+                frame = Frame(seq, 'delta', diff_state(prev, state))
+                self._since_key += 1
+            self._state = state
+            self._history.append(frame)
+            self.frames_sent += 1
+            subs = list(self._subscribers)
+
+        for sub in subs:
+            sub.offer(frame)
+
+
+def _make_broadcaster():
+    from app.services.live_poller import live_poller
+    return Broadcaster(live_poller, keyframe_every=SSE_KEYFRAME_EVERY)
+
+
+live_broadcaster = _make_broadcaster()
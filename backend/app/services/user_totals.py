@@ -0,0 +1,186 @@
+"""
+user_totals.py — User.total_score and User.accuracy_rate, kept by deltas and rebuilt in bulk.
+
+    total_score        = Σ predictions.points_earned + Σ race_predictions.total_points (scored)
+    predictions_graded = in-race calls graded correct or wrong
+    predictions_correct= of those, correct
+    accuracy_rate      = predictions_correct / predictions_graded as a %, 1 decimal,
+                         exact .x5 ties rounded away from zero (0.0 with nothing
+                         graded yet)
+
+accuracy_rate covers the in-race game only — race predictions earn partial
+credit, so correct/wrong doesn't apply to them.
+
+Two paths:
+
+    apply_prediction_deltas(ids)        after scoring a race: add the points and
+    apply_race_prediction_deltas(ids)   counts of just-scored rows to their users'
+                                        running totals. Cost scales with the race's
+                                        participants, not with anyone's history.
+                                        Runs in the caller's transaction.
+
+    recompute_user_totals(user_ids)     full rebuild from every prediction — grouped
+                                        subqueries + one UPDATE ... FROM per batch of
+                                        users. For reconciliation (rebuild_user_totals.py).
+
+Deltas assume a row's points were 0 while it was pending, which is how both
+scoring services create them. Everything here works on PostgreSQL and
+SQLite (3.33+ for UPDATE ... FROM).
+"""
+
+from sqlalchemy import Float, Integer, Numeric, case, cast, func, literal, select, update
+
+from app.models import db, User, Prediction, RacePrediction
+
+USER_ID_BATCH = 5000   # ids per statement for IN (...) lists
+
+
+# ── Incremental (per race) ────────────────────────────────────────────────────
+
+def apply_prediction_deltas(prediction_ids) -> int:
+    """
+    Add just-graded in-race predictions (by id) to their users' totals.
+    Call after the status updates are flushed, before the commit.
+    Returns the number of user rows updated.
+    """
+    def deltas(ids):
+        return select(
+            Prediction.user_id.label('user_id'),
+            func.sum(func.coalesce(Prediction.points_earned, 0)).label('points'),
+            func.sum(case((Prediction.status == 'correct', 1), else_=0)).label('correct'),
+            func.sum(case((Prediction.status.in_(('correct', 'wrong')), 1), else_=0)).label('graded'),
+        ).where(Prediction.id.in_(ids)).group_by(Prediction.user_id)
+    return _apply_batched(prediction_ids, deltas)
+
+
+def apply_race_prediction_deltas(race_prediction_ids) -> int:
+    """Add just-scored race predictions (by id) to their users' total_score."""
+    def deltas(ids):
+        return select(
+            RacePrediction.user_id.label('user_id'),
+            func.sum(func.coalesce(RacePrediction.total_points, 0)).label('points'),
+            literal(0).label('correct'),
+            literal(0).label('graded'),
+        ).where(RacePrediction.id.in_(ids), RacePrediction.status == 'scored') \
+         .group_by(RacePrediction.user_id)
+    return _apply_batched(race_prediction_ids, deltas)
+
+
+def _apply_batched(ids, deltas_for):
+    ids = sorted(set(ids))
+    updated = 0
+    for start in range(0, len(ids), USER_ID_BATCH):
+        updated += _apply_deltas(deltas_for(ids[start:start + USER_ID_BATCH]).subquery('d'))
+    return updated
+
+
+def _apply_deltas(d):
+    # SET expressions see the pre-update row, on PostgreSQL and SQLite alike
+    correct = func.coalesce(User.predictions_correct, 0) + d.c.correct
+    graded  = func.coalesce(User.predictions_graded, 0) + d.c.graded
+    stmt = (
+        update(User)
+        .where(User.id == d.c.user_id)
+        .values(
+            total_score=func.coalesce(User.total_score, 0) + d.c.points,
+            predictions_correct=correct,
+            predictions_graded=graded,
+            accuracy_rate=_accuracy(correct, graded),
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(stmt).rowcount
+
+
+# ── Full rebuild ──────────────────────────────────────────────────────────────
+
+def recompute_user_totals(user_ids=None, commit: bool = True) -> int:
+    """
+    Rebuild totals for `user_ids` (any iterable), or for every user when
+    None, from all of their predictions. Returns the number of users whose
+    totals changed.
+    """
+    if user_ids is None:
+        updated = _rebuild(None)
+    else:
+        ids = sorted(set(user_ids))
+        updated = 0
+        for start in range(0, len(ids), USER_ID_BATCH):
+            updated += _rebuild(ids[start:start + USER_ID_BATCH])
+
+    if commit:
+        db.session.commit()
+    return updated
+
+
+def totals_query(user_ids=None):
+    """SELECT user_id, total_score, predictions_correct, predictions_graded, accuracy_rate."""
+    graded = Prediction.status.in_(('correct', 'wrong'))
+    pit = select(
+        Prediction.user_id.label('user_id'),
+        func.sum(func.coalesce(Prediction.points_earned, 0)).label('points'),
+        func.sum(case((Prediction.status == 'correct', 1), else_=0)).label('correct'),
+        func.sum(case((graded, 1), else_=0)).label('graded'),
+    ).group_by(Prediction.user_id)
+
+    race = select(
+        RacePrediction.user_id.label('user_id'),
+        func.sum(func.coalesce(RacePrediction.total_points, 0)).label('points'),
+    ).where(RacePrediction.status == 'scored').group_by(RacePrediction.user_id)
+
+    users = select(User.id.label('user_id'))
+    if user_ids is not None:
+        pit   = pit.where(Prediction.user_id.in_(user_ids))
+        race  = race.where(RacePrediction.user_id.in_(user_ids))
+        users = users.where(User.id.in_(user_ids))
+    pit, race, users = pit.subquery('pit'), race.subquery('race'), users.subquery('u')
+
+    correct = func.coalesce(pit.c.correct, 0)
+    graded  = func.coalesce(pit.c.graded, 0)
+    return (
+        select(
+            users.c.user_id,
+            (func.coalesce(pit.c.points, 0) + func.coalesce(race.c.points, 0)).label('total_score'),
+            cast(correct, Integer).label('predictions_correct'),
+            cast(graded, Integer).label('predictions_graded'),
+            _accuracy(correct, graded).label('accuracy_rate'),
+        )
+        .select_from(users)
+        .outerjoin(pit,  pit.c.user_id  == users.c.user_id)
+        .outerjoin(race, race.c.user_id == users.c.user_id)
+    )
+
+
+def _rebuild(user_ids):
+    totals = totals_query(user_ids).subquery('totals')
+    stmt = (
+        update(User)
+        .where(User.id == totals.c.user_id)
+        # Only rows that actually change — a reconciliation run mostly confirms
+        .where(User.total_score.is_distinct_from(totals.c.total_score)
+               | User.predictions_correct.is_distinct_from(totals.c.predictions_correct)
+               | User.predictions_graded.is_distinct_from(totals.c.predictions_graded)
+               | User.accuracy_rate.is_distinct_from(totals.c.accuracy_rate))
+        .values(
+            total_score=totals.c.total_score,
+            predictions_correct=totals.c.predictions_correct,
+            predictions_graded=totals.c.predictions_graded,
+            accuracy_rate=totals.c.accuracy_rate,
+        )
+        .execution_options(synchronize_session=False)
+    )
+    return db.session.execute(stmt).rowcount
+
+
+def _accuracy(correct, graded):
+    """
+    SQL for correct / graded × 100 to 1 decimal, 0.0 when nothing is graded.
+
+    NUMERIC rounding takes exact ties away from zero on PostgreSQL and SQLite
+    alike: 10/32 = 31.25 → 31.3, where the old per-user Python round() gave
+    31.2 (half to even). Only those exact ties differ from the old values.
+    """
+    return cast(case(
+        (graded > 0, func.round(cast(cast(correct, Float) * 100 / graded, Numeric), 1)),
+        else_=literal(0.0),
+    ), Float)
@@ -0,0 +1,238 @@
+"""
+bench_gateway.py — Thousands of idle SSE subscribers vs REST latency.
+
+Starts the asyncio gateway (gateway.py) and the Flask app as two local
+processes, measures REST latency on its own, then opens --clients live
+streams against the gateway and measures again while they are held open.
+Reports:
+
+    • how many streams connected and are still open at the end
+    • REST p50/p95 (Flask /api/health) without and with the streams open
+    • gateway /api/gateway/stats latency — the same event loop that holds
+      every stream, so it shows whether idle subscribers slow the loop down
+    • gateway process RSS with the streams open
+
+The gateway gets a short heartbeat so every held stream is actually
+written to during the run. No OpenF1 access is needed: with no live
+session the streams simply stay idle.
+
+Usage:
+    python bench_gateway.py
+    python bench_gateway.py --clients 5000 --hold 30
+    python bench_gateway.py --max-p95-increase-ms 20
+"""
+
+import os
+import sys
+import time
+import socket
+import asyncio
+import argparse
+import subprocess
+import statistics
+from pathlib import Path
+
+import requests
+
+BACKEND = Path(__file__).parent
+sys.path.insert(0, str(BACKEND))
+
+from app.services.live_gateway import raise_fd_limit
+
+
+def free_port():
+    with socket.socket() as s:
+        s.bind(('127.0.0.1', 0))
+        return s.getsockname()[1]
+
+
+def wait_until_up(url, proc, timeout=60):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        if proc.poll() is not None:
+            raise RuntimeError(f'{url}: process exited with {proc.returncode}')
+        try:
+            if requests.get(url, timeout=1).ok:
+                return
+        except requests.RequestException:
+            pass
+        time.sleep(0.3)
+    raise RuntimeError(f'{url} did not come up in {timeout}s')
+
+
+def latency_ms(url, n):
+    """Sequential GETs on a fresh connection each — p50 / p95 / max in ms."""
+    samples = []
+    for _ in range(n):
+        started = time.perf_counter()
+        requests.get(url, timeout=10).raise_for_status()
+        samples.append((time.perf_counter() - started) * 1000)
+    samples.sort()
+    return {
+        'p50': statistics.median(samples),
+        'p95': samples[int(0.95 * (len(samples) - 1))],
+        'max': samples[-1],
+    }
+
+
+def rss_mb(pid):
+    with open(f'/proc/{pid}/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    return float('nan')
+
+
+# ── SSE clients ───────────────────────────────────────────────────────────────
+
+class Streams:
+    """Holds N raw SSE connections open and counts what arrives on them."""
+
+    def __init__(self, port):
+        self.port      = port
+        self.connected = 0
+        self.failed    = 0
+        self.closed    = 0
+        self.chunks    = 0
+        self._tasks    = []
+
+    async def _one(self, ready):
+        try:
+            reader, writer = await asyncio.open_connection('127.0.0.1', self.port)
+            writer.write(b'GET /api/replay/live/stream HTTP/1.1\r\nHost: bench\r\n'
+                         b'Accept: text/event-stream\r\n\r\n')
+            status = await reader.readline()
+            if b' 200 ' not in status:
+                raise ConnectionError(status)
+            self.connected += 1
+        except (OSError, ConnectionError):
+            self.failed += 1
+            return
+        finally:
+            ready.release()
+
+        try:
+            while await reader.read(4096):
+                self.chunks += 1
+            self.closed += 1
+        except (OSError, asyncio.CancelledError):
+            pass
+        finally:
+            writer.close()
+
+    async def open(self, n, concurrency=200):
+        ready = asyncio.Semaphore(concurrency)
+        for _ in range(n):
+            await ready.acquire()
+            self._tasks.append(asyncio.create_task(self._one(ready)))
+        for _ in range(concurrency):
+            await ready.acquire()
+
+    def close(self):
+        for task in self._tasks:
+            task.cancel()
+
+
+async def hold_and_measure(args, gateway_port, rest_url, gateway_pid):
+    streams = Streams(gateway_port)
+    started = time.monotonic()
+    await streams.open(args.clients)
+    print(f"  opened {streams.connected} streams in {time.monotonic() - started:.1f}s "
+          f"({streams.failed} failed)")
+
+    # Let a few heartbeats go out so every stream is actually being served
+    await asyncio.sleep(args.hold)
+
+    stats_url = f'http://127.0.0.1:{gateway_port}/api/gateway/stats'
+    loop = asyncio.get_running_loop()
+    rest_loaded    = await loop.run_in_executor(None, latency_ms, rest_url, args.requests)
+    gateway_loaded = await loop.run_in_executor(None, latency_ms, stats_url, args.requests)
+    gw_stats       = await loop.run_in_executor(None, lambda: requests.get(stats_url, timeout=10).json())
+    rss            = rss_mb(gateway_pid)
+
+    result = {
+        'connected':      streams.connected,
+        'failed':         streams.failed,
+        'closed_early':   streams.closed,
+        'chunks':         streams.chunks,
+        'rest':           rest_loaded,
+        'gateway':        gateway_loaded,
+        'gateway_rss_mb': rss,
+        'gateway_stats':  gw_stats,
+    }
+    streams.close()
+    return result
+
+
+def fmt(lat):
+    return f"p50 {lat['p50']:6.2f} ms   p95 {lat['p95']:6.2f} ms   max {lat['max']:7.2f} ms"
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Idle SSE subscribers vs REST latency')
+    parser.add_argument('--clients',  type=int,   default=2000)
+    parser.add_argument('--hold',     type=float, default=10, help='Seconds to hold the streams before measuring')
+    parser.add_argument('--requests', type=int,   default=200, help='Requests per latency sample')
+    parser.add_argument('--max-p95-increase-ms', type=float, default=25,
+                        help='Allowed REST p95 increase with the streams open (default 25)')
+    args = parser.parse_args()
+
+    raise_fd_limit()
+    gateway_port, rest_port = free_port(), free_port()
+    env = dict(
+        os.environ,
+        PYTHONPATH=str(BACKEND),
+        SSE_HEARTBEAT_S='2',
+        GATEWAY_MAX_CLIENTS=str(args.clients * 2),
+        DATABASE_URL=os.getenv('DATABASE_URL') or 'sqlite://',
+    )
+    gateway = subprocess.Popen(
+        [sys.executable, 'gateway.py', '--host', '127.0.0.1', '--port', str(gateway_port)],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL,
+    )
+    rest = subprocess.Popen(
+        [sys.executable, '-c',
+         f'from app import create_app; create_app().run(port={rest_port}, threaded=True)'],
+        cwd=BACKEND, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL,
+    )
+
+    print("\n" + "=" * 60)
+    print(f"Gateway load test — {args.clients} idle live subscribers")
+    print("=" * 60 + "\n")
+
+    try:
+        rest_url = f'http://127.0.0.1:{rest_port}/api/health'
+        wait_until_up(rest_url, rest)
+        wait_until_up(f'http://127.0.0.1:{gateway_port}/health', gateway)
+
+        rest_idle    = latency_ms(rest_url, args.requests)
+        gateway_idle = latency_ms(f'http://127.0.0.1:{gateway_port}/api/gateway/stats', args.requests)
+        rss_idle     = rss_mb(gateway.pid)
+
+        r = asyncio.run(hold_and_measure(args, gateway_port, rest_url, gateway.pid))
+    finally:
+        gateway.terminate()
+        rest.terminate()
+        gateway.wait()
+        rest.wait()
+
+    open_at_end = r['connected'] - r['closed_early']
+    print(f"  streams open at the end: {open_at_end}   chunks received: {r['chunks']}")
+    print(f"  gateway reported:        {r['gateway_stats']['live_clients']} live clients\n")
+    loaded = f'{args.clients} streams'
+    print(f"  REST /api/health   {'idle':<14}{fmt(rest_idle)}")
+    print(f"  REST /api/health   {loaded:<14}{fmt(r['rest'])}")
+    print(f"  gateway /stats     {'idle':<14}{fmt(gateway_idle)}")
+    print(f"  gateway /stats     {loaded:<14}{fmt(r['gateway'])}")
+    print(f"\n  gateway RSS: {rss_idle:.1f} MB idle → {r['gateway_rss_mb']:.1f} MB "
+          f"({(r['gateway_rss_mb'] - rss_idle) * 1024 / max(1, open_at_end):.1f} KB per stream)")
+
+    p95_increase = r['rest']['p95'] - rest_idle['p95']
+    assert open_at_end >= args.clients, f"only {open_at_end}/{args.clients} streams stayed open"
+    assert p95_increase <= args.max_p95_increase_ms, \
+        f"REST p95 rose {p95_increase:.1f} ms with the streams open"
+    print(f"\n✅ {open_at_end} streams held, REST p95 {p95_increase:+.2f} ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,122 @@
+"""
+bench_lap_builder.py — Old per-lap _build_lap loop vs vectorized build_laps.
+
+For every race it builds the laps both ways, checks the JSON output is
+byte-identical, and prints the time for each and the speedup.
+
+Usage:
+    # Offline: synthetic FastF1-shaped laps rebuilt from *_processed.json
+    python bench_lap_builder.py
+    python bench_lap_builder.py --year 2025 --round 3
+
+    # Real FastF1 sessions (needs the FastF1 cache or network)
+    python bench_lap_builder.py --fastf1 --year 2024 --round 1
+"""
+
+import sys
+import json
+import time
+import argparse
+from pathlib import Path
+
+import numpy as np
+import pandas as pd
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.fastf1_service import fastf1_service
+from app.services.lap_builder import build_laps
+
+
+def synthetic_laps(race_data: dict, seed: int = 0) -> pd.DataFrame:
+    """
+    A FastF1-like laps frame (one row per driver per lap, ordered by driver
+    then lap) that reproduces a processed race, plus the awkward rows the
+    builder has to handle: missing LapTime, NaN position/compound/speeds.
+    """
+    rng  = np.random.default_rng(seed)
+    rows = []
+    for lap in race_data['laps']:
+        leader_time = pd.Timedelta(minutes=2) * lap['lap_number']
+        for d in lap['drivers']:
+            gap = d['gap']
+            offset = pd.Timedelta(seconds=float(gap[1:-1])) if gap not in ('LEADER', None) else pd.Timedelta(0)
+            speeds = rng.uniform(180, 330, size=4)
+            speeds[rng.random(4) < 0.08] = np.nan
+            rows.append({
+                'Driver':     d['driver'],
+                'Team':       d['team'],
+                'LapNumber':  float(lap['lap_number']),
+                'Position':   float(d['position']) if d['position'] and rng.random() > 0.01 else np.nan,
+                'LapTime':    pd.Timedelta(d['lap_time']),
+                'Compound':   d['compound'] if d['compound'] != 'UNKNOWN' else np.nan,
+                'TyreLife':   float(d['tire_life']),
+                'PitOutTime': leader_time if d['pit_out'] else pd.NaT,
+                'PitInTime':  leader_time if d['pit_in'] else pd.NaT,
+                'Time':       leader_time + offset + pd.Timedelta(microseconds=int(rng.integers(0, 999))),
+                'SpeedI1':    speeds[0],
+                'SpeedI2':    speeds[1],
+                'SpeedFL':    speeds[2],
+                'SpeedST':    speeds[3],
+            })
+            if rng.random() < 0.01:
+                rows.append({**rows[-1], 'LapTime': pd.NaT})
+
+    frame = pd.DataFrame(rows)
+    frame = frame.sort_values(['Driver', 'LapNumber'], kind='stable').reset_index(drop=True)
+    for col in ('LapTime', 'PitOutTime', 'PitInTime', 'Time'):
+        frame[col] = frame[col].astype('timedelta64[ns]')
+    return frame
+
+
+def bench(name: str, laps: pd.DataFrame, total_laps: int, repeat: int) -> float:
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        old = [fastf1_service._build_lap(laps, n) for n in range(1, total_laps + 1)]
+    t_old = (time.perf_counter() - t0) / repeat
+
+    t0 = time.perf_counter()
+    for _ in range(repeat):
+        new = build_laps(laps, total_laps)
+    t_new = (time.perf_counter() - t0) / repeat
+
+    same = json.dumps(old, indent=2) == json.dumps(new, indent=2)
+    print(f"  {name:<10} rows={len(laps):5d}  loop={t_old * 1000:8.1f} ms  "
+          f"vectorized={t_new * 1000:7.1f} ms  speedup={t_old / t_new:5.1f}x  "
+          f"{'identical' if same else 'MISMATCH'}")
+    if not same:
+        raise SystemExit(f"Output mismatch for {name}")
+    return t_old / t_new
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Benchmark the vectorized lap builder')
+    parser.add_argument('--year',   type=int, default=None)
+    parser.add_argument('--round',  type=int, dest='race_round', default=None)
+    parser.add_argument('--fastf1', action='store_true', help='Use real FastF1 sessions')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    speedups = []
+    if args.fastf1:
+        if not (args.year and args.race_round):
+            raise SystemExit('--fastf1 needs --year and --round')
+        session = fastf1_service.load_race_session(args.year, args.race_round)
+        if session is None:
+            raise SystemExit('Could not load session')
+        speedups.append(bench(f"{args.year}_R{args.race_round}", session.laps,
+                              int(session.total_laps), args.repeat))
+    else:
+        pattern = f"{args.year or '*'}_R{args.race_round or '*'}_processed.json"
+        for path in sorted(fastf1_service.processed_cache_dir.glob(pattern)):
+            with open(path) as f:
+                race_data = json.load(f)
+            name = path.name.replace('_processed.json', '')
+            speedups.append(bench(name, synthetic_laps(race_data), race_data['total_laps'], args.repeat))
+
+    if speedups:
+        print(f"\n  Median speedup: {float(np.median(speedups)):.1f}x over {len(speedups)} race(s)")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+bench_race_prediction_batch.py — Per-prediction loop vs NumPy batch race-prediction scoring.
+
+Generates synthetic race predictions against a cached race (top-10 picks
+drawn around the real result, tyre strategies for a few drivers each),
+then times:
+
+    loop   — score_positions() / score_tyres() per prediction
+    batch  — batch_position_points() / batch_tyre_points() over all of them
+             (encoding the Python lists into arrays included)
+
+and checks both give identical points for every prediction. No database
+is involved — this is the pure scoring cost.
+
+Usage:
+    python bench_race_prediction_batch.py                       # 1M predictions, 2024 R1
+    python bench_race_prediction_batch.py --predictions 100000 --year 2025 --round 3
+    python bench_race_prediction_batch.py --chunk 0             # one batch of everything
+
+The batch side runs in SCORING_CHUNK-sized pieces by default, as the
+scoring executor calls it.
+"""
+
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.fastf1_service import fastf1_service
+from app.services.scoring_executor import SCORING_CHUNK
+from app.services.race_prediction_scoring import (
+    score_positions,
+    score_tyres,
+    batch_position_points,
+    batch_tyre_points,
+    extract_finishing_order,
+    extract_stint_sequences,
+)
+
+COMPOUNDS = ['SOFT', 'MEDIUM', 'HARD']
+
+
+def synthetic_predictions(n, actual_order, actual_stints, seed=0):
+    """n (predicted_order, tyre_strategies) pairs, roughly like real users'."""
+    rng    = random.Random(seed)
+    field  = list(actual_stints) or list(actual_order)
+    orders, strategies = [], []
+    for _ in range(n):
+        # Real result with a few swaps and the odd outsider
+        order = list(actual_order)
+        for _ in range(rng.randint(0, 4)):
+            i, j = rng.randrange(len(order)), rng.randrange(len(order))
+            order[i], order[j] = order[j], order[i]
+        if rng.random() < 0.3:
+            order[rng.randrange(len(order))] = rng.choice(field)
+        orders.append(order)
+
+        strategies.append({
+            code: [rng.choice(COMPOUNDS) for _ in range(rng.randint(1, 3))]
+            for code in rng.sample(order, rng.randint(0, 5))
+        })
+    return orders, strategies
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--year',        type=int, default=2024)
+    parser.add_argument('--round',       type=int, default=1)
+    parser.add_argument('--predictions', type=int, default=1_000_000)
+    parser.add_argument('--chunk',       type=int, default=SCORING_CHUNK, help='batch size (0 = everything at once)')
+    args = parser.parse_args()
+
+    race_data = fastf1_service.load_processed_race(args.year, args.round)
+    if race_data is None:
+        sys.exit(f"Race not cached: {args.year} R{args.round}")
+    actual_order  = extract_finishing_order(race_data)
+    actual_stints = extract_stint_sequences(race_data)
+
+    print(f"{race_data.get('name')} — generating {args.predictions:,} predictions...")
+    orders, strategies = synthetic_predictions(args.predictions, actual_order, actual_stints)
+
+    step   = args.chunk or len(orders)
+    chunks = range(0, len(orders), step)
+    timings, same = {}, True
+    for part, loop_fn, batch_fn, inputs, actual in (
+        ('positions', score_positions, batch_position_points, orders,     actual_order),
+        ('tyres',     score_tyres,     batch_tyre_points,     strategies, actual_stints),
+    ):
+        t0 = time.time()
+        expected = np.fromiter((loop_fn(x, actual) for x in inputs), dtype=np.int64, count=len(inputs))
+        loop_s = time.time() - t0
+
+        t0 = time.time()
+        got = np.concatenate([batch_fn(inputs[i:i + step], actual) for i in chunks])
+        batch_s = time.time() - t0
+
+        timings[part] = (loop_s, batch_s)
+        same = same and np.array_equal(expected, got)
+
+    timings['total'] = tuple(map(sum, zip(*timings.values())))
+    n = len(orders)
+    print(f"  {'':10s} {'loop':>8s} {'batch':>8s} {'speedup':>8s}"
+          f"   (batch {f'in chunks of {step:,}' if args.chunk else 'in one piece'})")
+    for part, (loop_s, batch_s) in timings.items():
+        print(f"  {part:10s} {loop_s:7.2f}s {batch_s:7.2f}s {loop_s / batch_s:7.1f}×")
+    loop_s, batch_s = timings['total']
+    print(f"  throughput {n / loop_s:,.0f} → {n / batch_s:,.0f} predictions/s")
+    print(f"  parity     {'OK — identical points for all predictions' if same else 'MISMATCH'}")
+    if not same:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
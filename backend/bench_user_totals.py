@@ -0,0 +1,179 @@
+"""
+bench_user_totals.py — Per-user Python loop vs set-based user totals recompute.
+
+Seeds a scratch database with synthetic users, in-race predictions and
+scored race predictions, then times:
+
+    old  — the former update_user_aggregate_scores loop: every User, its
+           lazy-loaded predictions and one RacePrediction query per user
+           (timed on --old-users users and extrapolated; 2 queries per user)
+    new  — user_totals.recompute_user_totals(): grouped subqueries + one UPDATE ... FROM
+
+and checks that both produce the same totals for the sampled users:
+total_score and the correct / graded counts exactly, accuracy_rate to the
+rounding rule (see user_totals._accuracy — SQL rounds exact .x5 ties away
+from zero where Python's round() went to even, e.g. 10/32 → 31.3 not 31.2).
+
+Usage:
+    python bench_user_totals.py                                 # 100k users, 5M predictions
+    python bench_user_totals.py --users 10000 --predictions 500000
+    python bench_user_totals.py --database-url postgresql://...  # a throwaway database!
+
+The database at --database-url is DROPPED and recreated. The default is a
+SQLite file in /tmp.
+"""
+
+import os
+import sys
+import time
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+BATCH = 50_000
+
+
+def seed(db, models, users, predictions, race_predictions, seed_value=0):
+    User, Prediction, RacePrediction = models
+    rng = random.Random(seed_value)
+    db.drop_all()
+    db.create_all()
+
+    t0 = time.time()
+    for start in range(0, users, BATCH):
+        db.session.execute(User.__table__.insert(), [
+            {'id': i + 1, 'username': f'u{i}', 'email': f'u{i}@bench.local',
+             'password_hash': '-', 'total_score': 0, 'accuracy_rate': 0.0}
+            for i in range(start, min(users, start + BATCH))
+        ])
+    db.session.commit()
+
+    statuses = ('correct', 'wrong', 'wrong', 'pending')
+    for start in range(0, predictions, BATCH):
+        rows = []
+        for _ in range(start, min(predictions, start + BATCH)):
+            status = rng.choice(statuses)
+            rows.append({
+                'user_id':       rng.randint(1, users),
+                'driver_name':   'VER',
+                'action':        'pit_soft',
+                'predicted_lap': rng.randint(0, 60),
+                'confidence':    rng.randint(1, 10),
+                'status':        status,
+                'points_earned': rng.randint(1, 18) if status == 'correct' else 0,
+            })
+        db.session.execute(Prediction.__table__.insert(), rows)
+        db.session.commit()
+        print(f"\r  predictions {min(predictions, start + BATCH):,}/{predictions:,}", end='', flush=True)
+    print()
+
+    # One race prediction per (user, round) for the first `race_predictions` pairs
+    rows = []
+    for n in range(race_predictions):
+        rows.append({
+            'user_id': n % users + 1, 'year': 2025, 'round_num': n // users + 1,
+            'predicted_order': [], 'tyre_strategies': {},
+            'status': 'scored' if n % 3 else 'pending', 'total_points': rng.randint(-10, 80),
+        })
+        if len(rows) == BATCH:
+            db.session.execute(RacePrediction.__table__.insert(), rows)
+            rows = []
+    if rows:
+        db.session.execute(RacePrediction.__table__.insert(), rows)
+    db.session.commit()
+    print(f"  seeded in {time.time() - t0:.1f}s")
+
+
+def old_loop(db, models, user_ids):
+    """The per-user loop the scoring paths used to run, restricted to user_ids."""
+    User, Prediction, RacePrediction = models
+    out = {}
+    for user in User.query.filter(User.id.in_(user_ids)).all():
+        in_race_preds = [p for p in user.predictions]
+        scored        = [p for p in in_race_preds if p.status in ('correct', 'wrong')]
+        correct       = [p for p in scored if p.status == 'correct']
+
+        in_race_points = sum(p.points_earned for p in in_race_preds)
+        accuracy       = round(len(correct) / len(scored) * 100, 1) if scored else 0.0
+
+        race_preds  = RacePrediction.query.filter_by(user_id=user.id, status='scored').all()
+        race_points = sum(p.total_points for p in race_preds)
+        out[user.id] = (in_race_points + race_points, len(correct), len(scored), accuracy)
+    db.session.rollback()
+    return out
+
+
+def _is_tie(correct, graded):
+    """True when correct / graded × 100 lies exactly halfway between two 1-decimal values."""
+    return graded > 0 and (2000 * correct) % graded == 0 and (2000 * correct // graded) % 2 == 1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--database-url', default='sqlite:////tmp/bench_user_totals.db')
+    parser.add_argument('--users',            type=int, default=100_000)
+    parser.add_argument('--predictions',      type=int, default=5_000_000)
+    parser.add_argument('--race-predictions', type=int, default=200_000)
+    parser.add_argument('--old-users',        type=int, default=2_000,
+                        help='users the old loop is timed on (extrapolated to --users)')
+    parser.add_argument('--reuse', action='store_true', help='skip seeding, use the existing database')
+    args = parser.parse_args()
+
+    os.environ['DATABASE_URL'] = args.database_url
+    from app import create_app
+    from app.models import db, User, Prediction, RacePrediction
+    from app.services.user_totals import recompute_user_totals
+    models = (User, Prediction, RacePrediction)
+
+    app = create_app()
+    with app.app_context():
+        if not args.reuse:
+            print(f"Seeding {args.users:,} users, {args.predictions:,} predictions, "
+                  f"{args.race_predictions:,} race predictions...")
+            seed(db, models, args.users, args.predictions, args.race_predictions)
+
+        users  = db.session.query(User.id).count()
+        sample = random.Random(1).sample(range(1, users + 1), min(args.old_users, users))
+
+        t0 = time.time()
+        expected = old_loop(db, models, sample)
+        old_s = time.time() - t0
+        old_full = old_s * users / len(sample)
+
+        t0 = time.time()
+        changed = recompute_user_totals()
+        new_s = time.time() - t0
+
+        t0 = time.time()
+        recompute_user_totals(sample)
+        subset_s = time.time() - t0
+
+        got = {uid: row for uid, *row in
+               db.session.query(User.id, User.total_score, User.predictions_correct,
+                                User.predictions_graded, User.accuracy_rate)
+               .filter(User.id.in_(sample))}
+        mismatches, ties = [], 0
+        for uid in sample:
+            score, correct, graded, acc = expected[uid]
+            if tuple(got[uid][:3]) != (score, correct, graded):
+                mismatches.append(uid)
+            elif got[uid][3] != acc:
+                if _is_tie(correct, graded) and abs(got[uid][3] - acc) < 0.1 + 1e-9:
+                    ties += 1
+                else:
+                    mismatches.append(uid)
+
+        print()
+        print(f"  old loop   {old_s:8.2f}s for {len(sample):,} users "
+              f"→ ~{old_full:,.0f}s for {users:,} ({1 + 2 * users:,} queries)")
+        print(f"  set-based  {new_s:8.2f}s for {users:,} users (1 statement, {changed:,} rows changed)")
+        print(f"  subset     {subset_s:8.2f}s for {len(sample):,} users")
+        print(f"  speedup    ~{old_full / new_s:,.0f}×")
+        print(f"  parity     {'OK' if not mismatches else f'{len(mismatches)} MISMATCHES e.g. {mismatches[:5]}'}"
+              f" (points and correct/graded exact; {ties} exact .x5 accuracy ties rounded away from zero)")
+
+
+if __name__ == '__main__':
+    main()
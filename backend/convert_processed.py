@@ -0,0 +1,85 @@
+"""
+convert_processed.py — Build the columnar race files from existing processed JSON.
+
+Every *_processed.json in fastf1_cache/processed gets a {year}_R{round}_columns.bin
+next to it (see app/services/race_columns.py). Each file is decoded again after
+writing and compared against the JSON; a race that doesn't round-trip exactly
+is removed and keeps being served from JSON.
+
+Usage:
+    python convert_processed.py                  # every processed race
+    python convert_processed.py --year 2025      # one season
+    python convert_processed.py --year 2025 --round 3
+    python convert_processed.py --force          # rebuild even if up to date
+"""
+
+import sys
+import json
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.fastf1_service import fastf1_service
+from app.services.race_columns import (
+    write_columnar, load_columnar, columns_path, ColumnarRace,
+)
+from app.services.race_cache import source_fingerprint
+
+
+def convert(json_path: Path, force: bool = False) -> str:
+    """Returns 'converted', 'skipped' or 'failed'."""
+    year, round_part = json_path.name.split('_')[:2]
+    year, race_round = int(year), int(round_part[1:])
+    processed_dir = json_path.parent
+
+    if not force and load_columnar(processed_dir, year, race_round) is not None:
+        return 'skipped'
+
+    size, digest = source_fingerprint(json_path)
+    with open(json_path) as f:
+        race_data = json.load(f)
+
+    try:
+        out = write_columnar(processed_dir, year, race_round, race_data,
+                             source_size=size, source_hash=digest)
+    except ValueError as e:
+        print(f"  ✗ {json_path.name}: {e}")
+        return 'failed'
+
+    if ColumnarRace(out).race_dict() != race_data:
+        out.unlink()
+        print(f"  ✗ {json_path.name}: round-trip mismatch, keeping JSON only")
+        return 'failed'
+
+    json_kb = json_path.stat().st_size // 1024
+    col_kb  = out.stat().st_size // 1024
+    print(f"  ✓ {json_path.name} ({json_kb} KB) → {out.name} ({col_kb} KB)")
+    return 'converted'
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Convert processed race JSON to columnar files')
+    parser.add_argument('--year',  type=int, default=None)
+    parser.add_argument('--round', type=int, dest='race_round', default=None)
+    parser.add_argument('--force', action='store_true')
+    args = parser.parse_args()
+
+    pattern = f"{args.year or '*'}_R{args.race_round or '*'}_processed.json"
+    files = sorted(fastf1_service.processed_cache_dir.glob(pattern))
+    if not files:
+        print(f"No processed files match {pattern}")
+        return
+
+    counts = {'converted': 0, 'skipped': 0, 'failed': 0}
+    for path in files:
+        counts[convert(path, force=args.force)] += 1
+
+    print()
+    print(f"Converted: {counts['converted']}  Skipped: {counts['skipped']}  Failed: {counts['failed']}")
+    if counts['failed']:
+        sys.exit(1)
+
+
+if __name__ == '__main__':
+    main()
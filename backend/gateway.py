@@ -0,0 +1,21 @@
+"""
+gateway.py — Entry point for the asyncio live gateway (see app/services/live_gateway.py).
+
+Serves /api/replay/live/stream and /api/replay/simulate/stream from one event
+loop so SSE viewers don't hold gunicorn threads. Run it next to the Flask app:
+
+    python gateway.py                 # 0.0.0.0:8001
+    python gateway.py --port 9000
+"""
+
+import argparse
+
+from app.services.live_gateway import run, GATEWAY_HOST, GATEWAY_PORT
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Asyncio SSE gateway for live and simulated races')
+    parser.add_argument('--host', default=GATEWAY_HOST)
+    parser.add_argument('--port', type=int, default=GATEWAY_PORT)
+    args = parser.parse_args()
+    run(args.host, args.port)
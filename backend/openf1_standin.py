@@ -0,0 +1,343 @@
+"""
+openf1_standin.py — Record, synthesize and replay OpenF1 sessions for offline runs.
+
+Three subcommands around the log format in app/services/openf1_log.py:
+
+    # Build a log from a processed race — no network, no recording needed
+    python openf1_standin.py synth --year 2024 --round 10
+
+    # Record a session from OpenF1 (live: poll until it ends; --once: a past session)
+    python openf1_standin.py record --session-key latest
+    python openf1_standin.py record --session-key 9158 --once
+
+    # Serve a log as a local OpenF1 at 1× or faster, then point the app at it
+    python openf1_standin.py serve fastf1_cache/openf1_logs/2024_R10.jsonl.gz --speed 10
+    OPENF1_BASE=http://127.0.0.1:8765/v1 python run.py
+
+Logs go to fastf1_cache/openf1_logs/ unless --out is given.
+"""
+
+import sys
+import math
+import time
+import argparse
+from pathlib import Path
+from datetime import datetime, timezone
+
+import numpy as np
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.openf1_log import (
+    LogWriter, read_log, make_server, parse_ts, DATED_ENDPOINTS,
+)
+
+LOG_DIR = Path(__file__).parent / 'fastf1_cache' / 'openf1_logs'
+
+# Race start used for synthetic logs (processed races only carry the date)
+SYNTH_START_UTC = (13, 0)
+
+# Permanent numbers for recent grids; unknown codes get numbers from 90 up
+DRIVER_NUMBERS = {
+    'VER': 1, 'SAR': 2, 'RIC': 3, 'NOR': 4, 'BOR': 5, 'HAD': 6, 'DOO': 7, 'GAS': 10,
+    'PER': 11, 'ANT': 12, 'ALO': 14, 'LEC': 16, 'STR': 18, 'MAG': 20, 'TSU': 22,
+    'ALB': 23, 'ZHO': 24, 'HUL': 27, 'LAW': 30, 'OCO': 31, 'COL': 43, 'HAM': 44,
+    'SAI': 55, 'RUS': 63, 'BOT': 77, 'PIA': 81, 'BEA': 87,
+}
+
+PIT_DURATION_S = 22.5
+CORNERS_PER_LAP = 8
+
+
+# ── synth ─────────────────────────────────────────────────────────────────────
+
+def _seconds(value, default=None):
+    """'0 days 00:01:20.876000' / '+1.474s' / number → seconds."""
+    if value is None:
+        return default
+    if isinstance(value, (int, float)):
+        return float(value) if not math.isnan(value) else default
+    text = str(value).strip()
+    if text.startswith('+') and text.endswith('s'):
+        try:
+            return float(text[1:-1])
+        except ValueError:
+            return default
+    if 'days' in text:
+        try:
+            days, clock = text.split(' days ')
+            h, m, s = clock.split(':')
+            return int(days) * 86400 + int(h) * 3600 + int(m) * 60 + float(s)
+        except ValueError:
+            return default
+    return default
+
+
+def _iso(ts):
+    return datetime.fromtimestamp(ts, timezone.utc).isoformat()
+
+
+def synthesize(race: dict, out_path, car_hz: float):
+    """Write an OpenF1 log that replays a processed race as if it were live."""
+    year, rnd = race['year'], race['round']
+    day       = datetime.fromisoformat(race['date'][:10])
+    start     = day.replace(hour=SYNTH_START_UTC[0], minute=SYNTH_START_UTC[1], tzinfo=timezone.utc)
+    start_ts  = start.timestamp()
+    sk        = year * 100 + rnd
+    laps      = race['laps']
+
+    numbers, teams = {}, {}
+    next_free = 90
+    for lap in laps:
+        for d in lap['drivers']:
+            code = d.get('driver')
+            if code and code not in numbers:
+                if code in DRIVER_NUMBERS:
+                    numbers[code] = DRIVER_NUMBERS[code]
+                else:
+                    numbers[code], next_free = next_free, next_free + 1
+                teams[code] = d.get('team', 'Unknown')
+
+    # Lap end time per driver = leader's cumulative time + that driver's gap
+    leader_cum, lap_windows, lap_ends = 0.0, [], []
+    for lap in laps:
+        leader  = min(lap['drivers'], key=lambda d: d.get('position') or 99, default=None)
+        lap_len = _seconds(leader.get('lap_time') if leader else None, 90.0)
+        lap_windows.append((leader_cum, leader_cum + lap_len))
+        leader_cum += lap_len
+        ends = {}
+        for d in lap['drivers']:
+            gap = 0.0 if d.get('gap') == 'LEADER' else _seconds(d.get('gap'), None)
+            ends[d['driver']] = leader_cum + (gap if gap is not None else lap_len)
+        lap_ends.append(ends)
+    race_len = leader_cum
+
+    with LogWriter(out_path, sk, start, source=f'synthetic from {year}_R{rnd}_processed.json') as log:
+        log.snapshot('sessions', 0, [{
+            'session_key':        sk,
+            'meeting_key':        sk,
+            'session_name':       'Race',
+            'session_type':       'Race',
+            'year':               year,
+            'circuit_short_name': race.get('circuit', ''),
+            'date_start':         start.isoformat(),
+            'date_end':           _iso(start_ts + race_len + 600),
+        }])
+        log.snapshot('drivers', 0, [
+            {'driver_number': num, 'name_acronym': code, 'team_name': teams[code], 'session_key': sk}
+            for code, num in numbers.items()
+        ])
+        log.dated('race_control', [{
+            'date': start.isoformat(), 'category': 'Flag', 'flag': 'GREEN',
+            'message': 'GREEN LIGHT - PIT EXIT OPEN', 'lap_number': 1, 'session_key': sk,
+        }])
+
+        last_pos, stints, all_stints = {}, {}, []
+        for i, lap in enumerate(laps):
+            lap_no = lap['lap_number']
+            ends   = lap_ends[i]
+            order  = sorted(lap['drivers'], key=lambda d: d.get('position') or 99)
+            positions, intervals, pits = [], [], []
+            prev_gap = None
+            new_stint = False
+            for d in order:
+                code, num = d['driver'], numbers[d['driver']]
+                date = _iso(start_ts + ends[code])
+                if last_pos.get(num) != d.get('position'):
+                    positions.append({'date': date, 'driver_number': num,
+                                      'position': d.get('position'), 'session_key': sk})
+                    last_pos[num] = d.get('position')
+
+                gap = 0.0 if d.get('gap') == 'LEADER' else _seconds(d.get('gap'), None)
+                interval = None
+                if gap is not None and prev_gap is not None:
+                    interval = round(gap - prev_gap, 3)
+                intervals.append({
+                    'date':          date,
+                    'driver_number': num,
+                    'gap_to_leader': gap if gap is not None else d.get('gap'),
+                    'interval':      interval,
+                    'session_key':   sk,
+                })
+                prev_gap = gap if gap is not None else prev_gap
+
+                current = stints.get(num)
+                if current is None or d.get('pit_out') or d.get('compound') != current['compound']:
+                    stints[num] = {
+                        'driver_number':      num,
+                        'stint_number':       (current['stint_number'] + 1) if current else 1,
+                        'compound':           d.get('compound'),
+                        'lap_start':          lap_no,
+                        'lap_end':            lap_no,
+                        'tyre_age_at_start':  max(0, (d.get('tire_life') or 1) - 1),
+                        'session_key':        sk,
+                    }
+                    all_stints.append(stints[num])
+                    new_stint = True
+                else:
+                    current['lap_end'] = lap_no
+                if d.get('pit_in'):
+                    pits.append({'date': date, 'driver_number': num, 'lap_number': lap_no,
+                                 'pit_duration': PIT_DURATION_S, 'session_key': sk})
+
+            log.dated('position', positions)
+            log.dated('intervals', intervals)
+            log.dated('pit', pits)
+            if new_stint or i == 0:
+                log.snapshot('stints', lap_windows[i][0], [dict(s) for s in all_stints])
+
+            if car_hz > 0:
+                for d in order:
+                    log.dated('car_data', _car_rows(d, numbers[d['driver']], sk, start_ts,
+                                                    lap_windows[i], lap_no, car_hz))
+
+        log.dated('race_control', [{
+            'date': _iso(start_ts + race_len), 'category': 'Flag', 'flag': 'CHEQUERED',
+            'message': 'CHEQUERED FLAG', 'lap_number': laps[-1]['lap_number'] if laps else 0,
+            'session_key': sk,
+        }])
+        return log.rows, race_len
+
+
+def _car_rows(d, num, sk, start_ts, window, lap_no, hz):
+    """Plausible car_data samples for one driver over one lap (CORNERS_PER_LAP braking zones)."""
+    lap_start, lap_end = window
+    t = np.arange(lap_start, lap_end, 1.0 / hz)
+    if not len(t):
+        return []
+    avg   = d.get('avg_speed') or 200.0
+    top   = max(d.get('max_speed') or avg + 60.0, avg + 1.0)
+    wave  = np.sin(2 * np.pi * CORNERS_PER_LAP * (t - lap_start) / (lap_end - lap_start) + num)
+    speed = np.clip(avg + (top - avg) * wave, 70, None).round()
+    gear  = np.clip((speed / 42).round().astype(int), 1, 8)
+    throttle = np.where(wave > -0.3, np.clip(60 + 40 * wave, 0, 100), 0).round()
+    brake = np.where(wave < -0.6, 100, 0)
+    drs   = np.where((wave > 0.92) & (lap_no > 2), 12, 0)
+    return [
+        {'date': _iso(start_ts + ti), 'driver_number': num, 'speed': int(s), 'n_gear': int(g),
+         'throttle': int(th), 'brake': int(b), 'drs': int(dr), 'rpm': int(4000 + s * 40),
+         'session_key': sk}
+        for ti, s, g, th, b, dr in zip(t, speed, gear, throttle, brake, drs)
+    ]
+
+
+def cmd_synth(args):
+    from app.services.fastf1_service import fastf1_service
+
+    race = fastf1_service.load_processed_race(args.year, args.race_round)
+    if race is None:
+        sys.exit(f"No processed race for {args.year} R{args.race_round} — run warm_cache.py first")
+    out = Path(args.out) if args.out else LOG_DIR / f'{args.year}_R{args.race_round}.jsonl.gz'
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    started = time.perf_counter()
+    rows, race_len = synthesize(race, out, args.car_hz)
+    print(f"✓ {out}  {rows:,} rows, {race_len / 60:.0f} min of racing, "
+          f"{out.stat().st_size / 1e6:.1f} MB, {time.perf_counter() - started:.1f}s")
+
+
+# ── record ────────────────────────────────────────────────────────────────────
+
+def cmd_record(args):
+    from app.services import http_client
+    from app.services.fastf1_service import OPENF1_BASE
+    from app.services.live_store import DateFeed
+
+    base = args.base or OPENF1_BASE
+
+    def fetch_list(url, deadline=None):
+        try:
+            data = http_client.get_json(url, timeout=15, deadline=deadline)
+            return data if isinstance(data, list) else []
+        except Exception as e:
+            print(f"  ! {url}: {e}")
+            return []
+
+    sessions = fetch_list(f'{base}/sessions?session_key={args.session_key}')
+    if not sessions:
+        sys.exit(f"Session {args.session_key} not found at {base}")
+    session  = sessions[-1]
+    sk       = session['session_key']
+    start    = datetime.fromtimestamp(parse_ts(session['date_start']), timezone.utc)
+    end_ts   = parse_ts(session.get('date_end')) or start.timestamp() + 3 * 3600
+    out      = Path(args.out) if args.out else LOG_DIR / f'session_{sk}.jsonl.gz'
+    out.parent.mkdir(parents=True, exist_ok=True)
+
+    endpoints = [ep for ep in DATED_ENDPOINTS if ep != 'car_data' or not args.no_car]
+    feeds     = {ep: DateFeed(ep) for ep in endpoints}
+    last      = {}
+    stop_at   = time.time() + args.duration
+
+    print(f"Recording session {sk} from {base} → {out}")
+    with LogWriter(out, sk, start, source=f'recorded from {base}') as log:
+        log.snapshot('sessions', 0, sessions)
+        try:
+            while True:
+                t = 0.0 if args.once else time.time() - start.timestamp()
+                for ep, feed in feeds.items():
+                    log.dated(ep, feed.advance(feed.fetch(fetch_list, base, sk)))
+                for ep in ('drivers', 'stints'):
+                    rows = fetch_list(f'{base}/{ep}?session_key={sk}')
+                    if rows and rows != last.get(ep):
+                        log.snapshot(ep, t, rows)
+                        last[ep] = rows
+                print(f"  t={t:7.0f}s  rows={log.rows:,}")
+
+                if args.once or time.time() >= stop_at or time.time() > end_ts + 600:
+                    break
+                time.sleep(args.interval)
+        except KeyboardInterrupt:
+            print("  stopped")
+    print(f"✓ {out}  {out.stat().st_size / 1e6:.1f} MB")
+
+
+# ── serve ─────────────────────────────────────────────────────────────────────
+
+def cmd_serve(args):
+    log = read_log(args.log)
+    server = make_server(log, args.host, args.port, speed=args.speed, offset_s=args.start)
+    print(f"Replaying session {log.session_key} ({log.duration_s / 60:.0f} min) "
+          f"at {args.speed:g}× from t={args.start:g}s")
+    print(f"  OPENF1_BASE=http://{args.host}:{args.port}/v1")
+    print(f"  clock:       http://{args.host}:{args.port}/_replay")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+def main():
+    parser = argparse.ArgumentParser(description='OpenF1 record / synthesize / replay')
+    sub = parser.add_subparsers(dest='command', required=True)
+
+    p = sub.add_parser('synth', help='Build a log from a processed race')
+    p.add_argument('--year',   type=int, default=2024)
+    p.add_argument('--round',  type=int, dest='race_round', default=10)
+    p.add_argument('--car-hz', type=float, default=1.0, help='car_data sample rate per driver (0 = none)')
+    p.add_argument('--out')
+    p.set_defaults(func=cmd_synth)
+
+    p = sub.add_parser('record', help='Record a session from OpenF1')
+    p.add_argument('--session-key', default='latest')
+    p.add_argument('--base',     help='OpenF1 base URL (default OPENF1_BASE)')
+    p.add_argument('--once',     action='store_true', help='One full fetch, for a finished session')
+    p.add_argument('--interval', type=float, default=3)
+    p.add_argument('--duration', type=float, default=4 * 3600, help='Stop after this many seconds')
+    p.add_argument('--no-car',   action='store_true', help='Skip car_data')
+    p.add_argument('--out')
+    p.set_defaults(func=cmd_record)
+
+    p = sub.add_parser('serve', help='Replay a log as a local OpenF1')
+    p.add_argument('log')
+    p.add_argument('--host',  default='127.0.0.1')
+    p.add_argument('--port',  type=int, default=8765)
+    p.add_argument('--speed', type=float, default=1.0, help='Session seconds per wall second')
+    p.add_argument('--start', type=float, default=0.0, help='Session time to start from, in seconds')
+    p.set_defaults(func=cmd_serve)
+
+    args = parser.parse_args()
+    args.func(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+rebuild_user_totals.py — Reconcile every user's total_score / accuracy_rate with their predictions.
+
+Scoring a race only adds that race's deltas to the users who took part
+(see app/services/user_totals.py). This rebuilds the totals from the full
+prediction history instead — after editing predictions by hand, restoring
+a backup, or changing the point rules.
+
+Usage:
+    python rebuild_user_totals.py              # rebuild every user
+    python rebuild_user_totals.py --user 42    # just these users (repeatable)
+    python rebuild_user_totals.py --check      # report drift, write nothing
+
+Databases created before the running counts existed get the
+users.predictions_correct / predictions_graded columns, the
+predictions.user_id index and the scoring_runs checkpoint table added first.
+Nothing existing is dropped — this is the upgrade path for a live database.
+"""
+
+import sys
+import time
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from sqlalchemy import inspect, text
+
+from app import create_app
+from app.models import db, ScoringRun
+from app.services.user_totals import recompute_user_totals
+
+MIGRATIONS = (
+    ('users', 'predictions_correct',
+     'ALTER TABLE users ADD COLUMN predictions_correct INTEGER DEFAULT 0'),
+    ('users', 'predictions_graded',
+     'ALTER TABLE users ADD COLUMN predictions_graded INTEGER DEFAULT 0'),
+)
+INDEXES = (
+    'CREATE INDEX IF NOT EXISTS ix_predictions_user_id ON predictions (user_id)',
+)
+
+
+def migrate():
+    """Add the running-count columns, the user_id index and scoring_runs where missing."""
+    inspector = inspect(db.engine)
+    for table, column, ddl in MIGRATIONS:
+        if column not in {c['name'] for c in inspector.get_columns(table)}:
+            print(f"  adding {table}.{column}")
+            db.session.execute(text(ddl))
+    for ddl in INDEXES:
+        db.session.execute(text(ddl))
+    db.session.commit()
+
+    if not inspector.has_table(ScoringRun.__tablename__):
+        print(f"  creating {ScoringRun.__tablename__}")
+    ScoringRun.__table__.create(db.engine, checkfirst=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rebuild user totals from all predictions')
+    parser.add_argument('--user',  type=int, action='append', help='user id (repeatable)')
+    parser.add_argument('--check', action='store_true', help='count users that would change, then roll back')
+    args = parser.parse_args()
+
+    app = create_app()
+    with app.app_context():
+        migrate()
+
+        t0 = time.time()
+        changed = recompute_user_totals(args.user, commit=not args.check)
+        elapsed = time.time() - t0
+        scope = f"{len(set(args.user))} user(s)" if args.user else 'all users'
+
+        if args.check:
+            db.session.rollback()
+            print(f"{changed} of {scope} out of date ({elapsed:.1f}s) — nothing written")
+        else:
+            print(f"Rebuilt {scope} in {elapsed:.1f}s — {changed} changed")
+
+
+if __name__ == '__main__':
+    main()
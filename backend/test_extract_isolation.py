@@ -0,0 +1,85 @@
+"""
+Test script: parent RSS stays flat when FastF1 extraction runs in a child process.
+
+Rebuilds the telemetry-heavy artifacts (processed laps, circuit, speeds) for
+one race several times with force=True and records this process's resident
+set size after each run. With FASTF1_SUBPROCESS on (the default) the loads
+happen in short-lived children, so the parent should not grow between runs.
+--inline runs the same loads in-process for comparison.
+
+Needs the race in the FastF1 cache (or network access). Rewrites that race's
+artifacts in fastf1_cache/processed/ with identical content.
+
+Usage:
+    python test_extract_isolation.py --year 2024 --round 1
+    python test_extract_isolation.py --year 2024 --round 1 --runs 5 --inline
+"""
+
+import os
+import sys
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+
+def rss_mb():
+    """Current (not peak) resident set size of this process."""
+    with open('/proc/self/status') as f:
+        for line in f:
+            if line.startswith('VmRSS:'):
+                return int(line.split()[1]) / 1024
+    raise RuntimeError('VmRSS not available — this check needs Linux')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Check parent RSS across repeated extractions')
+    parser.add_argument('--year',  type=int, default=2024)
+    parser.add_argument('--round', type=int, dest='race_round', default=1)
+    parser.add_argument('--runs',  type=int, default=3)
+    parser.add_argument('--max-growth-mb', type=float, default=50,
+                        help='Allowed RSS growth from the first to the last run (default 50)')
+    parser.add_argument('--inline', action='store_true',
+                        help='Extract in-process (FASTF1_SUBPROCESS=0) for comparison')
+    args = parser.parse_args()
+
+    # Read at import time by extract_process, so set it before importing the app
+    os.environ['FASTF1_SUBPROCESS'] = '0' if args.inline else '1'
+    from app.services.fastf1_service import fastf1_service
+
+    mode = 'in-process' if args.inline else 'child process'
+    print("\n" + "=" * 60)
+    print(f"Extraction RSS check — {args.year} R{args.race_round}, {args.runs} runs, {mode}")
+    print("=" * 60 + "\n")
+
+    baseline = rss_mb()
+    print(f"  baseline RSS: {baseline:7.1f} MB")
+
+    samples = []
+    for run in range(1, args.runs + 1):
+        result = fastf1_service.build_race_artifacts(
+            args.year, args.race_round, force=True,
+            artifacts=('processed', 'circuit', 'speeds'),
+        )
+        if 'error' in result:
+            print(f"\n⚠️  Could not load the session: {result['error']}")
+            print("   Warm the FastF1 cache for this race first. Skipping.")
+            sys.exit(2)
+
+        samples.append(rss_mb())
+        print(f"  run {run}: RSS {samples[-1]:7.1f} MB  {result}")
+
+    growth = samples[-1] - samples[0]
+    print(f"\n  growth first → last run: {growth:+.1f} MB (limit {args.max_growth_mb:.0f} MB)")
+    print(f"  growth over baseline:    {samples[-1] - baseline:+.1f} MB")
+
+    if args.inline:
+        print("\nℹ️  In-process mode is informational only — no assertion.")
+        return
+
+    assert growth <= args.max_growth_mb, f"Parent RSS grew {growth:.1f} MB across runs"
+    print("\n✅ Parent RSS stayed flat")
+
+
+if __name__ == '__main__':
+    main()
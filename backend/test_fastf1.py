@@ -19,8 +19,9 @@ def test_fetch_race():
         for race in races[:3]:
             print(f"  Round {race['round']}: {race['name']}")
     
-    # Test 2: Get race summary
-    print("\n📊 Fetching race summary for 2024 Round 1 (Bahrain)...")
+    # Test 2: Build every artifact from one session load, then read the summary
+    print("\n📊 Building race artifacts for 2024 Round 1 (Bahrain)...")
+    print(f"   {fastf1_service.build_race_artifacts(2024, 1)}")
     summary = fastf1_service.get_race_summary(2024, 1)
     if summary:
         print(f"✅ Winner: {summary['winner']}")
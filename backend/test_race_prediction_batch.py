@@ -0,0 +1,118 @@
+"""
+test_race_prediction_batch.py — Property tests: NumPy batch scorer == per-prediction scorer.
+
+Generates random races and random (often malformed) race predictions and
+checks that score_predictions_batch() returns exactly score_positions() /
+score_tyres() for every one of them. Covers duplicates, unknown drivers,
+more than 10 picks, lowercase driver keys, unknown compounds, stint lists
+longer or shorter than the real ones, and races with <10 classified
+drivers or no stint data. Every cached *_processed.json is used as a real
+race as well.
+
+Run with:  python test_race_prediction_batch.py [--cases 300] [--seed 0]
+      or:  python -m pytest -q test_race_prediction_batch.py
+"""
+
+import sys
+import random
+import argparse
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).parent))
+
+from app.services.fastf1_service import fastf1_service
+from app.services.race_prediction_scoring import (
+    score_positions,
+    score_tyres,
+    score_predictions_batch,
+    extract_finishing_order,
+    extract_stint_sequences,
+)
+
+DRIVERS   = ['VER', 'PER', 'LEC', 'SAI', 'HAM', 'RUS', 'NOR', 'PIA', 'ALO', 'STR',
+             'GAS', 'OCO', 'ALB', 'SAR', 'TSU', 'RIC', 'BOT', 'ZHO', 'HUL', 'MAG']
+COMPOUNDS = ['SOFT', 'MEDIUM', 'HARD', 'INTERMEDIATE', 'WET']
+ODD       = ['XXX', 'ver', '', 'UNKNOWN', 'soft']
+
+
+def random_race(rng):
+    """(actual_order, actual_stints) — sometimes short or missing data."""
+    field  = rng.sample(DRIVERS, rng.randint(0, len(DRIVERS)))
+    order  = field[:rng.choice([10, 10, 10, rng.randint(0, 10)])]
+    stints = {code: [rng.choice(COMPOUNDS[:3]) for _ in range(rng.randint(0, 4))]
+              for code in field if rng.random() < 0.95}
+    return order, stints
+
+
+def random_prediction(rng):
+    """(predicted_order, tyre_strategies) as users (or bad clients) might send."""
+    pool  = DRIVERS + ODD
+    order = rng.sample(pool, rng.randint(0, 12))
+    if order and rng.random() < 0.1:
+        order[rng.randrange(len(order))] = rng.choice(order)   # duplicate pick
+
+    strategies = {}
+    for code in rng.sample(pool, rng.randint(0, 8)):
+        key = code.lower() if rng.random() < 0.1 else code
+        strategies[key] = [rng.choice(COMPOUNDS + ODD) for _ in range(rng.randint(0, 5))]
+    return order, strategies
+
+
+def assert_parity(orders, strategies, actual_order, actual_stints):
+    pos, tyre = score_predictions_batch(orders, strategies, actual_order, actual_stints)
+    assert len(pos) == len(tyre) == len(orders)
+    for i, (order, strats) in enumerate(zip(orders, strategies)):
+        expected = (score_positions(order, actual_order), score_tyres(strats, actual_stints))
+        got      = (int(pos[i]), int(tyre[i]))
+        assert got == expected, (
+            f"prediction {i}: batch {got} != loop {expected}\n"
+            f"  order={order}\n  strategies={strats}\n"
+            f"  actual_order={actual_order}\n  actual_stints={actual_stints}")
+
+
+# ── Tests ─────────────────────────────────────────────────────────────────────
+
+def test_random_races(cases=300, seed=0):
+    rng = random.Random(seed)
+    for _ in range(cases):
+        actual_order, actual_stints = random_race(rng)
+        preds = [random_prediction(rng) for _ in range(rng.randint(0, 40))]
+        assert_parity([p[0] for p in preds], [p[1] for p in preds], actual_order, actual_stints)
+
+
+def test_cached_races(seed=0):
+    rng = random.Random(seed)
+    for path in sorted(fastf1_service.processed_cache_dir.glob('*_processed.json'))[:10]:
+        year, rnd = path.name.split('_')[:2]
+        race_data = fastf1_service.load_processed_race(int(year), int(rnd[1:]))
+        actual_order, actual_stints = extract_finishing_order(race_data), extract_stint_sequences(race_data)
+
+        # Perfect, near and random predictions against the real result
+        preds = [(actual_order, {code: actual_stints.get(code, []) for code in actual_order})]
+        preds += [random_prediction(rng) for _ in range(200)]
+        assert_parity([p[0] for p in preds], [p[1] for p in preds], actual_order, actual_stints)
+
+
+def test_edge_cases():
+    order  = ['VER', 'NOR', 'LEC']
+    stints = {'VER': ['SOFT', 'HARD'], 'NOR': ['MEDIUM']}
+    assert_parity([], [], order, stints)                             # no predictions
+    assert_parity([[], ['VER']], [{}, {}], order, stints)            # empty picks
+    assert_parity([['VER'] * 12], [{'ver': ['SOFT', 'HARD', 'HARD']}], order, stints)
+    assert_parity([['NOR', 'VER']], [{'VER': ['SOFT']}], [], {})     # no result data
+    assert_parity([['VER']], [{'ver': ['SOFT'], 'NOR': ['MEDIUM']}],  # lower-case result key
+                  order, {'ver': ['SOFT'], 'NOR': ['MEDIUM']})
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Batch vs loop race-prediction scoring parity')
+    parser.add_argument('--cases', type=int, default=300)
+    parser.add_argument('--seed',  type=int, default=0)
+    args = parser.parse_args()
+
+    test_edge_cases()
+    print("edge cases    OK")
+    test_random_races(args.cases, args.seed)
+    print(f"random races  OK ({args.cases} races)")
+    test_cached_races(args.seed)
+    print("cached races  OK")
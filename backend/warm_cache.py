@@ -17,6 +17,31 @@ Usage:
     # Force re-process even if cache already exists
     python warm_cache.py --force
 
+    # Reprocess a whole season 3 races at a time, within 6 GB of RAM
+    python warm_cache.py --year 2025 --force --jobs 3 --mem-budget-mb 6000
+
+Parallel mode:
+    --jobs N runs each race in its own short-lived worker process (one race per
+    process, so its memory goes back to the OS when it finishes). FastF1 needs
+    1–2 GB per session, so workers are only admitted while the sum of their
+    expected peak RSS fits in --mem-budget-mb. The expectation starts at
+    --job-mem-mb and is raised to the largest peak actually observed.
+
+Each race is loaded from FastF1 ONCE (with telemetry) and every artifact the
+API serves is written from that single session: processed laps, circuit,
+weather timeline, summary and per-driver per-lap speeds (see
+app/services/race_pipeline.py). Only missing artifacts are built unless
+--force is given, which rebuilds them all.
+
+Every processed race also gets a lap index ({year}_R{round}_laps.jsonl +
+.idx.json) and a compact columnar copy ({year}_R{round}_columns.bin) so the
+replay endpoints can read one lap without parsing the whole race, plus its
+simulation frames ({year}_R{round}_sim.jsonl): the /live/state payload of
+every lap, intervals included, serialized once so the simulate endpoints
+send bytes as-is. Running the warmer over already-cached races backfills
+any that are missing (convert_processed.py does the columnar part on its
+own, without FastF1).
+
 Deploy tip:
     Add this to your startup script or a cron job:
         python warm_cache.py --year 2025
@@ -28,6 +53,10 @@ import sys
 import time
 import argparse
 import datetime
+import resource
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor, FIRST_COMPLETED, wait
 from pathlib import Path
 
 # Make sure Flask app context is available
@@ -39,51 +68,56 @@ import fastf1
 
 def warm_race(year: int, race_round: int, race_name: str, force: bool = False) -> bool:
     """
-    Process and cache a single race. Returns True if processed, False if skipped.
+    Build every artifact for a single race from one FastF1 load.
+    Returns True if anything was (re)built, False if skipped or failed.
     """
     cache_file = fastf1_service.processed_cache_dir / f"{year}_R{race_round}_processed.json"
+    missing    = fastf1_service.missing_artifacts(year, race_round)
 
-    if cache_file.exists() and not force:
+    if not missing and not force:
         size_kb = cache_file.stat().st_size // 1024
         print(f"  ✓ Already cached ({size_kb} KB) — skipping. Use --force to reprocess.")
+        warm_derived(year, race_round)
         return False
 
-    print(f"  Processing...", flush=True)
+    print(f"  Building {', '.join(missing) if not force else 'all artifacts'}...", flush=True)
     t0 = time.time()
 
     try:
-        data = fastf1_service.process_race_telemetry(year, race_round)
+        result  = fastf1_service.build_race_artifacts(year, race_round, force=force)
         elapsed = time.time() - t0
 
-        if data:
-            size_kb = cache_file.stat().st_size // 1024
-            print(f"  ✓ Done in {elapsed:.1f}s — {len(data['laps'])} laps cached ({size_kb} KB)")
-            return True
-        else:
-            print(f"  ✗ Failed — no data returned (race may not exist yet)")
+        if 'error' in result:
+            print(f"  ✗ Failed after {elapsed:.1f}s — {result['error']} (race may not exist yet)")
             return False
 
+        written = [name for name, state in result.items() if state in ('written', 'empty')]
+        failed  = [name for name, state in result.items() if state == 'failed']
+        if cache_file.exists():
+            warm_derived(year, race_round)
+        print(f"  ✓ Done in {elapsed:.1f}s — wrote {', '.join(written) or 'nothing'}"
+              + (f"; failed {', '.join(failed)}" if failed else ''))
+        return bool(written) and not failed
+
     except Exception as e:
         elapsed = time.time() - t0
         print(f"  ✗ Error after {elapsed:.1f}s: {e}")
         return False
 
 
-def warm_circuit(year: int, race_round: int, force: bool = False) -> bool:
-    """Cache circuit coordinate data for a race."""
-    cache_file = fastf1_service.processed_cache_dir / f"{year}_R{race_round}_circuit.json"
-
-    if cache_file.exists() and not force:
-        return False  # silent skip, already cached
-
+def warm_derived(year: int, race_round: int) -> bool:
+    """
+    Backfill the lap index, columnar file and simulation frames for a race
+    that was processed before those artifacts existed.
+    """
     try:
-        data = fastf1_service.get_circuit_data(year, race_round)
-        if data:
-            print(f"  ✓ Circuit data cached ({len(data.get('coordinates', []))} points)")
-            return True
+        fastf1_service.ensure_lap_index(year, race_round)
+        fastf1_service.ensure_columnar(year, race_round)
+        fastf1_service.ensure_sim_frames(year, race_round)
+        return True
     except Exception as e:
-        print(f"  ✗ Circuit cache failed: {e}")
-    return False
+        print(f"  ✗ Derived artifacts failed: {e}")
+        return False
 
 
 def get_completed_races(year: int):
@@ -115,6 +149,110 @@ def get_completed_races(year: int):
         return []
 
 
+# ── Per-race task (runs in-process or in a pool worker) ──────────────────────
+
+def _peak_rss_mb() -> float:
+    """
+    Peak resident set size so far of this process or the largest child it
+    has waited for — with FASTF1_SUBPROCESS the FastF1 load happens in an
+    extraction child, and that's where the real footprint is.
+    """
+    peak = max(resource.getrusage(resource.RUSAGE_SELF).ru_maxrss,
+               resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss)
+    # Linux reports KB, macOS reports bytes
+    return peak / (1024 * 1024) if sys.platform == 'darwin' else peak / 1024
+
+
+def warm_one(year: int, race_round: int, race_name: str, force: bool = False,
+             isolated: bool = False) -> dict:
+    """
+    Warm every artifact for one race and report how it went:
+    {'year', 'round', 'name', 'status': processed|skipped|failed, 'elapsed', 'peak_rss_mb'}
+
+    peak_rss_mb is only this race's when it ran in a fresh pool worker
+    (isolated); in-process it would be the peak of every race so far, so
+    it's None there.
+    """
+    t0 = time.time()
+    status = 'failed'
+    try:
+        if warm_race(year, race_round, race_name, force=force):
+            status = 'processed'
+        else:
+            # Skipped only if nothing is left missing
+            status = 'failed' if fastf1_service.missing_artifacts(year, race_round) else 'skipped'
+    except Exception as e:
+        print(f"  ✗ {year} R{race_round} crashed: {e}")
+
+    return {
+        'year':        year,
+        'round':       race_round,
+        'name':        race_name,
+        'status':      status,
+        'elapsed':     time.time() - t0,
+        'peak_rss_mb': _peak_rss_mb() if isolated else None,
+    }
+
+
+def _available_memory_mb():
+    """MemAvailable from /proc/meminfo, or None where that isn't readable."""
+    try:
+        with open('/proc/meminfo') as f:
+            for line in f:
+                if line.startswith('MemAvailable:'):
+                    return int(line.split()[1]) / 1024
+    except OSError:
+        pass
+    return None
+
+
+def run_parallel(tasks, force, jobs, mem_budget_mb, job_mem_mb):
+    """
+    Run warm_one for every (year, round, name) in a process pool, admitting a
+    new worker only while the expected peak RSS of all running workers fits
+    in mem_budget_mb (and in what the OS currently reports as available).
+    """
+    results  = []
+    pending  = deque(tasks)
+    running  = {}
+    expected = job_mem_mb
+
+    ctx = multiprocessing.get_context('spawn')
+    with ProcessPoolExecutor(max_workers=jobs, mp_context=ctx, max_tasks_per_child=1) as pool:
+        while pending or running:
+            while pending and len(running) < jobs:
+                committed = (len(running) + 1) * expected
+                available = _available_memory_mb()
+                fits = committed <= mem_budget_mb and (available is None or expected <= available)
+                if running and not fits:
+                    break   # wait for a worker to finish and free memory
+                year, race_round, race_name = pending.popleft()
+                print(f"  ▶ {year} R{race_round:2d}: {race_name} "
+                      f"({len(running) + 1} running, ~{committed:.0f} MB committed)", flush=True)
+                fut = pool.submit(warm_one, year, race_round, race_name, force, isolated=True)
+                running[fut] = (year, race_round, race_name)
+
+            done, _ = wait(running, return_when=FIRST_COMPLETED)
+            for fut in done:
+                year, race_round, race_name = running.pop(fut)
+                try:
+                    result = fut.result()
+                except Exception as e:
+                    # Worker died (e.g. OOM-killed) — record it and move on
+                    result = {'year': year, 'round': race_round, 'name': race_name,
+                              'status': 'failed', 'elapsed': 0.0, 'peak_rss_mb': 0.0,
+                              'error': str(e) or type(e).__name__}
+                    print(f"  ✗ {year} R{race_round} worker failed: {result['error']}")
+
+                # Learn the real footprint so admission tracks this machine/season
+                expected = max(expected, result['peak_rss_mb'])
+                print(f"  ■ {year} R{race_round:2d}: {result['status']} in "
+                      f"{result['elapsed']:.1f}s, peak {result['peak_rss_mb']:.0f} MB", flush=True)
+                results.append(result)
+
+    return results
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Pre-warm FastF1 race cache for Pitlane Live'
@@ -131,6 +269,18 @@ def main():
         '--force', action='store_true',
         help='Force reprocessing even if cache exists.'
     )
+    parser.add_argument(
+        '--jobs', type=int, default=1,
+        help='Races to process in parallel worker processes (default 1, in-process).'
+    )
+    parser.add_argument(
+        '--mem-budget-mb', type=float, default=None,
+        help='Peak RSS budget across all workers. Defaults to 75%% of available memory.'
+    )
+    parser.add_argument(
+        '--job-mem-mb', type=float, default=2048,
+        help='Expected peak RSS of one race before any has been measured (default 2048).'
+    )
     args = parser.parse_args()
 
     # Default to current year if none specified
@@ -143,13 +293,18 @@ def main():
     print(f"  Force:  {args.force}")
     if args.race_round:
         print(f"  Round:  {args.race_round} only")
+
+    mem_budget_mb = args.mem_budget_mb
+    if args.jobs > 1:
+        if mem_budget_mb is None:
+            available = _available_memory_mb()
+            mem_budget_mb = available * 0.75 if available else args.job_mem_mb * args.jobs
+        print(f"  Jobs:   {args.jobs} (memory budget {mem_budget_mb:.0f} MB)")
     print("=" * 60)
     print()
 
-    total_processed = 0
-    total_skipped   = 0
-    total_failed    = 0
-    grand_start     = time.time()
+    grand_start = time.time()
+    tasks       = []
 
     for year in years:
         print(f"── {year} Season ──────────────────────────────────────")
@@ -166,34 +321,45 @@ def main():
             continue
 
         print(f"  Found {len(races_to_process)} race(s) to process.\n")
-
-        for race_round, race_name in races_to_process:
-            print(f"  Round {race_round:2d}: {race_name}")
-
-            # Warm circuit data first (fast, needed for track rendering)
-            warm_circuit(year, race_round, force=args.force)
-
-            # Warm full race telemetry
-            success = warm_race(year, race_round, race_name, force=args.force)
-
-            if success is True:
-                total_processed += 1
-            elif success is False:
-                # Distinguish skipped vs failed by checking cache file
-                cache_file = fastf1_service.processed_cache_dir / f"{year}_R{race_round}_processed.json"
-                if cache_file.exists():
-                    total_skipped += 1
-                else:
-                    total_failed += 1
-
+        tasks.extend((year, race_round, race_name) for race_round, race_name in races_to_process)
+
+    if args.jobs > 1 and len(tasks) > 1:
+        results = run_parallel(tasks, args.force, args.jobs, mem_budget_mb, args.job_mem_mb)
+        print()
+    else:
+        results = []
+        for year, race_round, race_name in tasks:
+            print(f"  {year} Round {race_round:2d}: {race_name}")
+            results.append(warm_one(year, race_round, race_name, force=args.force))
             print()
 
+    total_processed = sum(1 for r in results if r['status'] == 'processed')
+    total_skipped   = sum(1 for r in results if r['status'] == 'skipped')
+    total_failed    = sum(1 for r in results if r['status'] == 'failed')
+
     elapsed = time.time() - grand_start
     print("=" * 60)
     print(f"  Complete in {elapsed:.0f}s")
     print(f"  Processed : {total_processed}")
     print(f"  Skipped   : {total_skipped} (already cached)")
     print(f"  Failed    : {total_failed}")
+    if results:
+        print()
+        print(f"  {'Race':<10} {'Status':<10} {'Wall':>8} {'Peak RSS':>10}")
+        for r in sorted(results, key=lambda r: (r['year'], r['round'])):
+            peak = f"{r['peak_rss_mb']:7.0f} MB" if r['peak_rss_mb'] is not None else f"{'—':>10}"
+            print(f"  {r['year']}_R{r['round']:<5} {r['status']:<10} "
+                  f"{r['elapsed']:7.1f}s {peak}")
+        if any(r['peak_rss_mb'] is None for r in results):
+            # Races ran one after another in this process — only the overall peak is known
+            print(f"  Peak RSS over the whole run: {_peak_rss_mb():.0f} MB")
+        failed = [r for r in results if r['status'] == 'failed']
+        if failed:
+            print()
+            print("  Failures:")
+            for r in failed:
+                print(f"    {r['year']} R{r['round']} {r['name']}"
+                      + (f" — {r['error']}" if r.get('error') else ''))
     print("=" * 60)
 
     if total_failed > 0:
@@ -46,11 +46,28 @@ class APIService {
     return response.data
   }
 
-  async getReplayRaceData(year, round) {
-    const response = await axios.get(`${API_ROOT}/replay/race/${year}/${round}`)
+  // A race that hasn't been processed yet comes back as 202 + a background
+  // job. Poll the job (reporting progress) until it finishes, then refetch.
+  async getReplayRaceData(year, round, onProgress = null) {
+    const url = `${API_ROOT}/replay/race/${year}/${round}`
+    let response = await axios.get(url)
+    while (response.status === 202) {
+      const job = await this.waitForJob(response.data.job_id, onProgress)
+      if (job.status === 'failed') throw new Error(job.error || 'Race processing failed')
+      response = await axios.get(url)
+    }
     return response.data
   }
 
+  async waitForJob(jobId, onProgress = null, intervalMs = 2000) {
+    for (;;) {
+      const { data: job } = await axios.get(`${API_ROOT}/jobs/${jobId}`)
+      if (onProgress) onProgress(job)
+      if (job.status === 'done' || job.status === 'failed') return job
+      await new Promise(resolve => setTimeout(resolve, intervalMs))
+    }
+  }
+
   async getReplayLapData(year, round, lap) {
     const response = await axios.get(`${API_ROOT}/replay/lap/${year}/${round}/${lap}`)
     return response.data
@@ -12,3 +12,13 @@ export function apiUrl(path) {
   if (!path.startsWith('/')) return `${API_ROOT}/${path}`
   return `${API_ROOT}${path}`
 }
+
+// Long-lived SSE streams can be served by the asyncio gateway (backend/gateway.py)
+// instead of the REST app; falls back to the API origin when unset.
+const rawStreamBase = import.meta.env.VITE_STREAM_URL || ''
+const STREAM_ROOT = rawStreamBase ? `${normalizeBase(rawStreamBase)}/api` : API_ROOT
+
+export function streamUrl(path) {
+  if (!path.startsWith('/')) return `${STREAM_ROOT}/${path}`
+  return `${STREAM_ROOT}${path}`
+}